@@ -0,0 +1,84 @@
+"""Deterministic synthetic M3U playlist generator for the benchmarks.
+
+Produces Xtream-style playlists with a realistic mix of live channels,
+movies and series episodes:
+
+    python benchmarks/generate_playlist.py 100000 playlists/synthetic.m3u --seed 1
+"""
+import argparse
+import random
+
+WORDS = ["news", "sport", "movie", "love", "war", "star", "night", "city", "blue", "red",
+         "king", "dark", "house", "river", "fire", "world", "life", "story", "gold", "time",
+         "road", "lost", "last", "wild", "home", "ghost", "storm", "heart", "secret", "game"]
+COUNTRIES = ["UK", "US", "DE", "FR", "ES", "IT", "NL", "PL", "TR", "AR", "IN", "PT"]
+LIVE_CATEGORIES = ["News", "Sports", "Movies", "Kids", "Music", "Documentary", "Entertainment"]
+VOD_GENRES = ["Action", "Comedy", "Drama", "Horror", "Thriller", "Family", "Sci-Fi", "Romance"]
+
+# Share of live / movie / series entries, roughly what large providers ship
+DEFAULT_MIX = (0.2, 0.5, 0.3)
+
+def title(rng, words=3):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).title()
+
+def generate_entries(count, seed=0, mix=DEFAULT_MIX, host="http://provider.example.com:8080",
+                     username="benchuser", password="benchpass"):
+    """Yield (extinf_line, url) pairs; the same arguments always give the same playlist"""
+    rng = random.Random(seed)
+    live_share, movie_share, _ = mix
+    show = None
+    for i in range(count):
+        stream_id = 100000 + i
+        kind = rng.random()
+        country = rng.choice(COUNTRIES)
+        if kind < live_share:
+            name = f"{country}: {title(rng, 2)} {rng.choice(['HD', 'FHD', 'SD', '4K'])}"
+            group = f"{country} | {rng.choice(LIVE_CATEGORIES)}"
+            url = f"{host}/live/{username}/{password}/{stream_id}.ts"
+            extra = f' tvg-id="{name.split(": ")[1].replace(" ", "").lower()}.{country.lower()}" tvg-chno="{i % 1000 + 1}"'
+            logo = f"http://logos.example.com/live/{stream_id}.png"
+        elif kind < live_share + movie_share:
+            name = f"{country} - {title(rng)} ({rng.randint(1960, 2025)})"
+            group = f"VOD | {country} | {rng.choice(VOD_GENRES)}"
+            url = f"{host}/movie/{username}/{password}/{stream_id}.mkv"
+            extra = ""
+            logo = f"https://image.tmdb.org/t/p/w600_and_h900_bestv2/{stream_id:x}.jpg"
+        else:
+            # Episodes come in runs of the same show, like real providers list them
+            if show is None or rng.random() < 0.05:
+                show = (f"{country} - {title(rng, 2)}", rng.randint(1, 8), rng.choice(VOD_GENRES), country)
+                season, episode = 1, 0
+            episode += 1
+            if episode > rng.randint(8, 24):
+                season, episode = min(season + 1, show[1]), 1
+            name = f"{show[0]} S{season:02d} E{episode:02d}"
+            group = f"SERIES | {show[3]} | {show[2]}"
+            url = f"{host}/series/{username}/{password}/{stream_id}.mp4"
+            extra = ""
+            logo = f"https://image.tmdb.org/t/p/w600_and_h900_bestv2/s{stream_id:x}.jpg"
+        
+        extinf = (f'#EXTINF:-1 tvg-name="{name}" tvg-logo="{logo}" '
+                  f'group-title="{group}"{extra},{name}')
+        yield extinf, url
+
+def write_playlist(path, count, seed=0, mix=DEFAULT_MIX):
+    """Write a synthetic playlist with `count` entries and return its path"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('#EXTM3U\n')
+        for extinf, url in generate_entries(count, seed, mix):
+            f.write(extinf)
+            f.write('\n')
+            f.write(url)
+            f.write('\n')
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic M3U playlist")
+    parser.add_argument('entries', type=int, help="number of entries (e.g. 10000 to 2000000)")
+    parser.add_argument('output', help="path of the .m3u file to write")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_playlist(args.output, args.entries, args.seed)
+
+if __name__ == "__main__":
+    main()
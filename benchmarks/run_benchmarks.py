@@ -0,0 +1,472 @@
+"""Performance benchmarks for the IPTV Player.
+
+Times playlist parsing, search, tree population (offscreen Qt), downloads
+from a local HTTP server, incremental playlist updates, parallel parsing
+speedup, restoring the last session at start-up and the cost of timing
+instrumentation on synthetic playlists, plus start-up time of the GUI module and the CLI, and writes the results as JSON so runs from different versions can
+be compared:
+
+    python benchmarks/run_benchmarks.py --sizes 10000,100000 --output bench.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+# Tree benchmarks need a QApplication but no display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from generate_playlist import write_playlist
+import iptv_core as core
+import main as player
+from PyQt5.QtWidgets import QApplication
+
+SEARCH_QUERIES = ["news", "king", "ghost storm", "s02 e1", "uk:", "zzzz", "a"]
+BENCHMARKS = ('parse', 'memory', 'search', 'tree', 'download', 'update', 'parallel', 'restore',
+              'tracing', 'startup')
+# Modules the GUI should not import until they are needed
+DEFERRED_MODULES = ('vlc', 'requests', 'PyQt5.QtMultimedia')
+# Starts the GUI on a data directory and reports once the saved session is back
+RESTORE_SCRIPT = """
+import json, sys
+from PyQt5.QtWidgets import QApplication
+import main
+app = QApplication(sys.argv[:1])
+window = main.IPTVPlayer(sys.argv[1])
+def restored():
+    print(json.dumps(dict(window.startup_timings, tab=window.tabs.currentIndex())), flush=True)
+    app.quit()
+window.session_restored.connect(restored)
+window.show()
+app.exec_()
+"""
+
+def measure(func, repeat=5):
+    """Run func repeat times; return (best, median) seconds and the last result"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings), result
+
+def parse_playlist(path, workers=0):
+    """Parse synchronously on this thread and return (channels, movies, series, worker)"""
+    worker = core.PlaylistParser(path, workers=workers)
+    parsed = {}
+    worker.finished.connect(lambda channels, movies, series: parsed.update(
+        channels=channels, movies=movies, series=series))
+    worker.run()
+    return parsed['channels'], parsed['movies'], parsed['series'], worker
+
+def bench_parse(path, entries):
+    best, median, (_, _, _, worker) = measure(lambda: parse_playlist(path), repeat=3)
+    return {
+        'entries': entries,
+        'file_bytes': os.path.getsize(path),
+        'best_s': best,
+        'median_s': median,
+        'entries_per_sec': entries / best,
+        'mb_per_sec': os.path.getsize(path) / best / (1024 * 1024),
+        'index_build_s': worker.stats.get('index_elapsed', 0.0),
+        'progress_signals': worker.stats.get('progress', {})
+    }
+
+def bench_memory(path, entries):
+    gc.collect()
+    tracemalloc.start()
+    parsed = parse_playlist(path)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    return {
+        'entries': entries,
+        'retained_bytes': current,
+        'peak_bytes': peak,
+        'bytes_per_entry': current / entries
+    }
+
+def bench_search(sections, entries):
+    results = {'entries': entries, 'queries': {}}
+    for section, media_dict in zip(('channels', 'movies', 'series'), sections):
+        best, _, search_index = measure(lambda: core.SearchIndex(media_dict), repeat=1)
+        tree = player.MediaTreeWidget()
+        tree.populate_tree(media_dict)
+
+        section_results = {'index_build_s': best, 'items': len(search_index), 'queries': {}}
+        for query in SEARCH_QUERIES:
+            def run_query():
+                # Reset so every run is a cold query rather than a refinement
+                tree.set_search_index(search_index)
+                tree.search(query)
+                return tree.media_model.total_items()
+            best, median, matches = measure(run_query)
+            section_results['queries'][query] = {'best_ms': best * 1000, 'median_ms': median * 1000,
+                                                 'matches': matches}
+        results['queries'][section] = section_results
+
+    search_indexes = {section: core.SearchIndex(media_dict)
+                      for section, media_dict in zip(('channels', 'movies', 'series'), sections)}
+    results['global'] = {}
+    for query in SEARCH_QUERIES:
+        best, median, ranked = measure(lambda: core.global_search(search_indexes, query))
+        results['global'][query] = {'best_ms': best * 1000, 'median_ms': median * 1000,
+                                    'matches': len(ranked)}
+    return results
+
+def bench_tree(app, sections, entries):
+    results = {'entries': entries}
+    for section, media_dict in zip(('channels', 'movies', 'series'), sections):
+        tree = player.MediaTreeWidget()
+        tree.resize(800, 600)
+        tree.show()
+
+        def populate():
+            tree.populate_tree(media_dict)
+            app.processEvents()
+        best, median, _ = measure(populate)
+
+        # Expanding the largest group is the worst case for a tab
+        model = tree.media_model
+        sizes = [len(media_dict[group]) for group in model.groups]
+        largest = sizes.index(max(sizes)) if sizes else 0
+
+        def expand():
+            tree.collapseAll()
+            tree.expand(model.index(largest, 0))
+            app.processEvents()
+        expand_best, expand_median, _ = measure(expand)
+
+        results[section] = {
+            'groups': len(media_dict),
+            'populate_best_s': best,
+            'populate_median_s': median,
+            'largest_group': max(sizes) if sizes else 0,
+            'expand_largest_best_s': expand_best,
+            'expand_largest_median_s': expand_median
+        }
+        tree.close()
+    return results
+
+def edit_playlist(path, fraction, seed):
+    """Rename a fraction of the entries in place, like a provider's daily refresh"""
+    rng = random.Random(seed)
+    with open(path, 'rb') as f:
+        lines = f.read().split(b'\n')
+    info_lines = [i for i, line in enumerate(lines) if line.startswith(b'#EXTINF:')]
+    edited = rng.sample(info_lines, max(1, int(len(info_lines) * fraction)))
+    for i in edited:
+        lines[i] += b' (HD)'
+    with open(path, 'wb') as f:
+        f.write(b'\n'.join(lines))
+    return len(edited)
+
+def bench_update(path, entries, seed, fraction=0.01):
+    sections = parse_playlist(path)
+    best, _, _ = measure(lambda: parse_playlist(path), repeat=1)
+    app_dir = tempfile.mkdtemp(prefix='iptv-update-')
+    try:
+        # The app's cache and library hold the previous version when an update starts
+        cache = core.PlaylistCache(os.path.join(app_dir, 'cache'))
+        library = core.MediaLibrary(os.path.join(app_dir, 'library.db'))
+        def store():
+            for target in (cache, library):
+                target.store(path, *sections[:3], sections[3].header, sections[3].series_shows)
+        store_best, _, _ = measure(store, repeat=1)
+        edited = edit_playlist(path, fraction, seed)
+
+        def update(cache=None, library=None):
+            worker = core.PlaylistUpdater(path, sections[:3], sections[3].series_shows, cache, library)
+            timings = {}
+            start = time.perf_counter()
+            worker.finished.connect(lambda *args: timings.update(applied=time.perf_counter() - start))
+            worker.indexes_ready.connect(lambda: timings.update(indexed=time.perf_counter() - start))
+            worker.run()
+            return worker, timings
+        update_best, update_median, (worker, timings) = measure(update, repeat=3)
+        # Once only: afterwards the library already holds the edited version
+        saved_best, _, _ = measure(lambda: update(cache, library), repeat=1)
+    finally:
+        shutil.rmtree(app_dir, ignore_errors=True)
+    return {
+        'entries': entries,
+        'edited': edited,
+        'full_parse_s': best,
+        'full_store_s': store_best,
+        'update_best_s': update_best,
+        'update_median_s': update_median,
+        'update_to_finished_s': timings.get('applied'),
+        'update_to_indexes_s': timings.get('indexed'),
+        # Including the cache and library writes, which only touch the edited rows
+        'update_saved_s': saved_best,
+        'stats': {key: worker.stats[key] for key in ('unchanged', 'added', 'changed', 'removed')}
+    }
+
+def worker_counts():
+    """1, 2, 4, ... up to the number of cores, plus the core count itself"""
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+def bench_parallel(path, entries):
+    results = {'entries': entries, 'file_bytes': os.path.getsize(path), 'workers': {}}
+    # Include process start-up, as the app pays it on every load
+    threshold = core.PlaylistParser.parallel_min_bytes
+    core.PlaylistParser.parallel_min_bytes = 0
+    try:
+        baseline = None
+        for workers in worker_counts():
+            best, median, _ = measure(lambda: parse_playlist(path, workers), repeat=3)
+            baseline = baseline or best
+            results['workers'][workers] = {'best_s': best, 'median_s': median,
+                                           'speedup': baseline / best}
+    finally:
+        core.PlaylistParser.parallel_min_bytes = threshold
+    return results
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def bench_download(path, entries, work_dir):
+    serve_dir = os.path.dirname(path)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=serve_dir))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/{os.path.basename(path)}"
+    save_path = os.path.join(work_dir, 'downloads', 'playlist.m3u')
+
+    try:
+        def download(validators=None):
+            worker = core.PlaylistDownloader(url, save_path, validators)
+            outcome = {}
+            emitted = []
+            worker.progress.connect(lambda *args: emitted.append(args))
+            try:
+                outcome['status'] = 'downloaded' if worker.fetch() else 'not_modified'
+            except Exception as e:
+                outcome.update(status='error', error=str(e))
+            return worker, outcome, emitted
+
+        best, median, (worker, outcome, emitted) = measure(download, repeat=3)
+        validators = worker.validators
+        refresh_best, _, (_, refresh_outcome, _) = measure(lambda: download(validators), repeat=3)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    size = os.path.getsize(path)
+    return {
+        'entries': entries,
+        'bytes': size,
+        'best_s': best,
+        'median_s': median,
+        'mb_per_sec': size / best / (1024 * 1024),
+        'outcome': outcome.get('status'),
+        'progress_signals_emitted': len(emitted),
+        'progress_signals': worker.reporter.stats(),
+        'conditional_refresh_best_s': refresh_best,
+        'conditional_refresh_outcome': refresh_outcome.get('status')
+    }
+
+def bench_startup(repeat=5):
+    """Time fresh interpreters importing the core, the GUI module and running the CLI"""
+    root = os.path.dirname(BENCH_DIR)
+    commands = {
+        'interpreter': [sys.executable, '-c', 'pass'],
+        'import_core': [sys.executable, '-c', 'import iptv_core'],
+        'import_gui': [sys.executable, '-c', 'import main'],
+        'cli_help': [sys.executable, os.path.join(root, 'iptv_cli.py'), '--help']
+    }
+    results = {}
+    for name, command in commands.items():
+        def start():
+            subprocess.run(command, cwd=root, check=True, stdout=subprocess.DEVNULL)
+        best, median, _ = measure(start, repeat)
+        results[name] = {'best_s': best, 'median_s': median}
+    
+    check = ("import sys, json, main; "
+             f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))")
+    output = subprocess.check_output([sys.executable, '-c', check], cwd=root)
+    results['gui_imports_deferred_modules'] = json.loads(output)
+    return results
+
+def bench_restore(path, entries, repeat=3):
+    """Time fresh GUI processes from launch until the last session is restored"""
+    app_dir = tempfile.mkdtemp(prefix='iptv-restore-')
+    try:
+        # What closing the GUI leaves behind: the parse cache and a session file
+        cache = core.PlaylistCache(os.path.join(app_dir, 'cache'))
+        os.makedirs(cache.cache_dir, exist_ok=True)
+        worker = core.PlaylistParser(path, cache)
+        parsed = {}
+        worker.finished.connect(lambda channels, movies, series: parsed.update(movies=movies))
+        worker.run()
+        group = next(iter(parsed['movies']))
+        session = {
+            'version': player.IPTVPlayer.session_version, 'playlists': [path], 'merged': False,
+            'tab': 1, 'search': '', 'global_search': False,
+            'trees': {'movies': {'query': '', 'expanded': [[group]], 'top': [group, 0]}}
+        }
+        with open(os.path.join(app_dir, 'session.json'), 'w') as f:
+            json.dump(session, f)
+        
+        runs = []
+        def restore():
+            start = time.perf_counter()
+            process = subprocess.Popen([sys.executable, '-c', RESTORE_SCRIPT, app_dir],
+                                       cwd=os.path.dirname(BENCH_DIR), stdout=subprocess.PIPE)
+            line = process.stdout.readline()
+            elapsed = time.perf_counter() - start
+            process.wait()
+            runs.append(json.loads(line))
+            return elapsed
+        best, median, _ = measure(restore, repeat)
+    finally:
+        shutil.rmtree(app_dir, ignore_errors=True)
+    return {
+        'entries': entries,
+        'launch_to_interactive_best_s': best,
+        'launch_to_interactive_median_s': median,
+        # Seconds after main.py started importing, as measured inside the GUI
+        'first_paint_s': statistics.median(run['first_paint'] for run in runs),
+        'interactive_s': statistics.median(run['interactive'] for run in runs),
+        'restored_tab': runs[-1]['tab']
+    }
+
+def bench_tracing(path, entries, calls=1000000):
+    """Parse time with the tracer off and on, and the per-call cost of disabled instrumentation"""
+    tracer = core.Tracer()
+    def disabled_calls():
+        for _ in range(calls):
+            with tracer.span('bench'):
+                pass
+            tracer.count('bench')
+    def empty_calls():
+        for _ in range(calls):
+            pass
+    disabled_best, _, _ = measure(disabled_calls, repeat=3)
+    empty_best, _, _ = measure(empty_calls, repeat=3)
+    
+    timings = {}
+    try:
+        for enabled in (False, True):
+            core.tracer.enabled = enabled
+            core.tracer.clear()
+            best, median, _ = measure(lambda: parse_playlist(path), repeat=3)
+            timings[enabled] = (best, median)
+        events = len(core.tracer.snapshot()[0])
+    finally:
+        core.tracer.enabled = False
+        core.tracer.clear()
+    return {
+        'entries': entries,
+        'disabled_span_and_count_ns': (disabled_best - empty_best) / calls * 1e9,
+        'parse_tracing_off_best_s': timings[False][0],
+        'parse_tracing_on_best_s': timings[True][0],
+        'parse_overhead_ratio': timings[True][0] / timings[False][0] - 1,
+        'events_per_parse': events / 3
+    }
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=BENCH_DIR, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(sizes, benchmarks, seed):
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    work_dir = tempfile.mkdtemp(prefix='iptv-bench-')
+    report = {
+        'timestamp': time.time(),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'results': {name: [] for name in benchmarks}
+    }
+
+    try:
+        if 'startup' in benchmarks:
+            report['results']['startup'].append(bench_startup())
+        for entries in sizes:
+            path = os.path.join(work_dir, 'playlists', f'synthetic-{entries}.m3u')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_playlist(path, entries, seed)
+            print(f"{entries} entries ({os.path.getsize(path) / (1024 * 1024):.1f} MB)", file=sys.stderr)
+
+            if 'parse' in benchmarks:
+                report['results']['parse'].append(bench_parse(path, entries))
+            if 'memory' in benchmarks:
+                report['results']['memory'].append(bench_memory(path, entries))
+            if 'search' in benchmarks or 'tree' in benchmarks:
+                channels, movies, series, _ = parse_playlist(path)
+                if 'search' in benchmarks:
+                    report['results']['search'].append(bench_search((channels, movies, series), entries))
+                if 'tree' in benchmarks:
+                    report['results']['tree'].append(bench_tree(app, (channels, movies, series), entries))
+            if 'download' in benchmarks:
+                report['results']['download'].append(bench_download(path, entries, work_dir))
+            if 'update' in benchmarks:
+                report['results']['update'].append(bench_update(path, entries, seed))
+            if 'parallel' in benchmarks:
+                report['results']['parallel'].append(bench_parallel(path, entries))
+            if 'restore' in benchmarks:
+                report['results']['restore'].append(bench_restore(path, entries))
+            if 'tracing' in benchmarks:
+                report['results']['tracing'].append(bench_tracing(path, entries))
+
+            os.remove(path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the IPTV Player performance benchmarks")
+    parser.add_argument('--sizes', default='10000,100000',
+                        help="comma separated playlist sizes in entries (10000 to 2000000)")
+    parser.add_argument('--benchmarks', default=','.join(BENCHMARKS),
+                        help=f"comma separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    benchmarks = [name for name in args.benchmarks.split(',') if name]
+    unknown = set(benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    report = run(sizes, benchmarks, args.seed)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
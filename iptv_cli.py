@@ -0,0 +1,180 @@
+"""Command-line front end to iptv_core, for headless use on servers.
+
+    python iptv_cli.py download http://provider.example/playlist.m3u
+    python iptv_cli.py parse playlists/<md5>.m3u --workers 8
+    python iptv_cli.py search "news" --playlist playlists/<md5>.m3u
+    python iptv_cli.py stats playlists/<md5>.m3u
+    python iptv_cli.py export a.m3u b.m3u --output merged.m3u --query sport
+    python iptv_cli.py --trace trace.json parse playlists/<md5>.m3u
+
+Downloads, the parse cache and the library are shared with the GUI when
+--data-dir is the GUI's directory (the default).
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import iptv_core as core
+
+SECTIONS = ('channels', 'movies', 'series')
+
+def open_storage(args):
+    """(cache, library) under the data directory, or (None, None) with --no-cache"""
+    if args.no_cache:
+        return None, None
+    cache_dir = os.path.join(args.data_dir, 'cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return core.PlaylistCache(cache_dir), core.MediaLibrary(os.path.join(args.data_dir, 'library.db'))
+
+def load(args, playlist_path):
+    cache, library = open_storage(args)
+    return core.load_playlist(playlist_path, cache, library, getattr(args, 'workers', 0))
+
+def load_sections(args, playlist_paths):
+    """Parse one playlist, or merge several; returns (parser, channels, movies, series)"""
+    if len(playlist_paths) == 1:
+        return load(args, playlist_paths[0])
+    cache, library = open_storage(args)
+    merger = core.PlaylistMerger(playlist_paths, [os.path.basename(path) for path in playlist_paths],
+                                 cache, library)
+    parsed = []
+    merger.finished.connect(lambda channels, movies, series: parsed.extend((channels, movies, series)))
+    merger.run()
+    return (merger,) + tuple(parsed)
+
+def print_progress(current, total, reporter):
+    speed = reporter.speed / (1024 * 1024)
+    if total:
+        print(f"\r{current * 100 // total:3d}%  {speed:.1f} MB/s", end='', file=sys.stderr)
+    else:
+        print(f"\r{current / (1024 * 1024):.1f} MB  {speed:.1f} MB/s", end='', file=sys.stderr)
+
+def command_download(args):
+    library = None
+    info = {}
+    filename = hashlib.md5(args.url.encode()).hexdigest() + '.m3u'
+    save_path = args.output
+    if save_path is None:
+        # Same naming and metadata as the GUI, so it lists the playlist too
+        save_path = os.path.join(args.data_dir, 'playlists', filename)
+        library = core.MediaLibrary(os.path.join(args.data_dir, 'library.db'))
+        info = library.playlist_info().get(filename, {})
+
+    downloader = core.PlaylistDownloader(args.url, save_path, info.get('validators'))
+    if not args.quiet:
+        downloader.progress.connect(print_progress)
+    downloader.retrying.connect(
+        lambda delay: print(f"\nConnection lost, retrying in {delay:.0f} seconds", file=sys.stderr))
+    downloaded = downloader.fetch()
+    if not args.quiet:
+        print(file=sys.stderr)
+
+    if library is not None:
+        library.save_playlist_info(filename, {'url': args.url, 'timestamp': time.time(),
+                                              'path': save_path, 'validators': downloader.validators})
+    print(f"{'Downloaded' if downloaded else 'Not modified'}: {save_path}")
+
+def command_parse(args):
+    parser, channels, movies, series = load(args, args.playlist)
+    stats = parser.stats
+    counts = [sum(len(items) for items in section.values()) for section in (channels, movies, series)]
+    source = "cache" if stats.get('cached') else f"{stats.get('workers', 1)} worker(s)"
+    print(f"{stats['entries']} entries in {stats['elapsed']:.2f} s ({source}), "
+          f"search indexes in {stats.get('index_elapsed', 0.0):.2f} s")
+    for name, section, count in zip(SECTIONS, (channels, movies, series), counts):
+        print(f"  {name}: {count} entries in {len(section)} groups")
+
+def command_search(args):
+    if args.playlist is None:
+        cache, library = open_storage(args)
+        if library is None:
+            sys.exit("Searching the library needs it; drop --no-cache or name a playlist")
+        for filename, section, group, _, name in library.search(args.query, limit=args.limit):
+            print(f"{filename}\t{section}\t{group}\t{name}")
+        return
+
+    parser, channels, movies, series = load(args, args.playlist)
+    search_indexes = parser.search_indexes
+    if args.section:
+        search_indexes = {args.section: search_indexes[args.section]}
+    for section, item in core.global_search(search_indexes, args.query, args.limit):
+        print(f"{section}\t{item.group}\t{item.name}\t{item.stream_url}")
+
+def command_stats(args):
+    parser, channels, movies, series = load(args, args.playlist)
+    print(f"Playlist: {args.playlist} ({os.path.getsize(args.playlist) / (1024 * 1024):.1f} MB)")
+    for name, section in zip(SECTIONS, (channels, movies, series)):
+        sizes = sorted(((len(items), group) for group, items in section.items()), reverse=True)
+        print(f"{name}: {sum(size for size, _ in sizes)} entries in {len(sizes)} groups")
+        for size, group in sizes[:args.top]:
+            print(f"  {size:8d}  {group}")
+    print(f"series shows: {len(parser.series_shows)}")
+    for url in parser.epg_urls():
+        print(f"EPG: {url}")
+
+def command_export(args):
+    parser, channels, movies, series = load_sections(args, args.playlists)
+    sections = (channels, movies, series)
+    if args.query:
+        # Keep matching entries only, in their groups and playlist order
+        search_indexes = {name: core.SearchIndex(section) for name, section in zip(SECTIONS, sections)}
+        sections = tuple(search_indexes[name].group_results(search_indexes[name].search(args.query))
+                         for name in SECTIONS)
+    entries = core.export_m3u(args.output, sections, parser.header)
+    print(f"Exported {entries} entries to {args.output}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download, parse, search and export IPTV playlists")
+    parser.add_argument('--data-dir', default=os.path.dirname(os.path.abspath(__file__)),
+                        help="directory holding playlists/, cache/ and library.db (default: the app's)")
+    parser.add_argument('--no-cache', action='store_true', help="always parse, never read or write the cache")
+    parser.add_argument('--trace', metavar='FILE', help="write timings as a Chrome trace (chrome://tracing)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    download = commands.add_parser('download', help="download a playlist, conditionally if already present")
+    download.add_argument('url')
+    download.add_argument('--output', help="save here instead of the data directory")
+    download.add_argument('--quiet', action='store_true', help="no progress output")
+    download.set_defaults(run=command_download)
+
+    parse = commands.add_parser('parse', help="parse a playlist and report timings")
+    parse.add_argument('playlist')
+    parse.add_argument('--workers', type=int, default=0, help="worker processes for large files")
+    parse.set_defaults(run=command_parse)
+
+    search = commands.add_parser('search', help="search a playlist, or every playlist in the library")
+    search.add_argument('query')
+    search.add_argument('--playlist', help="rank matches in this playlist instead of the library")
+    search.add_argument('--section', choices=SECTIONS)
+    search.add_argument('--limit', type=int, default=50)
+    search.set_defaults(run=command_search)
+
+    stats = commands.add_parser('stats', help="entry and group counts of a playlist")
+    stats.add_argument('playlist')
+    stats.add_argument('--top', type=int, default=10, help="largest groups to list per section")
+    stats.set_defaults(run=command_stats)
+
+    export = commands.add_parser('export', help="write one or more playlists, merged, as M3U")
+    export.add_argument('playlists', nargs='+')
+    export.add_argument('--output', required=True)
+    export.add_argument('--query', help="only entries matching this search")
+    export.set_defaults(run=command_export)
+
+    args = parser.parse_args(argv)
+    core.tracer.enabled = bool(args.trace)
+    try:
+        with core.tracer.span(args.command):
+            args.run(args)
+    except BrokenPipeError:
+        # Output piped into head or similar; stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except Exception as e:
+        sys.exit(f"Error: {e}")
+    finally:
+        if args.trace:
+            core.tracer.export(args.trace)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2323 @@
+"""Playlist download, parsing, storage, search and export, without Qt or VLC.
+
+main.py builds the GUI on top of this module; iptv_cli.py drives it from
+the command line.
+"""
+import os
+import re
+import time
+import json
+import pickle
+import sqlite3
+import threading
+import gzip
+import zlib
+import mmap
+import calendar
+from bisect import bisect_right
+import heapq
+from array import array
+from itertools import repeat, islice, compress, accumulate
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
+
+class Signal:
+    """Plain callback list with the connect/emit interface of a Qt signal.
+
+    Slots run on the emitting thread; Qt wrappers connect their own signals
+    to forward across threads.
+    """
+
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def emit(self, *args):
+        for slot in self.slots:
+            slot(*args)
+
+class ProgressReporter:
+    """Coalesces progress updates to a fixed rate and tracks smoothed speed and ETA"""
+
+    def __init__(self, callback, rate=15, smoothing=0.3):
+        self.callback = callback  # Called as callback(current, total, reporter)
+        self.interval = 1.0 / rate
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self, start=0):
+        self.start_time = time.monotonic()
+        self.last_emit = None
+        self.last_current = start
+        self.last_time = self.start_time
+        self.speed = 0.0  # Units per second, exponentially smoothed
+        self.eta = None  # Seconds remaining, None while unknown
+        self.updates = 0
+        self.emitted = 0
+
+    def update(self, current, total=0, force=False):
+        """Record progress; only forwards it to the callback at most `rate` times per second"""
+        self.updates += 1
+        now = time.monotonic()
+        if not force and self.last_emit is not None and now - self.last_emit < self.interval:
+            return False
+        
+        elapsed = now - self.last_time
+        if elapsed > 0:
+            rate = (current - self.last_current) / elapsed
+            self.speed = rate if not self.emitted else (
+                self.smoothing * rate + (1 - self.smoothing) * self.speed)
+        if total > 0 and self.speed > 0:
+            self.eta = max(total - current, 0) / self.speed
+        else:
+            self.eta = None
+        
+        self.last_emit = now
+        self.last_current = current
+        self.last_time = now
+        self.emitted += 1
+        self.callback(current, total, self)
+        return True
+
+    def finish(self, current, total=0):
+        self.update(current, total, force=True)
+
+    def stats(self):
+        """Number of updates received versus forwarded, to measure the saved signal traffic"""
+        return {
+            'updates': self.updates,
+            'emitted': self.emitted,
+            'suppressed': self.updates - self.emitted
+        }
+
+class Span:
+    """Times a `with` block for a Tracer; set() attaches details such as item counts"""
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.record(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+class NullSpan:
+    """What a disabled Tracer hands out: does nothing, allocates nothing"""
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Tracer:
+    """Timing spans and counters, exported in the Chrome trace format.
+
+    Disabled by default: span() then returns NULL_SPAN and count() returns
+    at once, so instrumented code only pays for the call. Spans and counters
+    may be recorded from any thread. The files open in chrome://tracing or
+    https://ui.perfetto.dev.
+    """
+
+    def __init__(self, enabled=False, max_events=200000):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)  # Oldest events are dropped first
+        self.counters = defaultdict(int)
+        self.thread_names = {}  # thread id -> name, for the trace's thread labels
+        self.lock = threading.Lock()
+
+    def span(self, name, **args):
+        """Context manager timing its block as one span"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+
+    def record(self, name, start, end, args=None):
+        """Add a span measured elsewhere, from two time.perf_counter() readings"""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        with self.lock:
+            self.thread_names[thread.ident] = thread.name
+            self.events.append(('X', name, start, end - start, thread.ident, args or {}))
+
+    def count(self, name, value=1):
+        """Add value to a running counter, such as bytes downloaded or entries parsed"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] += value
+            self.events.append(('C', name, time.perf_counter(), 0, 0, {name: self.counters[name]}))
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+            self.counters.clear()
+
+    def snapshot(self):
+        """Copies of (events, counters, thread names), safe to read while recording goes on"""
+        with self.lock:
+            return list(self.events), dict(self.counters), dict(self.thread_names)
+
+    def summary(self):
+        """{span name: {'count', 'total_s', 'max_s', 'last_s'}} over the recorded spans"""
+        spans = {}
+        for kind, name, start, duration, thread, args in self.snapshot()[0]:
+            if kind != 'X':
+                continue
+            entry = spans.get(name)
+            if entry is None:
+                entry = spans[name] = {'count': 0, 'total_s': 0.0, 'max_s': 0.0}
+            entry['count'] += 1
+            entry['total_s'] += duration
+            entry['max_s'] = max(entry['max_s'], duration)
+            entry['last_s'] = duration
+        return spans
+
+    def chrome_trace(self):
+        """The recorded events as a Chrome trace dict; times are in microseconds"""
+        events, counters, thread_names = self.snapshot()
+        pid = os.getpid()
+        trace_events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread, 'args': {'name': name}}
+                        for thread, name in thread_names.items()]
+        for kind, name, start, duration, thread, args in events:
+            event = {'name': name, 'ph': kind, 'ts': start * 1e6, 'pid': pid, 'tid': thread, 'args': args}
+            if kind == 'X':
+                event['dur'] = duration * 1e6
+            trace_events.append(event)
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms',
+                'otherData': {'counters': counters}}
+
+    def export(self, path):
+        """Write chrome_trace() to path as JSON"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        os.replace(tmp_path, path)
+
+# Shared by the core, the GUI and the CLI; enabled with IPTV_TRACE or --trace
+tracer = Tracer()
+
+def http_session():
+    """requests session for playlist servers: certificates unchecked, proxy settings ignored"""
+    import requests  # Deferred: parsing and search never need it
+    requests.packages.urllib3.disable_warnings()
+    session = requests.Session()
+    session.verify = False
+    session.trust_env = False
+    return session
+
+class DownloadIncomplete(Exception):
+    """The connection ended before the whole playlist was received"""
+
+class PlaylistDownloader:
+    """Downloads a URL to save_path: resumable, conditional, retried and swapped in atomically.
+
+    Signals: progress(downloaded, total_size, reporter) at a limited rate and
+    retrying(delay) before a retry.
+    """
+
+    min_block_size = 64 * 1024
+    max_block_size = 4 * 1024 * 1024
+    block_target_time = 0.25  # Grow blocks while a read takes less than this (seconds)
+    max_retries = 5
+    retry_backoff = 1.0  # First retry delay in seconds, doubled per attempt
+    max_retry_delay = 30.0
+    timeout = (10, 60)  # connect, read
+
+    def __init__(self, url, save_path, validators=None):
+        self.progress = Signal()
+        self.retrying = Signal()
+        self.url = url
+        self.save_path = save_path
+        # Data is written here and only renamed over save_path once complete
+        self.part_path = save_path + '.part'
+        self.part_info_path = self.part_path + '.json'
+        # ETag / Last-Modified from the previous download, used for a conditional request
+        self.validators = dict(validators or {})
+        self.reporter = ProgressReporter(self.progress.emit)
+
+    def request_headers(self, resume_from=0, part_info=None):
+        if resume_from:
+            # Byte ranges refer to the encoded body, so resume uncompressed and
+            # let If-Range restart from zero if the playlist changed meanwhile
+            headers = {'Accept-Encoding': 'identity', 'Range': f'bytes={resume_from}-'}
+            if_range = part_info.get('etag') or part_info.get('last_modified')
+            if if_range:
+                headers['If-Range'] = if_range
+            return headers
+        
+        headers = {'Accept-Encoding': 'gzip, deflate'}
+        # Only revalidate when we still have the file the validators describe
+        if os.path.exists(self.save_path):
+            if self.validators.get('etag'):
+                headers['If-None-Match'] = self.validators['etag']
+            if self.validators.get('last_modified'):
+                headers['If-Modified-Since'] = self.validators['last_modified']
+        return headers
+
+    def load_part_info(self):
+        """Return the offset and validators of a resumable partial download"""
+        try:
+            with open(self.part_info_path, 'r') as f:
+                part_info = json.load(f)
+            size = os.path.getsize(self.part_path)
+        except (OSError, ValueError):
+            return 0, {}
+        if part_info.get('url') != self.url or not part_info.get('resumable'):
+            return 0, {}
+        return size, part_info
+
+    def discard_part(self):
+        for path in (self.part_path, self.part_info_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def fetch(self):
+        """Download with retries; returns False if the server answered 304 Not Modified"""
+        import requests
+        session = http_session()
+        os.makedirs(os.path.dirname(self.save_path) or '.', exist_ok=True)
+        
+        attempt = 0
+        while True:
+            try:
+                with tracer.span('download', url=self.url, attempt=attempt) as span:
+                    downloaded = self.download(session)
+                    span.set(modified=downloaded)
+                return downloaded
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError, DownloadIncomplete) as e:
+                retry_error = e
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else 0
+                if status != 429 and status < 500:
+                    raise
+                retry_error = e
+            
+            attempt += 1
+            if attempt > self.max_retries:
+                raise retry_error
+            delay = min(self.retry_backoff * (2 ** (attempt - 1)), self.max_retry_delay)
+            self.retrying.emit(delay)
+            time.sleep(delay)
+
+    def download(self, session):
+        """Fetch the playlist into the part file; return False if the server sent 304"""
+        import requests
+        from urllib3.exceptions import ProtocolError, ReadTimeoutError
+        resume_from, part_info = self.load_part_info()
+        response = session.get(self.url, stream=True, timeout=self.timeout,
+                               headers=self.request_headers(resume_from, part_info))
+        
+        try:
+            if response.status_code == 304:
+                return False
+            
+            if response.status_code == 416:
+                # The partial file no longer matches the remote one
+                self.discard_part()
+                raise DownloadIncomplete("Requested range not satisfiable")
+            
+            response.raise_for_status()
+            
+            if response.status_code == 206:
+                # The validators describing the partial file also describe the rest of it
+                self.validators = {
+                    'etag': part_info.get('etag', ''),
+                    'last_modified': part_info.get('last_modified', '')
+                }
+            else:
+                resume_from = 0
+                self.validators = {
+                    'etag': response.headers.get('ETag', ''),
+                    'last_modified': response.headers.get('Last-Modified', '')
+                }
+            
+            # With gzip/deflate, content-length counts compressed bytes, so
+            # progress is measured on the wire rather than on decoded data
+            content_length = int(response.headers.get('content-length', 0))
+            total_size = resume_from + content_length if content_length else 0
+            encoded = response.headers.get('content-encoding', 'identity') != 'identity'
+            
+            # Decoded data can't be resumed by byte range, so only plain bodies are resumable
+            with open(self.part_info_path, 'w') as f:
+                json.dump({
+                    'url': self.url,
+                    'etag': self.validators.get('etag', ''),
+                    'last_modified': self.validators.get('last_modified', ''),
+                    'resumable': not encoded and (response.status_code == 206 or
+                                                  response.headers.get('Accept-Ranges') == 'bytes')
+                }, f)
+            
+            block_size = self.min_block_size
+            downloaded = resume_from
+            self.reporter.reset(resume_from)
+            
+            with open(self.part_path, 'ab' if resume_from else 'wb') as f:
+                while True:
+                    read_start = time.perf_counter()
+                    # Reading raw skips requests' error wrapping, so wrap here and fetch retries
+                    try:
+                        data = response.raw.read(block_size, decode_content=True)
+                    except ReadTimeoutError as e:
+                        raise requests.Timeout(e) from e
+                    except (ProtocolError, OSError) as e:
+                        raise requests.ConnectionError(e) from e
+                    if not data:
+                        # The decoder may buffer a whole read without output
+                        if response.raw.closed:
+                            break
+                        continue
+                    read_time = time.perf_counter() - read_start
+                    
+                    f.write(data)
+                    downloaded = resume_from + response.raw.tell() if encoded else downloaded + len(data)
+                    
+                    # Adapt the block size so fast links use MB-sized reads
+                    if read_time < self.block_target_time and block_size < self.max_block_size:
+                        block_size *= 2
+                    elif read_time > self.block_target_time * 4 and block_size > self.min_block_size:
+                        block_size //= 2
+                    
+                    self.reporter.update(downloaded, total_size)
+            
+            self.reporter.finish(downloaded, total_size)
+            tracer.count('bytes_downloaded', downloaded - resume_from)
+            if total_size and downloaded < total_size:
+                raise DownloadIncomplete(f"Received {downloaded} of {total_size} bytes")
+        finally:
+            response.close()
+        
+        # Swap the finished file in atomically so the cached copy is never truncated
+        os.replace(self.part_path, self.save_path)
+        self.discard_part()
+        return True
+
+# Matches every key="value" attribute of an #EXTINF line in a single scan
+EXTINF_ATTR_RE = re.compile(r'([\w-]+)="([^"]*)"')
+# The attribute part of an #EXTINF line: everything up to the first comma outside a quoted value
+EXTINF_ATTRS_END_RE = re.compile(r'[^,"]*(?:"[^"]*"[^,"]*)*')
+
+def parse_extinf(line):
+    """Parse an #EXTINF line into its attribute dict and trailing display name"""
+    # The display name follows that comma and may itself contain commas, quotes or key="value"
+    end = EXTINF_ATTRS_END_RE.match(line).end()
+    attrs = dict(EXTINF_ATTR_RE.findall(line, 0, end))
+    comma = line.find(',', end)
+    title = line[comma + 1:].strip() if comma != -1 else ""
+    return attrs, title
+
+def classify_stream(url):
+    """Return the content section ('channels', 'movies' or 'series') for a stream URL"""
+    if "/movie/" in url:
+        return 'movies'
+    if "/series/" in url:
+        return 'series'
+    return 'channels'
+
+# "S01 E02", "S01E02", "Season 1 Episode 2" or "1x02"
+EPISODE_RE = re.compile(r'\bS(?:eason)?\s*(\d{1,3})\s*[ ._-]?\s*E(?:p(?:isode)?)?\s*(\d{1,4})\b'
+                        r'|\b(\d{1,2})x(\d{1,3})\b', re.IGNORECASE)
+URL_NUMBER_RE = re.compile(r'(\d+)(?:\.\w+)?$')
+
+def parse_episode(name):
+    """Split an episode title into (show, season, episode); numbers are 0 when missing"""
+    match = EPISODE_RE.search(name)
+    if match is None:
+        return name.strip(), 0, 0
+    show = name[:match.start()].strip(' -._|:') or name.strip()
+    season = match.group(1) or match.group(3)
+    episode = match.group(2) or match.group(4)
+    return show, int(season), int(episode)
+
+def episode_key(store, item_id):
+    """Return (show, sort key) for a series entry; episodes without numbers sort by stream id"""
+    show, season, episode = parse_episode(store.names[item_id])
+    url_number = URL_NUMBER_RE.search(store.url_tails[item_id])
+    return show, (season, episode, int(url_number.group(1)) if url_number else 0, item_id)
+
+def group_series(media_dict):
+    """Regroup a dict of series MediaLists by show, each sorted by season and episode.
+
+    Seasons end up as contiguous runs, so views can split them on demand.
+    """
+    shows = {}
+    store = None
+    for items in media_dict.values():
+        store = items.store
+        for item_id in items.ids:
+            show, key = episode_key(store, item_id)
+            shows.setdefault(show, []).append(key)
+    
+    grouped = {}
+    for show, keys in shows.items():
+        keys.sort()
+        grouped[show] = MediaList(store, array('I', (key[3] for key in keys)))
+    return grouped
+
+def update_series(shows, store, removed_ids, added_ids):
+    """Apply removed and added series entries to a group_series() dict.
+
+    Only the shows they belong to are rebuilt; every other show keeps its
+    MediaList object, so views can tell it is unchanged.
+    """
+    touched = {}
+    for item_id in removed_ids:
+        touched.setdefault(episode_key(store, item_id)[0], [])
+    for item_id in added_ids:
+        show, key = episode_key(store, item_id)
+        touched.setdefault(show, []).append(key)
+    
+    removed_ids = set(removed_ids)
+    updated = dict(shows)
+    for show, keys in touched.items():
+        if show in shows:
+            keys.extend(episode_key(store, item_id)[1] for item_id in shows[show].ids
+                        if item_id not in removed_ids)
+        keys.sort()
+        if keys:
+            updated[show] = MediaList(store, array('I', (key[3] for key in keys)))
+        else:
+            updated.pop(show, None)
+    return updated
+
+def split_seasons(items):
+    """Return [(season, start, end)] runs over episodes sorted by group_series"""
+    seasons = []
+    for position, item in enumerate(items):
+        season = parse_episode(item.name)[1]
+        if seasons and seasons[-1][0] == season:
+            seasons[-1][2] = position + 1
+        else:
+            seasons.append([season, position, position + 1])
+    return [tuple(season) for season in seasons]
+
+def entry_digest(info_line, stream_line):
+    """63-bit digest of an entry's #EXTINF and URL lines (fits a signed SQLite integer).
+
+    Both are the raw bytes read from the file with surrounding whitespace
+    stripped by bytes.strip(), so every parser digests an entry the same
+    way whatever its encoding errors.
+    """
+    url_crc = zlib.crc32(stream_line)
+    return (url_crc & 0x7FFFFFFF) << 32 | zlib.crc32(info_line, url_crc)
+
+def add_entry(store, info_line, stream_line):
+    """Parse the raw #EXTINF and URL lines of an entry, store it and return (id, group)"""
+    attrs, title = parse_extinf(info_line.decode('utf-8', 'replace'))
+    name = attrs.get('tvg-name') or title
+    group = attrs.get('group-title') or "Ungrouped"
+    item_id = store.add(name, attrs.get('tvg-logo', ""), group, stream_line.decode('utf-8', 'replace'),
+                        attrs.get('tvg-id', ""), attrs.get('tvg-chno', ""),
+                        entry_digest(info_line, stream_line))
+    return item_id, group
+
+class StringColumn:
+    """Append-only string list packed into one shared string per block of entries.
+
+    Costs roughly one byte per character plus a 4-byte offset per entry,
+    instead of a full str object each. Safe to read from another thread
+    while the parser appends.
+    """
+    block_size = 4096
+
+    def __init__(self):
+        self.blocks = []  # One joined string per full block
+        self.offsets = array('I')  # block_size + 1 offsets per full block
+        self.pending = []  # Strings of the block being filled
+
+    def __len__(self):
+        return len(self.blocks) * self.block_size + len(self.pending)
+
+    def append(self, value):
+        self.pending.append(value)
+        if len(self.pending) == self.block_size:
+            self.seal_block()
+
+    def extend(self, values):
+        values = iter(values)
+        while True:
+            part = list(islice(values, self.block_size - len(self.pending)))
+            if not part:
+                break
+            self.pending.extend(part)
+            if len(self.pending) == self.block_size:
+                self.seal_block()
+
+    def seal_block(self):
+        offsets = array('I', [0])
+        position = 0
+        for part in self.pending:
+            position += len(part)
+            offsets.append(position)
+        # Publish offsets before the block and replace (not clear) the
+        # pending list so concurrent readers always see complete data
+        self.offsets.extend(offsets)
+        self.blocks.append(''.join(self.pending))
+        self.pending = []
+
+    def __iter__(self):
+        stride = self.block_size + 1
+        for number, block in enumerate(self.blocks):
+            bounds = self.offsets[number * stride:(number + 1) * stride]
+            yield from map(block.__getitem__, map(slice, bounds, bounds[1:]))
+        yield from list(self.pending)
+
+    def pack(self):
+        return self.blocks, self.offsets, self.pending
+
+    @classmethod
+    def unpack(cls, packed):
+        column = cls()
+        column.blocks, column.offsets, column.pending = packed
+        return column
+
+    def __getitem__(self, index):
+        pending = self.pending
+        block, position = divmod(index, self.block_size)
+        if block < len(self.blocks):
+            base = block * (self.block_size + 1) + position
+            return self.blocks[block][self.offsets[base]:self.offsets[base + 1]]
+        return pending[position]
+
+class ValueTable:
+    """Maps repeated strings (groups, URL prefixes) to small integer ids"""
+
+    def __init__(self):
+        self.values = []
+        self.ids = {}
+
+    def id_for(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+def split_url(url):
+    """Split a URL into its directory prefix, shared by many entries, and its unique tail"""
+    cut = url.rfind('/') + 1
+    return url[:cut], url[cut:]
+
+class MediaStore:
+    """Columnar storage for every entry of a playlist.
+
+    Group names and URL prefixes (server, credentials, path) are stored once
+    and referenced by id; the remaining strings are packed into StringColumns.
+    MediaItem objects are only created as views when something asks for them.
+    """
+
+    def __init__(self):
+        self.group_table = ValueTable()
+        self.prefix_table = ValueTable()  # Shared by stream and logo URLs
+        self.groups = array('I')
+        self.url_prefixes = array('I')
+        self.logo_prefixes = array('I')
+        self.names = StringColumn()
+        self.url_tails = StringColumn()
+        self.logo_tails = StringColumn()
+        self.tvg_ids = StringColumn()
+        self.tvg_chnos = StringColumn()
+        self.digests = array('q')  # entry_digest() of each entry, for playlist diffs
+
+    def __len__(self):
+        return len(self.groups)
+
+    def add(self, name, logo_url, group, stream_url, tvg_id="", tvg_chno="", digest=0):
+        """Store an entry and return its id"""
+        url_prefix, url_tail = split_url(stream_url)
+        logo_prefix, logo_tail = split_url(logo_url)
+        self.names.append(name)
+        self.url_prefixes.append(self.prefix_table.id_for(url_prefix))
+        self.url_tails.append(url_tail)
+        self.logo_prefixes.append(self.prefix_table.id_for(logo_prefix))
+        self.logo_tails.append(logo_tail)
+        self.tvg_ids.append(tvg_id)
+        self.tvg_chnos.append(tvg_chno)
+        self.digests.append(digest)
+        # Appended last: the entry counts as stored once its group is set
+        self.groups.append(self.group_table.id_for(group))
+        return len(self.groups) - 1
+
+    def item(self, item_id):
+        return MediaItem(self, item_id)
+
+    def pack(self):
+        """Copy of the columns made only of builtins, so it unpickles without this module"""
+        packed = {name: value.pack() if isinstance(value, StringColumn) else value
+                  for name, value in vars(self).items()}
+        packed['group_table'] = self.group_table.values
+        packed['prefix_table'] = self.prefix_table.values
+        return packed
+
+    @classmethod
+    def unpack(cls, packed):
+        store = cls()
+        for name, value in packed.items():
+            column = getattr(store, name)
+            if isinstance(column, StringColumn):
+                value = StringColumn.unpack(value)
+            elif isinstance(column, ValueTable):
+                for table_value in value:
+                    column.id_for(table_value)
+                continue
+            setattr(store, name, value)
+        return store
+
+    def compact(self, live):
+        """Copy the entries flagged in live (a bytearray indexed by id) to a new store.
+
+        Entries keep their order, and only the prefixes and groups they use
+        are carried over. Returns (store, new_ids), where new_ids[old id] is
+        the id of a kept entry in the new store.
+        """
+        store = MediaStore()
+        # Every column is read once front to back, which is what StringColumn is fast at
+        for name in ('names', 'url_tails', 'logo_tails', 'tvg_ids', 'tvg_chnos'):
+            getattr(store, name).extend(compress(getattr(self, name), live))
+        store.digests.extend(compress(self.digests, live))
+        
+        # Old table ids map to new ones for the values kept entries still use
+        tables = ((self.prefix_table, store.prefix_table, ('url_prefixes', 'logo_prefixes')),
+                  (self.group_table, store.group_table, ('groups',)))
+        for table, new_table, columns in tables:
+            kept = [list(compress(getattr(self, name), live)) for name in columns]
+            new_ids = [0] * len(table.values)
+            for value_id in sorted(set().union(*kept)):
+                new_ids[value_id] = new_table.id_for(table.values[value_id])
+            for name, ids in zip(columns, kept):
+                getattr(store, name).extend(map(new_ids.__getitem__, ids))
+        # Kept entries are numbered by how many kept ones come before them
+        return store, array('I', accumulate(live, initial=0))
+
+    def extend(self, other):
+        """Append every entry of another MediaStore; returns the id of the first one"""
+        offset = len(self)
+        prefix_ids = [self.prefix_table.id_for(prefix) for prefix in other.prefix_table.values]
+        group_ids = [self.group_table.id_for(group) for group in other.group_table.values]
+        for name in ('names', 'url_tails', 'logo_tails', 'tvg_ids', 'tvg_chnos'):
+            getattr(self, name).extend(getattr(other, name))
+        self.url_prefixes.extend(map(prefix_ids.__getitem__, other.url_prefixes))
+        self.logo_prefixes.extend(map(prefix_ids.__getitem__, other.logo_prefixes))
+        self.digests.extend(other.digests)
+        # Extended last, as in add(): entries count as stored once their group is set
+        self.groups.extend(map(group_ids.__getitem__, other.groups))
+        return offset
+
+class MediaItem:
+    """Lightweight view of one entry in a MediaStore"""
+    __slots__ = ('store', 'id')
+
+    def __init__(self, store, item_id):
+        self.store = store
+        self.id = item_id
+
+    @property
+    def name(self):
+        return self.store.names[self.id]
+
+    @property
+    def group(self):
+        return self.store.group_table.values[self.store.groups[self.id]]
+
+    @property
+    def stream_url(self):
+        store = self.store
+        return store.prefix_table.values[store.url_prefixes[self.id]] + store.url_tails[self.id]
+
+    @property
+    def logo_url(self):
+        store = self.store
+        return store.prefix_table.values[store.logo_prefixes[self.id]] + store.logo_tails[self.id]
+
+    @property
+    def tvg_id(self):
+        return self.store.tvg_ids[self.id]
+
+    @property
+    def tvg_chno(self):
+        return self.store.tvg_chnos[self.id]
+
+    def __eq__(self, other):
+        return isinstance(other, MediaItem) and self.store is other.store and self.id == other.id
+
+    def __hash__(self):
+        return hash((id(self.store), self.id))
+
+    def __repr__(self):
+        return f"MediaItem({self.name!r}, {self.group!r}, {self.stream_url!r})"
+
+class MediaList:
+    """Sequence of MediaItem views over a list of entry ids in one MediaStore"""
+    __slots__ = ('store', 'ids')
+
+    def __init__(self, store, ids=None):
+        self.store = store
+        self.ids = ids if ids is not None else array('I')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MediaList(self.store, self.ids[index])
+        return MediaItem(self.store, self.ids[index])
+
+    def __iter__(self):
+        store = self.store
+        for item_id in self.ids:
+            yield MediaItem(store, item_id)
+
+    def __add__(self, other):
+        if isinstance(other, MediaList) and other.store is self.store:
+            return MediaList(self.store, self.ids + other.ids)
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def append_id(self, item_id):
+        self.ids.append(item_id)
+
+def normalize_url(url):
+    """Canonical form of a stream URL for duplicate detection"""
+    # Scheme and host are case-insensitive; default ports and fragments change nothing
+    scheme, separator, rest = url.strip().partition('://')
+    if not separator:
+        return url.strip()
+    scheme = scheme.lower()
+    host, slash, path = rest.partition('/')
+    host = host.lower()
+    if (scheme == 'http' and host.endswith(':80')) or (scheme == 'https' and host.endswith(':443')):
+        host = host.rpartition(':')[0]
+    return f"{scheme}://{host}{slash}{path.partition('#')[0]}"
+
+class MergedStore(MediaStore):
+    """MediaStore holding several playlists merged into one, with source attribution.
+
+    Duplicates of a kept entry are not stored as entries; only their URL and
+    source are kept, as alternates playback can fail over to.
+    """
+
+    def __init__(self, source_names):
+        super().__init__()
+        self.source_names = source_names
+        self.sources = array('H')  # entry id -> index into source_names
+        self.alternate_urls = StringColumn()
+        self.alternate_sources = array('H')
+        self.alternates = {}  # entry id -> array of alternate indexes
+
+    def add_from(self, store, item_id, source):
+        """Copy an entry from a source playlist's store and return its new id"""
+        # Column to column, so URLs are neither rebuilt nor split again
+        prefixes = store.prefix_table.values
+        self.names.append(store.names[item_id])
+        self.url_prefixes.append(self.prefix_table.id_for(prefixes[store.url_prefixes[item_id]]))
+        self.url_tails.append(store.url_tails[item_id])
+        self.logo_prefixes.append(self.prefix_table.id_for(prefixes[store.logo_prefixes[item_id]]))
+        self.logo_tails.append(store.logo_tails[item_id])
+        self.tvg_ids.append(store.tvg_ids[item_id])
+        self.tvg_chnos.append(store.tvg_chnos[item_id])
+        self.digests.append(store.digests[item_id])
+        self.sources.append(source)
+        self.groups.append(self.group_table.id_for(store.group_table.values[store.groups[item_id]]))
+        return len(self.groups) - 1
+
+    def add_alternate(self, item_id, stream_url, source):
+        alternates = self.alternates.get(item_id)
+        if alternates is None:
+            alternates = self.alternates[item_id] = array('I')
+        alternates.append(len(self.alternate_urls))
+        self.alternate_urls.append(stream_url)
+        self.alternate_sources.append(source)
+
+    def streams(self, item_id):
+        """Return [(source name, stream URL)] for an entry, its own stream first"""
+        item = self.item(item_id)
+        streams = [(self.source_names[self.sources[item_id]], item.stream_url)]
+        for alternate in self.alternates.get(item_id, ()):
+            streams.append((self.source_names[self.alternate_sources[alternate]],
+                            self.alternate_urls[alternate]))
+        return streams
+
+def compact_store(old_store, sections, shows):
+    """Move the entries of (channels, movies, series) to a fresh MediaStore.
+
+    Entries of old_store that none of the sections lists are left behind.
+    Returns the sections and a group_series() dict of shows rebuilt on the
+    new store, in the same order.
+    """
+    live = bytearray(len(old_store))
+    for media_dict in sections:
+        for items in media_dict.values():
+            for item_id in items.ids:
+                live[item_id] = 1
+    store, new_ids = old_store.compact(live)
+    remap = new_ids.__getitem__
+    sections = tuple({group: MediaList(store, array('I', map(remap, items.ids)))
+                      for group, items in media_dict.items()} for media_dict in sections)
+    shows = {show: MediaList(store, array('I', map(remap, items.ids))) for show, items in shows.items()}
+    return sections + (shows,)
+
+def stream_sources(media_item):
+    """Return [(source name or None, stream URL)] for an item, failover candidates last"""
+    if isinstance(media_item.store, MergedStore):
+        return media_item.store.streams(media_item.id)
+    return [(None, media_item.stream_url)]
+
+def merge_playlists(source_names, load_source):
+    """Merge parsed playlists into one MergedStore, dropping duplicates.
+
+    load_source(index) returns (channels, movies, series) for a source; each
+    is released before the next is loaded. Entries are duplicates when their
+    normalized stream URLs match, or when live channels from different
+    sources share a tvg-id. Lookups go through dicts keyed on the normalized
+    values, so merging is linear in the number of entries. Returns
+    (channels, movies, series, duplicates).
+    """
+    store = MergedStore(source_names)
+    sections = ({}, {}, {})
+    url_ids = {}  # (normalized URL prefix, tail) -> entry id
+    tvg_ids = {}  # case-folded tvg-id -> entry id, live channels only
+    duplicates = 0
+    for source in range(len(source_names)):
+        for section, media_dict in enumerate(load_source(source)):
+            merged = sections[section]
+            for group, items in media_dict.items():
+                source_store = items.store
+                # URL prefixes (scheme, host, path) are shared, so each is normalized once
+                prefixes = [normalize_url(prefix) for prefix in source_store.prefix_table.values]
+                url_prefixes = source_store.url_prefixes
+                url_tails = source_store.url_tails
+                for item_id in items.ids:
+                    url_tail = url_tails[item_id]
+                    if '#' in url_tail:
+                        url_tail = url_tail.partition('#')[0]
+                    url_key = (prefixes[url_prefixes[item_id]], url_tail)
+                    merged_id = url_ids.get(url_key)
+                    tvg_key = None
+                    if section == 0:
+                        tvg_id = source_store.tvg_ids[item_id]
+                        tvg_key = tvg_id.casefold() if tvg_id else None
+                    if merged_id is None and tvg_key is not None:
+                        merged_id = tvg_ids.get(tvg_key)
+                        # Variants of a channel in one playlist (HD, SD) share tvg-ids
+                        if merged_id is not None and store.sources[merged_id] == source:
+                            merged_id = None
+                    
+                    if merged_id is not None:
+                        if store.sources[merged_id] != source:
+                            store.add_alternate(merged_id, source_store.item(item_id).stream_url, source)
+                        url_ids.setdefault(url_key, merged_id)
+                        duplicates += 1
+                        continue
+                    
+                    merged_id = store.add_from(source_store, item_id, source)
+                    url_ids[url_key] = merged_id
+                    if tvg_key is not None:
+                        tvg_ids.setdefault(tvg_key, merged_id)
+                    merged_items = merged.get(group)
+                    if merged_items is None:
+                        merged_items = merged[group] = MediaList(store)
+                    merged_items.append_id(merged_id)
+    return sections + (duplicates,)
+
+class PlaylistCache:
+    """On-disk cache of parsed playlists, keyed by playlist file name, size and mtime"""
+    version = 6
+    suffix = '.parsed'
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def cache_path(self, playlist_path):
+        # Playlist files are already named after the md5 of their URL
+        return os.path.join(self.cache_dir, os.path.basename(playlist_path) + self.suffix)
+
+    def load(self, playlist_path):
+        """Return (channels, movies, series, header, series_shows) for an unchanged playlist, or None"""
+        path = self.cache_path(playlist_path)
+        try:
+            stat = os.stat(playlist_path)
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        
+        if (data.get('version') != self.version or data.get('size') != stat.st_size
+                or data.get('mtime') != stat.st_mtime_ns):
+            return None
+        
+        # Mark as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        
+        store = data['store']
+        channels, movies, series = ({group: MediaList(store, ids) for group, ids in section.items()}
+                                    for section in data['sections'])
+        shows = data['shows']
+        if shows is not None:
+            shows = {show: MediaList(store, ids) for show, ids in shows.items()}
+        return channels, movies, series, data['header'], shows
+
+    def store(self, playlist_path, channels, movies, series, header=None, series_shows=None):
+        stat = os.stat(playlist_path)
+        # The columnar store pickles as a handful of large strings and arrays
+        store = next((items.store for section in (channels, movies, series)
+                      for items in section.values()), MediaStore())
+        data = {
+            'version': self.version,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'store': store,
+            'header': header or {},
+            'sections': [
+                {group: items.ids for group, items in section.items()}
+                for section in (channels, movies, series)
+            ],
+            # Sorting episodes by show is the slow part of loading series, so it is kept too
+            'shows': {show: items.ids for show, items in series_shows.items()} if series_shows else None
+        }
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.cache_path(playlist_path)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(self.suffix):
+                path = os.path.join(self.cache_dir, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+
+class MediaLibrary:
+    """SQLite store of every downloaded playlist: metadata, groups and entries.
+
+    Entry names are indexed with FTS5 and entries can be looked up by group,
+    tvg-id or stream URL without loading a playlist. It also serves as the
+    parser's cache: load() rebuilds an unchanged playlist without re-parsing.
+    Each thread gets its own connection.
+
+    The FTS5 trigram tokenizer needs SQLite 3.34 or later; with an older
+    SQLite the index is left out and search() scans names with LIKE.
+    """
+    sections = ('channels', 'movies', 'series')
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS playlists (
+            id INTEGER PRIMARY KEY,
+            filename TEXT NOT NULL UNIQUE,
+            url TEXT NOT NULL DEFAULT '',
+            path TEXT NOT NULL DEFAULT '',
+            timestamp REAL NOT NULL DEFAULT 0,
+            validators TEXT,
+            size INTEGER,
+            mtime INTEGER,
+            header TEXT
+        );
+        CREATE TABLE IF NOT EXISTS media_groups (
+            id INTEGER PRIMARY KEY,
+            playlist_id INTEGER NOT NULL REFERENCES playlists(id),
+            section TEXT NOT NULL,
+            name TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS media_groups_name ON media_groups(playlist_id, name);
+        CREATE TABLE IF NOT EXISTS entries (
+            id INTEGER PRIMARY KEY,
+            playlist_id INTEGER NOT NULL REFERENCES playlists(id),
+            item INTEGER NOT NULL,
+            group_id INTEGER NOT NULL REFERENCES media_groups(id),
+            name TEXT NOT NULL,
+            stream_url TEXT NOT NULL,
+            logo_url TEXT NOT NULL,
+            tvg_id TEXT NOT NULL,
+            tvg_chno TEXT NOT NULL,
+            digest INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS entries_playlist ON entries(playlist_id, item);
+        CREATE INDEX IF NOT EXISTS entries_group ON entries(group_id, item);
+        CREATE INDEX IF NOT EXISTS entries_tvg_id ON entries(tvg_id) WHERE tvg_id != '';
+        CREATE INDEX IF NOT EXISTS entries_stream_url ON entries(stream_url);
+    """
+    fts_schema = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+            name, content='entries', content_rowid='id', tokenize='trigram'
+        );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        connection = self.connection()
+        connection.executescript(self.schema)
+        try:
+            connection.executescript(self.fts_schema)
+            # Using the table fails too when it was created by a newer SQLite
+            connection.execute("SELECT rowid FROM entries_fts LIMIT 0")
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            # A long timeout lets UI writes wait out a bulk insert on the parser thread
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self.local.connection = connection
+        return connection
+
+    def playlist_id(self, connection, playlist_path):
+        """Return the row id for a playlist file, adding a bare row if it has none"""
+        row = connection.execute("SELECT id FROM playlists WHERE path = ?", (playlist_path,)).fetchone()
+        if row is not None:
+            return row[0]
+        return connection.execute("INSERT INTO playlists (filename, path) VALUES (?, ?)",
+                                  (os.path.basename(playlist_path), playlist_path)).lastrowid
+
+    def playlist_info(self):
+        """Return the saved playlists as {filename: {'url', 'timestamp', 'path', 'validators'}}"""
+        info = {}
+        rows = self.connection().execute(
+            "SELECT filename, url, timestamp, path, validators FROM playlists WHERE url != ''")
+        for filename, url, timestamp, path, validators in rows:
+            info[filename] = {'url': url, 'timestamp': timestamp, 'path': path}
+            if validators:
+                info[filename]['validators'] = json.loads(validators)
+        return info
+
+    def save_playlist_info(self, filename, info):
+        """Insert or update one playlist's metadata"""
+        validators = info.get('validators')
+        with self.connection() as connection:
+            connection.execute(
+                "INSERT INTO playlists (filename, url, timestamp, path, validators) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(filename) DO UPDATE SET url = excluded.url, timestamp = excluded.timestamp, "
+                "path = excluded.path, validators = excluded.validators",
+                (filename, info.get('url', ''), info.get('timestamp', 0), info.get('path', ''),
+                 json.dumps(validators) if validators else None))
+
+    def sync_playlist_info(self, playlist_info):
+        """Save every playlist in playlist_info and remove the ones no longer in it"""
+        for filename, info in playlist_info.items():
+            self.save_playlist_info(filename, info)
+        removed = [filename for filename, in self.connection().execute(
+            "SELECT filename FROM playlists WHERE url != ''") if filename not in playlist_info]
+        for filename in removed:
+            self.remove_playlist(filename)
+
+    def remove_playlist(self, filename):
+        """Delete a playlist with its groups and entries"""
+        with self.connection() as connection:
+            row = connection.execute("SELECT id FROM playlists WHERE filename = ?", (filename,)).fetchone()
+            if row is not None:
+                self.delete_entries(connection, row[0])
+                connection.execute("DELETE FROM playlists WHERE id = ?", row)
+
+    def delete_entries(self, connection, playlist_id):
+        # External content FTS tables need the old values to drop their rows
+        if self.fts:
+            connection.execute("INSERT INTO entries_fts (entries_fts, rowid, name) "
+                           "SELECT 'delete', id, name FROM entries WHERE playlist_id = ?",
+                               (playlist_id,))
+        connection.execute("DELETE FROM entries WHERE playlist_id = ?", (playlist_id,))
+        connection.execute("DELETE FROM media_groups WHERE playlist_id = ?", (playlist_id,))
+
+    def load(self, playlist_path):
+        """Return (channels, movies, series, header, None) for an unchanged playlist, or None.
+
+        Shows are not stored, so the last item (series_shows in PlaylistCache) is always None.
+        """
+        try:
+            stat = os.stat(playlist_path)
+        except OSError:
+            return None
+        connection = self.connection()
+        row = connection.execute("SELECT id, size, mtime, header FROM playlists WHERE path = ?",
+                                 (playlist_path,)).fetchone()
+        if row is None or row[1] != stat.st_size or row[2] != stat.st_mtime_ns:
+            return None
+        playlist_id, _, _, header = row
+        
+        groups = {group_id: (section, name) for group_id, section, name in connection.execute(
+            "SELECT id, section, name FROM media_groups WHERE playlist_id = ?", (playlist_id,))}
+        store = MediaStore()
+        sections = {section: {} for section in self.sections}
+        rows = connection.execute(
+            "SELECT group_id, name, logo_url, stream_url, tvg_id, tvg_chno, digest FROM entries "
+            "WHERE playlist_id = ? ORDER BY item", (playlist_id,))
+        # Rows come back group by group in the order they were stored
+        for group_id, name, logo_url, stream_url, tvg_id, tvg_chno, digest in rows:
+            section, group = groups[group_id]
+            item_id = store.add(name, logo_url, group, stream_url, tvg_id, tvg_chno, digest)
+            items = sections[section].get(group)
+            if items is None:
+                items = sections[section][group] = MediaList(store)
+            items.append_id(item_id)
+        return (sections['channels'], sections['movies'], sections['series'], json.loads(header or '{}'),
+                None)
+
+    def store(self, playlist_path, channels, movies, series, header=None, series_shows=None):
+        """Bring a playlist's groups and entries in line with the sections in a single transaction.
+
+        Stored rows are matched to entries by group and digest, so after an
+        update only added, edited and removed entries are written, plus the
+        position of entries that moved. Returns the number of rows added,
+        removed and moved.
+        """
+        stat = os.stat(playlist_path)
+        with self.connection() as connection:
+            playlist_id = self.playlist_id(connection, playlist_path)
+            if connection.execute("SELECT size, mtime FROM playlists WHERE id = ?",
+                                  (playlist_id,)).fetchone() == (stat.st_size, stat.st_mtime_ns):
+                return {'added': 0, 'removed': 0, 'moved': 0}  # Already holds this version
+            group_ids = {(section, name): group_id for group_id, section, name in connection.execute(
+                "SELECT id, section, name FROM media_groups WHERE playlist_id = ?", (playlist_id,))}
+            stored = defaultdict(list)  # (group id, digest) -> [(row id, item)], last item first
+            for row_id, group_id, digest, item in connection.execute(
+                    "SELECT id, group_id, digest, item FROM entries WHERE playlist_id = ? ORDER BY item DESC",
+                    (playlist_id,)):
+                stored[group_id, digest].append((row_id, item))
+            
+            group_rows = []
+            for section, media_dict in zip(self.sections, (channels, movies, series)):
+                for group, items in media_dict.items():
+                    group_id = group_ids.pop((section, group), None)
+                    if group_id is None:
+                        group_id = connection.execute(
+                            "INSERT INTO media_groups (playlist_id, section, name) VALUES (?, ?, ?)",
+                            (playlist_id, section, group)).lastrowid
+                    group_rows.append((group_id, items))
+            
+            # New rows get ids above every existing one, which is how the FTS insert finds them
+            last_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM entries").fetchone()[0]
+            moved = []  # (item, row id)
+            added = connection.executemany(
+                "INSERT INTO entries (playlist_id, item, group_id, name, stream_url, logo_url, tvg_id, "
+                "tvg_chno, digest) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self.new_rows(playlist_id, group_rows, stored, moved)).rowcount
+            if self.fts:
+                connection.execute("INSERT INTO entries_fts (rowid, name) "
+                                   "SELECT id, name FROM entries WHERE playlist_id = ? AND id > ?",
+                                   (playlist_id, last_id))
+            connection.executemany("UPDATE entries SET item = ? WHERE id = ?", moved)
+            
+            # Rows left unmatched belong to removed or edited entries
+            removed = [(row_id,) for rows in stored.values() for row_id, _ in rows]
+            if self.fts:
+                connection.executemany("INSERT INTO entries_fts (entries_fts, rowid, name) "
+                                       "SELECT 'delete', id, name FROM entries WHERE id = ?", removed)
+            connection.executemany("DELETE FROM entries WHERE id = ?", removed)
+            connection.executemany("DELETE FROM media_groups WHERE id = ?",
+                                   [(group_id,) for group_id in group_ids.values()])
+            connection.execute("UPDATE playlists SET size = ?, mtime = ?, header = ? WHERE id = ?",
+                               (stat.st_size, stat.st_mtime_ns, json.dumps(header or {}), playlist_id))
+        return {'added': added, 'removed': len(removed), 'moved': len(moved)}
+
+    def new_rows(self, playlist_id, group_rows, stored, moved):
+        """Yield entry rows for entries without a stored row, numbered group by group.
+
+        Matched rows are taken out of stored, and appended to moved as (item,
+        row id) when their position changed. Rows are streamed from the
+        columnar store, so no row list is built up front.
+        """
+        position = 0
+        for group_id, items in group_rows:
+            store = items.store
+            digests = store.digests
+            for item_id in items.ids:
+                rows = stored.get((group_id, digests[item_id]))
+                if rows:
+                    row_id, item = rows.pop()
+                    if item != position:
+                        moved.append((position, row_id))
+                else:
+                    item = store.item(item_id)
+                    yield (playlist_id, position, group_id, item.name, item.stream_url, item.logo_url,
+                           item.tvg_id, item.tvg_chno, digests[item_id])
+                position += 1
+
+    def search(self, query, playlist_path=None, limit=500):
+        """Full-text search entry names; returns [(filename, section, group, item, name)]"""
+        # The trigram tokenizer matches substrings of three or more characters
+        if len(query) < 3 or not self.fts:
+            condition, parameters = "e.name LIKE ?", [f"%{query}%"]
+            source = "entries e"
+        else:
+            condition, parameters = "entries_fts MATCH ?", ['"' + query.replace('"', '""') + '"']
+            source = "entries_fts JOIN entries e ON e.id = entries_fts.rowid"
+        if playlist_path is not None:
+            condition += " AND p.path = ?"
+            parameters.append(playlist_path)
+        parameters.append(limit)
+        return self.connection().execute(
+            f"SELECT p.filename, g.section, g.name, e.item, e.name FROM {source} "
+            "JOIN media_groups g ON g.id = e.group_id JOIN playlists p ON p.id = e.playlist_id "
+            f"WHERE {condition} ORDER BY e.playlist_id, e.item LIMIT ?", parameters).fetchall()
+
+    def entries(self, column, value):
+        return self.connection().execute(
+            "SELECT p.filename, g.section, g.name, e.item, e.name, e.stream_url FROM entries e "
+            "JOIN media_groups g ON g.id = e.group_id JOIN playlists p ON p.id = e.playlist_id "
+            f"WHERE e.{column} = ? ORDER BY e.playlist_id, e.item", (value,)).fetchall()
+
+    def entries_by_tvg_id(self, tvg_id):
+        """Return [(filename, section, group, item, name, stream_url)] for a tvg-id"""
+        return self.entries('tvg_id', tvg_id)
+
+    def entries_by_url(self, stream_url):
+        """Return [(filename, section, group, item, name, stream_url)] for a stream URL"""
+        return self.entries('stream_url', stream_url)
+
+    def group_entries(self, playlist_path, group, offset=0, limit=1000):
+        """Return one page of [(item, name, stream_url)] for a group of a playlist"""
+        return self.connection().execute(
+            "SELECT e.item, e.name, e.stream_url FROM media_groups g "
+            "JOIN playlists p ON p.id = g.playlist_id JOIN entries e ON e.group_id = g.id "
+            "WHERE p.path = ? AND g.name = ? ORDER BY e.item LIMIT ? OFFSET ?",
+            (playlist_path, group, limit, offset)).fetchall()
+
+def split_playlist(data, parts):
+    """Cut mapped playlist bytes into up to parts (start, end) ranges, each starting at an #EXTINF line"""
+    size = len(data)
+    bounds = [0]
+    for part in range(1, parts):
+        cut = data.find(b'\n#EXTINF:', max(size * part // parts, bounds[-1]))
+        if cut == -1:
+            break
+        if cut + 1 > bounds[-1]:
+            bounds.append(cut + 1)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+def parse_range(playlist_path, start, end):
+    """Parse the entries in a byte range of a playlist; runs in a worker process.
+
+    Returns (header, packed MediaStore, {section: {group: ids}}), with ids
+    local to that store.
+    """
+    store = MediaStore()
+    sections = {'channels': {}, 'movies': {}, 'series': {}}
+    header = None
+    pending_info = None
+    with open(playlist_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        lines = data[start:end].split(b'\n')
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(b'#'):
+            if line.startswith(b'#EXTINF:'):
+                pending_info = line
+            elif line.startswith(b'#EXTM3U'):
+                header = dict(EXTINF_ATTR_RE.findall(line.decode('utf-8', 'replace')))
+            continue
+        if pending_info is None:
+            continue
+        
+        item_id, group = add_entry(store, pending_info, line)
+        pending_info = None
+        target = sections[classify_stream(line.decode('utf-8', 'replace'))]
+        ids = target.get(group)
+        if ids is None:
+            ids = target[group] = array('I')
+        ids.append(item_id)
+    return header, store.pack(), sections
+
+class PlaylistParser:
+    """Parses a playlist into channels, movies and series ({group: MediaList} dicts).
+
+    Signals: progress(current, total) in KB, chunk_ready(channels, movies,
+    series) for entries parsed since the last chunk, finished(channels,
+    movies, series) and indexes_ready() once search indexes are built,
+    which happens after finished. run() raises on errors.
+    """
+    chunk_size = 5000  # Number of entries per chunk_ready emission
+    parallel_min_bytes = 32 * 1024 * 1024  # Smaller files parse faster than worker processes start
+
+    def __init__(self, playlist_path, cache=None, library=None, workers=0):
+        self.progress = Signal()
+        self.chunk_ready = Signal()
+        self.finished = Signal()
+        self.indexes_ready = Signal()
+        self.playlist_path = playlist_path
+        self.cache = cache
+        self.library = library
+        self.workers = workers  # Worker processes for large files; 0 or 1 parses on this thread
+        self.stats = {}
+        self.header = {}  # Attributes of the #EXTM3U line, e.g. url-tvg
+        self.search_indexes = {}
+        self.series_shows = {}  # show -> episodes sorted by season and episode
+        self.indexing = True  # Build search indexes and series shows before finished
+        self.reporter = ProgressReporter(self.emit_progress)
+        
+    def run(self):
+        # Both are kept on purpose. Rebuilding a 200k-entry playlist from its
+        # library rows takes about 1.8 s against 0.05 s for unpickling its
+        # columnar store (which also carries the sorted series), so the pickle
+        # is the start-up snapshot; the library is what search, lookups and
+        # the CLI query, and what loads after the pickle was evicted
+        for source in (self.cache, self.library):
+            if source is not None and self.load_cached(source):
+                return
+        
+        total_size = os.path.getsize(self.playlist_path)
+        start_time = time.perf_counter()
+        parallel = self.workers > 1 and total_size >= self.parallel_min_bytes
+        if parallel:
+            sections, entries, bytes_read = self.parse_parallel(total_size)
+        else:
+            sections, entries, bytes_read = self.parse_sequential(total_size)
+        
+        elapsed = time.perf_counter() - start_time
+        self.stats = {
+            'entries': entries,
+            'bytes': bytes_read,
+            'elapsed': elapsed,
+            'entries_per_sec': entries / elapsed if elapsed > 0 else 0.0,
+            'workers': self.workers if parallel else 1
+        }
+        tracer.record('parse', start_time, start_time + elapsed,
+                      {'entries': entries, 'bytes': bytes_read, 'workers': self.stats['workers']})
+        tracer.count('entries_parsed', entries)
+        tracer.count('bytes_parsed', bytes_read)
+        
+        self.reporter.finish(total_size, total_size)
+        self.stats['progress'] = self.reporter.stats()
+        
+        self.group_shows(sections['series'])
+        self.finished.emit(sections['channels'], sections['movies'], sections['series'])
+        self.build_search_indexes(sections['channels'], sections['movies'])
+        
+        # Saved after the UI has the playlist, so it never waits on the inserts;
+        # the library only writes the rows that differ from what it holds
+        for target in (self.cache, self.library):
+            if target is not None:
+                self.save_parsed(target, sections['channels'], sections['movies'], sections['series'])
+
+    def parse_sequential(self, total_size):
+        """Parse the playlist on this thread; returns (sections, entries, bytes read)"""
+        store = MediaStore()
+        sections = {'channels': {}, 'movies': {}, 'series': {}}
+        chunk = {'channels': {}, 'movies': {}, 'series': {}}
+        chunk_count = 0
+        entries = 0
+        bytes_read = 0
+        pending_info = None
+        
+        # Read line by line in binary mode so memory stays flat and the
+        # byte offset can drive the progress bar; lines stay bytes until an
+        # entry is stored, the same way PlaylistUpdater reads them
+        with open(self.playlist_path, 'rb') as f:
+            for line in f:
+                bytes_read += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                
+                if line.startswith(b'#'):
+                    if line.startswith(b'#EXTINF:'):
+                        pending_info = line
+                    elif line.startswith(b'#EXTM3U'):
+                        self.header = dict(EXTINF_ATTR_RE.findall(line.decode('utf-8', 'replace')))
+                    continue
+                if pending_info is None:
+                    continue
+                
+                # A non-directive line after #EXTINF is the stream URL
+                item_id, group = add_entry(store, pending_info, line)
+                pending_info = None
+                
+                section = classify_stream(line.decode('utf-8', 'replace'))
+                for target in (sections[section], chunk[section]):
+                    items = target.get(group)
+                    if items is None:
+                        items = target[group] = MediaList(store)
+                    items.append_id(item_id)
+                chunk_count += 1
+                entries += 1
+                
+                # Checking the clock every entry would cost more than the update itself
+                if not entries & 0xFF:
+                    self.reporter.update(bytes_read, total_size)
+                
+                # Hand finished entries to the UI in chunks
+                if chunk_count >= self.chunk_size:
+                    self.chunk_ready.emit(chunk['channels'], chunk['movies'], chunk['series'])
+                    chunk = {'channels': {}, 'movies': {}, 'series': {}}
+                    chunk_count = 0
+        
+        if chunk_count:
+            self.chunk_ready.emit(chunk['channels'], chunk['movies'], chunk['series'])
+        return sections, entries, bytes_read
+
+    def parse_parallel(self, total_size):
+        """Parse byte ranges of the playlist in worker processes and merge them in file order"""
+        # Imported here so start-up and single-core parsing don't pay for them
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        store = MediaStore()
+        sections = {'channels': {}, 'movies': {}, 'series': {}}
+        entries = 0
+        bytes_read = 0
+        
+        with open(self.playlist_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # Several ranges per worker balance the load and let the UI fill in as they finish
+            ranges = split_playlist(data, self.workers * 4)
+        
+        # Spawned rather than forked: forking a process that runs Qt threads is unsafe
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            futures = [pool.submit(parse_range, self.playlist_path, start, end) for start, end in ranges]
+            for (start, end), future in zip(ranges, futures):
+                header, packed, parsed = future.result()
+                if header is not None:
+                    self.header = header
+                offset = store.extend(MediaStore.unpack(packed))
+                
+                chunk = {'channels': {}, 'movies': {}, 'series': {}}
+                for section, groups in parsed.items():
+                    for group, ids in groups.items():
+                        ids = array('I', map(offset.__add__, ids))
+                        chunk[section][group] = MediaList(store, ids)
+                        items = sections[section].get(group)
+                        if items is None:
+                            items = sections[section][group] = MediaList(store)
+                        items.ids.extend(ids)
+                        entries += len(ids)
+                
+                bytes_read += end - start
+                self.chunk_ready.emit(chunk['channels'], chunk['movies'], chunk['series'])
+                self.reporter.update(bytes_read, total_size)
+        return sections, entries, bytes_read
+
+    def save_parsed(self, target, channels, movies, series):
+        try:
+            with tracer.span('store_parsed', target=type(target).__name__):
+                target.store(self.playlist_path, channels, movies, series, self.header, self.series_shows)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error saving parsed playlist: {e}")
+
+    def load_cached(self, source):
+        start_time = time.perf_counter()
+        cached = source.load(self.playlist_path)
+        if cached is None:
+            return False
+        
+        channels, movies, series, self.header, series_shows = cached
+        elapsed = time.perf_counter() - start_time
+        entries = sum(len(items) for section in (channels, movies, series) for items in section.values())
+        self.stats = {
+            'entries': entries,
+            'bytes': 0,
+            'elapsed': elapsed,
+            'entries_per_sec': entries / elapsed if elapsed > 0 else 0.0,
+            'cached': True
+        }
+        tracer.record('cache_load', start_time, start_time + elapsed,
+                      {'source': type(source).__name__, 'entries': entries})
+        
+        self.chunk_ready.emit(channels, movies, series)
+        self.progress.emit(1, 1)
+        self.group_shows(series, series_shows)
+        self.finished.emit(channels, movies, series)
+        self.build_search_indexes(channels, movies)
+        
+        if source is not self.cache and self.cache is not None:
+            self.save_parsed(self.cache, channels, movies, series)
+        return True
+
+    def group_shows(self, series, series_shows=None):
+        """Sort episodes by show before finished, as the Series tab is built from them"""
+        if self.indexing:
+            with tracer.span('group_series', cached=series_shows is not None):
+                self.series_shows = group_series(series) if series_shows is None else series_shows
+
+    def build_search_indexes(self, channels, movies):
+        """Index names after finished, so the playlist is usable meanwhile; emits indexes_ready"""
+        # Built here so the UI thread never pays for indexing
+        if not self.indexing:
+            return
+        start_time = time.perf_counter()
+        self.search_indexes = {
+            'channels': SearchIndex(channels),
+            'movies': SearchIndex(movies),
+            'series': SearchIndex(self.series_shows)
+        }
+        self.stats['index_elapsed'] = time.perf_counter() - start_time
+        tracer.record('build_search_indexes', start_time, start_time + self.stats['index_elapsed'])
+        self.indexes_ready.emit()
+
+    def emit_progress(self, bytes_read, total_size, reporter):
+        self.progress.emit(bytes_read // 1024, total_size // 1024)
+
+    def epg_urls(self):
+        """XMLTV guide URLs announced by the playlist header"""
+        urls = self.header.get('url-tvg') or self.header.get('x-tvg-url') or ''
+        return [url.strip() for url in urls.split(',') if url.strip()]
+
+class PlaylistUpdater(PlaylistParser):
+    """Applies a re-downloaded playlist to the one already loaded.
+
+    Entries are matched by stream URL and the crc32 of their #EXTINF line.
+    Unchanged entries are not parsed again. When entries were only added,
+    they are appended to the loaded store and groups whose entries did not
+    change keep their MediaList objects, so views only touch what changed;
+    once entries were removed or edited, the live ones are copied to a
+    fresh store so the old ones do not pile up. Search indexes are rebuilt
+    after finished and announced with indexes_ready.
+    """
+    def __init__(self, playlist_path, previous, series_shows, cache=None, library=None):
+        super().__init__(playlist_path, cache, library)
+        self.previous = previous  # (channels, movies, series) currently loaded
+        self.series_shows = series_shows
+
+    def run(self):
+        store = next((items.store for section in self.previous for items in section.values()), None)
+        if store is None:
+            super().run()
+            return
+        
+        start_time = time.perf_counter()
+        section_names = ('channels', 'movies', 'series')
+        digests = store.digests
+        old_ids = {}  # digest -> entry id in the loaded playlist
+        old_sections = bytearray(len(store))  # entry id -> index into section_names
+        for section_index, section in enumerate(self.previous):
+            for items in section.values():
+                # Digests are already computed, so no URL has to be rebuilt
+                old_ids.update(zip(map(digests.__getitem__, items.ids), items.ids))
+                for item_id in items.ids:
+                    old_sections[item_id] = section_index
+        
+        sections = {'channels': {}, 'movies': {}, 'series': {}}  # group -> array of ids
+        new_ids = []  # Entries parsed because no identical entry was loaded
+        total_size = os.path.getsize(self.playlist_path)
+        bytes_read = 0
+        entries = 0
+        pending_info = None
+        
+        group_names = store.group_table.values
+        with open(self.playlist_path, 'rb') as f:
+            for raw_line in f:
+                bytes_read += len(raw_line)
+                line = raw_line.strip()
+                if not line:
+                    continue
+                
+                if line.startswith(b'#'):
+                    if line.startswith(b'#EXTINF:'):
+                        pending_info = line
+                    elif line.startswith(b'#EXTM3U'):
+                        self.header = dict(EXTINF_ATTR_RE.findall(line.decode('utf-8', 'replace')))
+                    continue
+                if pending_info is None:
+                    continue
+                
+                # Unchanged entries are matched on their raw bytes and never decoded
+                item_id = old_ids.pop(entry_digest(pending_info, line), None)
+                if item_id is not None:
+                    group = group_names[store.groups[item_id]]
+                    section = section_names[old_sections[item_id]]
+                else:
+                    section = classify_stream(line.decode('utf-8', 'replace'))
+                    item_id, group = add_entry(store, pending_info, line)
+                    new_ids.append(item_id)
+                pending_info = None
+                
+                ids = sections[section].get(group)
+                if ids is None:
+                    ids = sections[section][group] = array('I')
+                ids.append(item_id)
+                entries += 1
+                if not entries & 0xFF:
+                    self.reporter.update(bytes_read, total_size)
+        
+        # Unmatched loaded entries were removed or edited; edits keep their URL
+        removed_ids = list(old_ids.values())
+        removed_urls = {store.item(item_id).stream_url for item_id in removed_ids}
+        changed = sum(1 for item_id in new_ids if store.item(item_id).stream_url in removed_urls)
+        counts = {'unchanged': entries - len(new_ids), 'added': len(new_ids) - changed,
+                  'changed': changed, 'removed': len(removed_ids) - changed}
+        removed_series = [item_id for item_id in removed_ids if old_sections[item_id] == 2]
+        added_series = [item_id for item_id in new_ids
+                        if classify_stream(store.item(item_id).stream_url) == 'series']
+        
+        channels, movies, series = (
+            {group: old[group] if group in old and old[group].ids == ids else MediaList(store, ids)
+             for group, ids in sections[section].items()}
+            for section, old in zip(section_names, self.previous))
+        self.series_shows = update_series(self.series_shows, store, removed_series, added_series)
+        
+        # Removed and edited entries would otherwise stay in the store, and in
+        # its cached copy, for good; the live ones move to a fresh store
+        if len(store) > entries:
+            channels, movies, series, self.series_shows = compact_store(
+                store, (channels, movies, series), self.series_shows)
+        
+        elapsed = time.perf_counter() - start_time
+        self.stats = dict(counts, entries=entries, bytes=bytes_read, elapsed=elapsed, updated=True,
+                          entries_per_sec=entries / elapsed if elapsed > 0 else 0.0)
+        tracer.record('update', start_time, start_time + elapsed, counts)
+        tracer.count('entries_parsed', len(new_ids))
+        self.reporter.finish(total_size, total_size)
+        self.finished.emit(channels, movies, series)
+        
+        self.build_search_indexes(channels, movies)
+        for target in (self.cache, self.library):
+            if target is not None:
+                self.save_parsed(target, channels, movies, series)
+
+class PlaylistMerger(PlaylistParser):
+    """Loads several saved playlists and merges them into one deduplicated library"""
+
+    def __init__(self, playlist_paths, source_names, cache=None, library=None):
+        super().__init__(playlist_paths[0], cache, library)
+        self.playlist_paths = playlist_paths
+        self.source_names = source_names
+
+    def load_source(self, index):
+        parser = PlaylistParser(self.playlist_paths[index], self.cache, self.library)
+        parser.indexing = False  # Only the merged result is searched
+        parsed = []
+        parser.finished.connect(lambda channels, movies, series: parsed.extend((channels, movies, series)))
+        try:
+            parser.run()
+        except Exception as e:
+            raise RuntimeError(f"{self.source_names[index]}: {e}") from e
+        
+        # The merged playlist uses the first programme guide announced
+        if not self.epg_urls():
+            self.header = parser.header
+        self.progress.emit(index + 1, len(self.playlist_paths))
+        return parsed
+
+    def run(self):
+        start_time = time.perf_counter()
+        channels, movies, series, duplicates = merge_playlists(self.source_names, self.load_source)
+        elapsed = time.perf_counter() - start_time
+        entries = sum(len(items) for section in (channels, movies, series) for items in section.values())
+        self.stats = {
+            'entries': entries,
+            'duplicates': duplicates,
+            'sources': len(self.playlist_paths),
+            'bytes': 0,
+            'elapsed': elapsed,
+            'entries_per_sec': (entries + duplicates) / elapsed if elapsed > 0 else 0.0,
+            'merged': True
+        }
+        tracer.record('merge', start_time, start_time + elapsed,
+                      {'sources': len(self.playlist_paths), 'entries': entries, 'duplicates': duplicates})
+        self.group_shows(series)
+        self.finished.emit(channels, movies, series)
+        self.build_search_indexes(channels, movies)
+
+def load_playlist(playlist_path, cache=None, library=None, workers=0):
+    """Parse a playlist on the calling thread; returns (parser, channels, movies, series)"""
+    parser = PlaylistParser(playlist_path, cache, library, workers)
+    parsed = []
+    parser.finished.connect(lambda channels, movies, series: parsed.extend((channels, movies, series)))
+    parser.run()
+    return (parser,) + tuple(parsed)
+
+def export_m3u(path, sections, header=None):
+    """Write {group: items} dicts out as an M3U playlist, replacing path atomically"""
+    attrs = ''.join(f' {key}="{value}"' for key, value in (header or {}).items())
+    tmp_path = path + '.tmp'
+    entries = 0
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(f"#EXTM3U{attrs}\n")
+        for media_dict in sections:
+            for group, items in media_dict.items():
+                for item in items:
+                    # Attribute values are quoted, so quotes inside them can't be kept
+                    values = (('tvg-id', item.tvg_id), ('tvg-name', item.name), ('tvg-logo', item.logo_url),
+                              ('tvg-chno', item.tvg_chno), ('group-title', group))
+                    attrs = ''.join(f' {key}="{value.replace(chr(34), chr(39))}"'
+                                    for key, value in values if value)
+                    f.write(f"#EXTINF:-1{attrs},{item.name}\n{item.stream_url}\n")
+                    entries += 1
+    os.replace(tmp_path, path)
+    return entries
+
+def normalize_name(name):
+    return name.casefold()
+
+def concat_media(media_dict):
+    """Concatenate the item sequences of a group dict, keeping MediaLists columnar"""
+    stores = {id(items.store): items.store for items in media_dict.values()
+              if isinstance(items, MediaList)}
+    if len(stores) == 1 and all(isinstance(items, MediaList) for items in media_dict.values()):
+        ids = array('I')
+        for items in media_dict.values():
+            ids.extend(items.ids)
+        return MediaList(next(iter(stores.values())), ids)
+    return [item for items in media_dict.values() for item in items]
+
+class SearchIndex:
+    """Precomputed name index over a group dict for fast substring and prefix search.
+
+    Items are numbered in group order, so sorted ids give results in the
+    order the playlist lists them.
+    """
+    ngram = 3
+
+    def __init__(self, media_dict):
+        self.items = concat_media(media_dict)
+        self.names = [normalize_name(item.name) for item in self.items]
+        
+        # Results are grouped by the dict's keys, which need not be group-title
+        self.groups = list(media_dict)
+        self.group_ids = array('I')
+        for group_id, items in enumerate(media_dict.values()):
+            self.group_ids.extend(repeat(group_id, len(items)))
+        
+        trigrams = defaultdict(lambda: array('I'))
+        n = self.ngram
+        for item_id, name in enumerate(self.names):
+            for gram in {name[i:i + n] for i in range(len(name) - n + 1)}:
+                trigrams[gram].append(item_id)
+        self.trigrams = dict(trigrams)  # trigram -> array of item ids containing it
+        
+        # Item ids ordered by name, for prefix lookups by binary search
+        self.sorted_ids = array('I', sorted(range(len(self.names)), key=self.names.__getitem__))
+
+    def __len__(self):
+        return len(self.items)
+
+    def search(self, query, candidates=None, is_cancelled=None):
+        """Return ids of items whose name contains query, in playlist order.
+
+        candidates narrows the search to a previous result, e.g. while the
+        user keeps typing the same query. Returns None if is_cancelled()
+        turns true while scanning.
+        """
+        query = normalize_name(query)
+        names = self.names
+        if candidates is None:
+            if len(query) < self.ngram:
+                candidates = range(len(names))
+                return self.scan(query, candidates, is_cancelled)
+            
+            # Verify against the rarest trigram's postings only
+            postings = None
+            for i in range(len(query) - self.ngram + 1):
+                gram_postings = self.trigrams.get(query[i:i + self.ngram])
+                if gram_postings is None:
+                    return []
+                if postings is None or len(gram_postings) < len(postings):
+                    postings = gram_postings
+            candidates = postings
+        return self.scan(query, candidates, is_cancelled)
+
+    def scan(self, query, candidates, is_cancelled=None, chunk_size=4096):
+        """Verify candidates against the names, checking is_cancelled between chunks"""
+        names = self.names
+        if is_cancelled is None:
+            return [i for i in candidates if query in names[i]]
+        
+        matches = []
+        for start in range(0, len(candidates), chunk_size):
+            if is_cancelled():
+                return None
+            matches.extend(i for i in candidates[start:start + chunk_size] if query in names[i])
+        return matches
+
+    def prefix_search(self, query):
+        """Return ids of items whose name starts with query, in playlist order"""
+        query = normalize_name(query)
+        names = self.names
+        sorted_ids = self.sorted_ids
+        lo, hi = 0, len(sorted_ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if names[sorted_ids[mid]] < query:
+                lo = mid + 1
+            else:
+                hi = mid
+        
+        matches = []
+        while lo < len(sorted_ids) and names[sorted_ids[lo]].startswith(query):
+            matches.append(sorted_ids[lo])
+            lo += 1
+        return sorted(matches)
+
+    def ranked_search(self, query, limit=500, is_cancelled=None):
+        """Return up to limit (score, item_id) pairs, best first.
+
+        Exact matches rank above prefix matches, which rank above other
+        substring matches; items whose group name also matches get a boost.
+        Returns None if is_cancelled() turns true while ranking.
+        """
+        query = normalize_name(query)
+        names = self.names
+        items = self.items
+        group_boosts = {}
+        scored = []
+        matches = self.search(query, is_cancelled=is_cancelled)
+        if matches is None:
+            return None
+        for n, i in enumerate(matches):
+            if is_cancelled is not None and not n & 0x3FF and is_cancelled():
+                return None
+            name = names[i]
+            if name == query:
+                score = 100
+            elif name.startswith(query):
+                score = 50
+            else:
+                score = 10
+            
+            group = items[i].group
+            boost = group_boosts.get(group)
+            if boost is None:
+                boost = group_boosts[group] = 5 if query in normalize_name(group) else 0
+            
+            # Shorter names are closer matches; ties keep playlist order
+            scored.append((score + boost, -len(name), -i))
+        return [(key[0], -key[2]) for key in heapq.nlargest(limit, scored)]
+
+    def group_results(self, item_ids):
+        """Build a group dict from result ids"""
+        results = {}
+        for i in item_ids:
+            results.setdefault(self.groups[self.group_ids[i]], []).append(self.items[i])
+        return results
+
+def parse_xmltv_time(value):
+    """Convert an XMLTV timestamp such as '20240101120000 +0100' to epoch seconds"""
+    digits, _, offset = value.strip().partition(' ')
+    digits = digits.ljust(14, '0')
+    timestamp = calendar.timegm((int(digits[0:4]), int(digits[4:6]), int(digits[6:8]),
+                                 int(digits[8:10]), int(digits[10:12]), int(digits[12:14]), 0, 0, 0))
+    offset = offset.strip()
+    if len(offset) == 5 and offset[0] in '+-':
+        seconds = int(offset[1:3]) * 3600 + int(offset[3:5]) * 60
+        timestamp -= seconds if offset[0] == '+' else -seconds
+    return timestamp
+
+class EPGIndex:
+    """Programme guide stored per channel as start-sorted arrays.
+
+    Lookups by tvg-id binary-search the start times, so now/next costs
+    O(log n) however large the guide is.
+    """
+
+    def __init__(self):
+        self.channels = {}  # lowercase channel id -> (starts, stops, title ids)
+        self.titles = StringColumn()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, channel_id, start, stop, title):
+        programmes = self.channels.get(channel_id)
+        if programmes is None:
+            programmes = self.channels[channel_id] = (array('q'), array('q'), array('I'))
+        starts, stops, title_ids = programmes
+        starts.append(start)
+        stops.append(stop)
+        title_ids.append(len(self.titles))
+        self.titles.append(title)
+
+    def finalize(self):
+        """Sort each channel's programmes by start time"""
+        for channel_id, (starts, stops, title_ids) in self.channels.items():
+            if any(starts[i] > starts[i + 1] for i in range(len(starts) - 1)):
+                order = sorted(range(len(starts)), key=starts.__getitem__)
+                self.channels[channel_id] = (array('q', (starts[i] for i in order)),
+                                             array('q', (stops[i] for i in order)),
+                                             array('I', (title_ids[i] for i in order)))
+
+    def now_next(self, tvg_id, now=None, count=2):
+        """Return up to count (start, stop, title) programmes from the one airing now"""
+        programmes = self.channels.get(tvg_id.lower()) if tvg_id else None
+        if programmes is None:
+            return []
+        starts, stops, title_ids = programmes
+        now = time.time() if now is None else now
+        position = bisect_right(starts, now) - 1
+        # Nothing airing right now: start from the next programme
+        if position < 0 or stops[position] <= now:
+            position += 1
+        return [(starts[i], stops[i], self.titles[title_ids[i]])
+                for i in range(position, min(position + count, len(starts)))]
+
+def ingest_xmltv(path, progress=None):
+    """Stream-parse an XMLTV file (plain or gzipped) into an EPGIndex without building the DOM"""
+    import xml.etree.ElementTree as ElementTree
+    start_time = time.perf_counter()
+    index = EPGIndex()
+    total_size = os.path.getsize(path)
+    with open(path, 'rb') as raw:
+        gzipped = raw.read(2) == b'\x1f\x8b'
+        raw.seek(0)
+        source = gzip.GzipFile(fileobj=raw) if gzipped else raw
+        root = None
+        count = 0
+        for event, elem in ElementTree.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = elem
+                continue
+            if elem.tag != 'programme':
+                continue
+            
+            channel_id = elem.get('channel')
+            start = elem.get('start')
+            if channel_id and start:
+                try:
+                    start = parse_xmltv_time(start)
+                    stop = parse_xmltv_time(elem.get('stop')) if elem.get('stop') else start
+                except ValueError:
+                    start = None
+                if start is not None:
+                    index.add(channel_id.lower(), start, stop, elem.findtext('title', '').strip())
+            
+            # Drop finished elements so memory stays flat
+            root.clear()
+            count += 1
+            if progress is not None and not count & 0x3FF:
+                progress(raw.tell(), total_size)
+    
+    index.finalize()
+    tracer.record('epg_ingest', start_time, time.perf_counter(), {'programmes': count})
+    return index
+
+def global_search(search_indexes, query, limit=500, is_cancelled=None):
+    """Rank matches from every section together; returns [(section, MediaItem)] or None if cancelled"""
+    start_time = time.perf_counter()
+    ranked = []
+    for order, (section, search_index) in enumerate(search_indexes.items()):
+        results = search_index.ranked_search(query, limit, is_cancelled)
+        if results is None:
+            return None
+        for score, item_id in results:
+            name_length = len(search_index.names[item_id])
+            ranked.append((score, -name_length, -order, -item_id, section))
+    
+    results = [(section, search_indexes[section].items[-neg_id])
+               for _, _, _, neg_id, section in heapq.nlargest(limit, ranked)]
+    tracer.record('global_search', start_time, time.perf_counter(), {'query': query, 'results': len(results)})
+    return results
+
+class StreamHealthChecker:
+    """Probes stream URLs concurrently for reachability.
+
+    Signals: progress(checked, total) at a limited rate, results_ready(batch)
+    with [(url, ok, http_status, latency_ms)] since the last progress, and
+    finished(reachable, checked). cancel() may be called from another thread.
+    """
+
+    timeout = (3, 5)  # connect, read
+
+    def __init__(self, urls, concurrency=32):
+        self.progress = Signal()
+        self.results_ready = Signal()
+        self.finished = Signal()
+        self.urls = urls
+        self.concurrency = concurrency
+        self.cancelled = False
+        self.batch = []
+        self.reporter = ProgressReporter(self.emit_progress, rate=5)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        import requests
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        session = http_session()
+        # One keep-alive connection per worker, shared across probes to the same server
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.concurrency,
+                                                pool_maxsize=self.concurrency, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        
+        start_time = time.perf_counter()
+        total = len(self.urls)
+        checked = 0
+        reachable = 0
+        urls = iter(self.urls)
+        pending = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                # Keep a bounded window of probes in flight so cancel takes effect quickly
+                while not self.cancelled and len(pending) < self.concurrency * 2:
+                    url = next(urls, None)
+                    if url is None:
+                        break
+                    pending.add(executor.submit(self.probe, session, url))
+                if self.cancelled:
+                    # Queued probes are dropped; running ones end within their timeout
+                    pending = {future for future in pending if not future.cancel()}
+                if not pending:
+                    break
+                
+                # Wakes up now and then, so a cancel drops the queued probes promptly
+                done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    self.batch.append(result)
+                    checked += 1
+                    reachable += result[1]
+                self.reporter.update(checked, total)
+        
+        session.close()
+        tracer.record('health_check', start_time, time.perf_counter(), {'checked': checked, 'reachable': reachable})
+        tracer.count('streams_probed', checked)
+        self.reporter.finish(checked, total)
+        self.finished.emit(reachable, checked)
+
+    def probe(self, session, url):
+        """Return (url, ok, http_status, latency_ms) using HEAD, falling back to a 1-byte GET"""
+        start = time.perf_counter()
+        status = 0
+        try:
+            response = session.head(url, timeout=self.timeout, allow_redirects=True)
+            status = response.status_code
+            response.close()
+            # Many IPTV servers reject HEAD; ask for the first byte instead
+            if status >= 400 and status not in (404, 410):
+                response = session.get(url, timeout=self.timeout, stream=True,
+                                       headers={'Range': 'bytes=0-0'})
+                status = response.status_code
+                next(response.iter_content(1), None)
+                response.close()
+        except Exception:
+            pass
+        return url, 0 < status < 400, status, (time.perf_counter() - start) * 1000
+
+    def emit_progress(self, checked, total, reporter):
+        batch, self.batch = self.batch, []
+        if batch:
+            self.results_ready.emit(batch)
+        self.progress.emit(checked, total)
+
+class StreamHealthCache:
+    """Stream probe results with a time-to-live, persisted as JSON"""
+
+    def __init__(self, path, ttl=6 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self.entries = {}  # url -> [status, checked_at, http_status, latency_ms]
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def get(self, url):
+        """Return 'ok' or 'dead' for a recently probed URL, else None"""
+        entry = self.entries.get(url)
+        if entry is None or time.time() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def stale(self, urls):
+        """The URLs that have no fresh result and need probing"""
+        return [url for url in urls if self.get(url) is None]
+
+    def update(self, results):
+        now = time.time()
+        for url, ok, http_status, latency_ms in results:
+            self.entries[url] = ['ok' if ok else 'dead', now, http_status, round(latency_ms)]
+
+    def save(self):
+        now = time.time()
+        self.entries = {url: entry for url, entry in self.entries.items() if now - entry[1] <= self.ttl}
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving stream health: {e}")
+
+class PlaybackStats:
+    """Quality-of-service figures for one stream, from periodic libVLC media statistics.
+
+    sample() takes the cumulative counters of libvlc_media_stats_t (without
+    their i_ prefix) and reports rates and losses since the first sample, so
+    a stream that was prefetched before it was shown is judged from then on.
+    buffering() and frame_shown() may be called from libVLC's event thread.
+    """
+    counters = ('read_bytes', 'demux_read_bytes', 'demux_corrupted', 'demux_discontinuity',
+                'decoded_video', 'decoded_audio', 'displayed_pictures', 'lost_pictures',
+                'played_abuffers', 'lost_abuffers')
+
+    def __init__(self, url, title):
+        self.url = url
+        self.title = title
+        self.provider = urlsplit(url).netloc
+        self.opened = time.perf_counter()
+        self.started_at = time.time()
+        self.first_frame_ms = None
+        self.rebuffers = 0  # Buffering episodes after the first frame
+        self.stall_time = 0.0  # Seconds spent in them
+        self.stall_start = None
+        self.errors = 0
+        self.outcome = None  # Why playback ended, once it has
+        self.first = None  # (time, counters) of the first sample
+        self.last = None
+        self.rates = {'input_kbps': 0.0, 'demux_kbps': 0.0}
+
+    def frame_shown(self, now=None):
+        if self.first_frame_ms is None:
+            self.first_frame_ms = ((now or time.perf_counter()) - self.opened) * 1000
+
+    def buffering(self, percent, now=None):
+        """Track stalls from libVLC buffering events (cache fill in percent)"""
+        if self.first_frame_ms is None:
+            return  # Initial buffering is part of the time to first frame
+        now = now or time.perf_counter()
+        if percent < 100 and self.stall_start is None:
+            self.stall_start = now
+            self.rebuffers += 1
+        elif percent >= 100 and self.stall_start is not None:
+            self.stall_time += now - self.stall_start
+            self.stall_start = None
+
+    def sample(self, counters, now=None):
+        """Record cumulative counters; returns the current figures as a dict"""
+        now = now or time.perf_counter()
+        if self.first is None:
+            self.first = (now, counters)
+        if self.last is not None and now > self.last[0]:
+            elapsed = now - self.last[0]
+            self.rates = {
+                'input_kbps': (counters['read_bytes'] - self.last[1]['read_bytes']) * 8 / elapsed / 1000,
+                'demux_kbps': (counters['demux_read_bytes'] - self.last[1]['demux_read_bytes']) * 8 / elapsed / 1000
+            }
+        self.last = (now, counters)
+        return self.figures()
+
+    def figures(self):
+        stall_time = self.stall_time
+        if self.stall_start is not None:
+            stall_time += time.perf_counter() - self.stall_start
+        figures = dict(self.rates, first_frame_ms=self.first_frame_ms, rebuffers=self.rebuffers,
+                       stall_s=round(stall_time, 3), buffering=self.stall_start is not None)
+        if self.first is not None:
+            (first_time, first), (last_time, last) = self.first, self.last
+            figures.update((name, last[name] - first[name]) for name in self.counters)
+            elapsed = last_time - first_time
+            figures['input_kbps_avg'] = figures['read_bytes'] * 8 / elapsed / 1000 if elapsed > 0 else 0.0
+            decoded = figures['decoded_video']
+            figures['lost_picture_ratio'] = figures['lost_pictures'] / decoded if decoded else 0.0
+        return figures
+
+    def overlay_text(self):
+        """One line for the on-video overlay"""
+        figures = self.figures()
+        text = (f"{figures['input_kbps'] / 1000:.1f} Mb/s in, {figures['demux_kbps'] / 1000:.1f} Mb/s demux  "
+                f"lost {figures.get('lost_pictures', 0)} frames, {figures.get('lost_abuffers', 0)} audio  "
+                f"corrupt {figures.get('demux_corrupted', 0)}  rebuffers {self.rebuffers} "
+                f"({figures['stall_s']:.1f} s)")
+        if self.first_frame_ms is not None:
+            text += f"  first frame {self.first_frame_ms:.0f} ms"
+        return text
+
+    def record(self, kind, **extra):
+        """A stats log line: 'sample' while playing or 'stream' when it ends"""
+        return dict(self.figures(), type=kind, time=time.strftime('%Y-%m-%dT%H:%M:%S'), title=self.title,
+                    url=self.url, provider=self.provider, errors=self.errors, outcome=self.outcome,
+                    duration_s=round(time.time() - self.started_at, 3), **extra)
+
+class StatsLog:
+    """Appends JSON lines to a file per app session, keeping the newest `keep` files.
+
+    A session's file is created on the first record and continued in a new
+    part once it reaches max_bytes, so one long session can't grow without
+    bound either.
+    """
+
+    def __init__(self, log_dir, keep=20, max_bytes=5 * 1024 * 1024, prefix='stats'):
+        self.log_dir = log_dir
+        self.keep = keep
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self.session = time.strftime('%Y%m%d-%H%M%S') + f'-{os.getpid()}'
+        self.part = 0
+        self.path = None
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def log_files(self):
+        """Existing log files, oldest first"""
+        try:
+            entries = [(entry.stat().st_mtime, entry.path) for entry in os.scandir(self.log_dir)
+                       if entry.name.startswith(self.prefix + '-') and entry.name.endswith('.jsonl')]
+        except OSError:
+            return []
+        return [path for _, path in sorted(entries)]
+
+    def open_part(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        # Drop the oldest files, leaving room for the new one
+        files = self.log_files()
+        for path in files[:max(len(files) - self.keep + 1, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.part += 1
+        suffix = f'.{self.part}' if self.part > 1 else ''
+        self.path = os.path.join(self.log_dir, f'{self.prefix}-{self.session}{suffix}.jsonl')
+        self.size = 0
+
+    def append(self, record):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self.lock:
+            try:
+                if self.path is None or self.size >= self.max_bytes:
+                    self.open_part()
+                with open(self.path, 'a') as f:
+                    f.write(line)
+                self.size += len(line)
+            except OSError as e:
+                print(f"Error writing stats log: {e}")
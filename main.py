@@ -1,94 +1,92 @@
 import sys
 import os
-import requests
 import time
+LAUNCH_TIME = time.perf_counter()  # Start of startup timings, before the Qt imports
 import hashlib
 import json
-import vlc
+import pickle
+import sqlite3
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QLabel, QLineEdit, 
                              QTabWidget, QMessageBox, QProgressBar, QDialog,
-                             QListWidget, QListWidgetItem, QTreeWidget, QTreeWidgetItem,
-                             QScrollArea, QFrame, QSlider, QInputDialog)
-from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+                             QListWidget, QListWidgetItem, QTreeView,
+                             QScrollArea, QFrame, QSlider, QInputDialog, QCheckBox,
+                             QStackedWidget, QMenu, QAbstractItemView, QShortcut, QFileDialog)
+from PyQt5.QtGui import QFont, QColor, QImage, QPixmap, QKeySequence
+from PyQt5.QtCore import (Qt, QThread, QObject, pyqtSignal, QAbstractItemModel, QModelIndex,
+                          QSize, QPoint)
 from PyQt5.QtCore import QTimer
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
-from PyQt5.QtMultimediaWidgets import QVideoWidget
-from PyQt5.QtCore import QUrl
 from PyQt5.QtWidgets import QSizePolicy
+# python-vlc and requests are imported where first used, after the window is up
+from iptv_core import (ProgressReporter, PlaylistDownloader, http_session, PlaylistParser,
+                       PlaylistUpdater, PlaylistMerger, PlaylistCache, MediaLibrary,
+                       StreamHealthCache, StreamHealthChecker, classify_stream, split_seasons,
+                       stream_sources, normalize_name, global_search, ingest_xmltv, tracer,
+                       PlaybackStats, StatsLog)
 
 class DownloadWorker(QThread):
+    """Runs a PlaylistDownloader on a thread"""
     progress = pyqtSignal(int, str, str)  # progress, speed, time remaining
     finished = pyqtSignal(str)
+    not_modified = pyqtSignal(str)  # server answered 304, the local copy is current
     error = pyqtSignal(str)
 
-    def __init__(self, url, save_path):
+    def __init__(self, url, save_path, validators=None):
         super().__init__()
-        self.url = url
         self.save_path = save_path
+        self.downloader = PlaylistDownloader(url, save_path, validators)
+        self.downloader.progress.connect(self.emit_progress)
+        self.downloader.retrying.connect(lambda delay: self.progress.emit(
+            0, "Connection lost", f"Retrying in {delay:.0f} seconds..."))
+
+    @property
+    def validators(self):
+        return self.downloader.validators
+
+    @property
+    def reporter(self):
+        return self.downloader.reporter
 
     def run(self):
         try:
-            session = requests.Session()
-            session.verify = False
-            session.trust_env = False
-
-            response = session.get(self.url, stream=True)
-            response.raise_for_status()
-
-            total_size = int(response.headers.get('content-length', 0))
-            os.makedirs(os.path.dirname(self.save_path), exist_ok=True)
-
-            block_size = 1024
-            downloaded = 0
-            start_time = time.time()
-
-            with open(self.save_path, 'wb') as f:
-                for data in response.iter_content(block_size):
-                    if not data:
-                        continue
-                        
-                    downloaded += len(data)
-                    f.write(data)
-                    
-                    # Calculate progress
-                    if total_size > 0:
-                        progress = int((downloaded / total_size) * 100)
-                    else:
-                        progress = int((downloaded / (1024 * 1024)) % 100)
-                    
-                    # Calculate speed
-                    elapsed_time = time.time() - start_time
-                    if elapsed_time > 0:
-                        speed = downloaded / (1024 * elapsed_time)  # KB/s
-                        if speed > 1024:
-                            speed_text = f"{speed/1024:.1f} MB/s"
-                        else:
-                            speed_text = f"{speed:.1f} KB/s"
-                            
-                        # Calculate time remaining
-                        if total_size > 0:
-                            bytes_remaining = total_size - downloaded
-                            time_remaining = bytes_remaining / (downloaded / elapsed_time)
-                            
-                            if time_remaining > 60:
-                                time_text = f"{time_remaining/60:.1f} minutes remaining"
-                            else:
-                                time_text = f"{time_remaining:.1f} seconds remaining"
-                        else:
-                            time_text = "Calculating..."
-                    else:
-                        speed_text = "Calculating..."
-                        time_text = "Calculating..."
-                    
-                    self.progress.emit(progress, speed_text, time_text)
-
-            self.finished.emit(self.save_path)
-
+            if self.downloader.fetch():
+                self.finished.emit(self.save_path)
+            else:
+                self.not_modified.emit(self.save_path)
         except Exception as e:
             self.error.emit(str(e))
 
+    def emit_progress(self, downloaded, total_size, reporter):
+        # Calculate progress
+        if total_size > 0:
+            progress = int((downloaded / total_size) * 100)
+        else:
+            progress = int((downloaded / (1024 * 1024)) % 100)
+        
+        # Speed and time remaining are smoothed by the reporter
+        if reporter.speed > 0:
+            speed = reporter.speed / 1024  # KB/s
+            if speed > 1024:
+                speed_text = f"{speed/1024:.1f} MB/s"
+            else:
+                speed_text = f"{speed:.1f} KB/s"
+                
+            if reporter.eta is not None:
+                if reporter.eta > 60:
+                    time_text = f"{reporter.eta/60:.1f} minutes remaining"
+                else:
+                    time_text = f"{reporter.eta:.1f} seconds remaining"
+            else:
+                time_text = "Calculating..."
+        else:
+            speed_text = "Calculating..."
+            time_text = "Calculating..."
+        
+        self.progress.emit(progress, speed_text, time_text)
+
 class PlaylistSelector(QDialog):
     def __init__(self, playlists_info, parent=None):
         super().__init__(parent)
@@ -100,8 +98,10 @@ class PlaylistSelector(QDialog):
         
         layout = QVBoxLayout()
         
-        # Create list widget
+        # Create list widget; several playlists can be selected for merging
         self.list_widget = QListWidget()
+        self.list_widget.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.merge = False
         
         # Add only existing playlists to the list
         self.existing_playlists = {}
@@ -153,10 +153,14 @@ class PlaylistSelector(QDialog):
         button_layout = QHBoxLayout()
         load_button = QPushButton("Load")
         load_button.clicked.connect(self.accept)
+        merge_button = QPushButton("Load Merged")
+        merge_button.setToolTip("Merge the selected playlists into one library without duplicates")
+        merge_button.clicked.connect(self.accept_merged)
         cancel_button = QPushButton("Cancel")
         cancel_button.clicked.connect(self.reject)
         
         button_layout.addWidget(load_button)
+        button_layout.addWidget(merge_button)
         button_layout.addWidget(cancel_button)
         
         layout.addLayout(button_layout)
@@ -284,192 +288,1008 @@ class PlaylistSelector(QDialog):
                 QMessageBox.critical(self, "Error", 
                                    f"Failed to rename playlist: {str(e)}")
     
+    def accept_merged(self):
+        if len(self.list_widget.selectedItems()) < 2:
+            QMessageBox.warning(self, "Merge Playlists", "Select two or more playlists to merge.")
+            return
+        self.merge = True
+        self.accept()
+    
     def get_selected_playlist(self):
         current_item = self.list_widget.currentItem()
         if current_item:
             return current_item.data(Qt.UserRole)
         return None
 
-class MediaItem:
-    def __init__(self, name, logo_url, group, stream_url):
-        self.name = name
-        self.logo_url = logo_url
-        self.group = group
-        self.stream_url = stream_url
+    def get_selected_playlists(self):
+        """Paths of the selected playlists in list order; earlier ones win duplicates"""
+        items = sorted(self.list_widget.selectedItems(), key=self.list_widget.row)
+        return [item.data(Qt.UserRole) for item in items]
 
 class PlaylistParserWorker(QThread):
-    progress = pyqtSignal(int, int)  # current, total
+    """Runs a PlaylistParser, PlaylistUpdater or PlaylistMerger on a thread"""
+    progress = pyqtSignal(int, int)  # current, total (KB)
+    chunk_ready = pyqtSignal(dict, dict, dict)  # channels, movies, series parsed since last chunk
     finished = pyqtSignal(dict, dict, dict)  # channels, movies, series
+    indexes_ready = pyqtSignal()  # Updates only: search indexes are rebuilt after finished
     error = pyqtSignal(str)
 
-    def __init__(self, playlist_path):
+    def __init__(self, parser):
         super().__init__()
-        self.playlist_path = playlist_path
-        
+        self.parser = parser
+        # Emitted from this thread, delivered to the UI thread by Qt
+        for name in ('progress', 'chunk_ready', 'finished', 'indexes_ready'):
+            getattr(parser, name).connect(getattr(self, name).emit)
+
+    @property
+    def stats(self):
+        return self.parser.stats
+
+    @property
+    def search_indexes(self):
+        return self.parser.search_indexes
+
+    @property
+    def series_shows(self):
+        return self.parser.series_shows
+
+    def epg_urls(self):
+        return self.parser.epg_urls()
+
     def run(self):
         try:
-            channels = {}
-            movies = {}
-            series = {}
-            
-            with open(self.playlist_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            self.parser.run()
+        except Exception as e:
+            self.error.emit(str(e))
+
+class EPGWorker(QThread):
+    """Fetches an XMLTV guide into cache/ and builds or reloads its EPGIndex"""
+    progress = pyqtSignal(int, int)  # current, total (KB)
+    finished = pyqtSignal(object)  # EPGIndex
+    error = pyqtSignal(str)
+
+    version = 1
+    refresh_interval = 12 * 3600  # Reuse the stored index without asking the server for this long
+
+    def __init__(self, url, cache_dir):
+        super().__init__()
+        self.url = url
+        name = hashlib.md5(url.encode()).hexdigest()
+        self.xml_path = os.path.join(cache_dir, f'epg-{name}.xml')
+        self.index_path = self.xml_path + '.index'
+        self.reporter = ProgressReporter(self.emit_progress)
+
+    def load_stored(self):
+        try:
+            with open(self.index_path, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if data.get('version') != self.version or data.get('url') != self.url:
+            return None
+        return data
+
+    def run(self):
+        try:
+            stored = self.load_stored()
+            if stored is not None and time.time() - stored['created'] < self.refresh_interval:
+                self.finished.emit(stored['index'])
+                return
             
-            total_lines = len(lines)
-            i = 0
+            # Reuse the playlist downloader: atomic, resumable and conditional
+            downloader = PlaylistDownloader(self.url, self.xml_path,
+                                            stored['validators'] if stored else None)
+            try:
+                outcome = 'downloaded' if downloader.fetch() else 'not_modified'
+            except Exception as e:
+                outcome = str(e) or "EPG download failed"
             
-            while i < total_lines:
-                line = lines[i].strip()
-                if line.startswith('#EXTINF:'):
-                    info_line = line
-                    url_line = lines[i + 1].strip() if i + 1 < total_lines else None
-                    
-                    if url_line:
-                        # Extract information using regex
-                        name_match = re.search(r'tvg-name="([^"]*)"', info_line)
-                        logo_match = re.search(r'tvg-logo="([^"]*)"', info_line)
-                        group_match = re.search(r'group-title="([^"]*)"', info_line)
-                        
-                        name = name_match.group(1) if name_match else ""
-                        logo_url = logo_match.group(1) if logo_match else ""
-                        group = group_match.group(1) if group_match else "Ungrouped"
-                        
-                        # Create MediaItem
-                        media_item = MediaItem(name, logo_url, group, url_line)
-                        
-                        # Add to appropriate dictionary
-                        if "/movie/" in url_line:
-                            if group not in movies:
-                                movies[group] = []
-                            movies[group].append(media_item)
-                        elif "/series/" in url_line:
-                            if group not in series:
-                                series[group] = []
-                            series[group].append(media_item)
-                        else:
-                            if group not in channels:
-                                channels[group] = []
-                            channels[group].append(media_item)
-                    
-                    i += 2
-                else:
-                    i += 1
-                
-                # Emit progress every 100 items
-                if i % 100 == 0:
-                    self.progress.emit(i, total_lines)
+            if outcome == 'not_modified' and stored is not None:
+                index = stored['index']
+            elif outcome == 'downloaded' or os.path.exists(self.xml_path):
+                index = ingest_xmltv(self.xml_path, self.reporter.update)
+                self.reporter.finish(1, 1)
+            else:
+                raise RuntimeError(outcome)
             
-            self.progress.emit(total_lines, total_lines)
-            self.finished.emit(channels, movies, series)
+            data = {
+                'version': self.version,
+                'url': self.url,
+                'created': time.time(),
+                'validators': downloader.validators,
+                'index': index
+            }
+            with open(self.index_path + '.tmp', 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(self.index_path + '.tmp', self.index_path)
+            self.finished.emit(index)
             
         except Exception as e:
             self.error.emit(str(e))
 
-class MediaTreeWidget(QTreeWidget):
+    def emit_progress(self, current, total, reporter):
+        self.progress.emit(current // 1024, total // 1024)
+
+class HealthCheckWorker(QThread):
+    """Runs a StreamHealthChecker on a thread"""
+    progress = pyqtSignal(int, int)  # checked, total
+    results_ready = pyqtSignal(list)  # [(url, ok, http_status, latency_ms)] since the last batch
+    finished = pyqtSignal(int, int)  # reachable, checked
+
+    def __init__(self, urls, concurrency=32):
+        super().__init__()
+        self.checker = StreamHealthChecker(urls, concurrency)
+        self.checker.progress.connect(self.progress.emit)
+        self.checker.results_ready.connect(self.results_ready.emit)
+        self.checker.finished.connect(self.finished.emit)
+
+    def cancel(self):
+        self.checker.cancel()
+
+    def run(self):
+        self.checker.run()
+
+HEALTH_COLORS = {'ok': QColor('#2e7d32'), 'dead': QColor('#c62828')}
+
+class LogoLoader(QObject):
+    """Loads channel logos on a thread pool for the rows that are on screen.
+
+    Downloaded files go to a size-capped disk cache; decoded, scaled pixmaps
+    are kept in a bounded in-memory LRU. Requests for the same URL are
+    merged, and requests for rows scrolled out of view are cancelled.
+    """
+    logo_loaded = pyqtSignal(str)  # url
+    image_ready = pyqtSignal(str, QImage)  # worker -> UI thread
+
+    icon_size = QSize(24, 24)
+    max_logo_bytes = 2 * 1024 * 1024
+    timeout = (3, 5)  # connect, read
+
+    def __init__(self, cache_dir, max_disk_bytes=100 * 1024 * 1024, max_pixmaps=500, workers=6):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_pixmaps = max_pixmaps
+        self.pixmaps = OrderedDict()  # url -> QPixmap, least recently used first
+        self.pending = {}  # url -> Future
+        self.failed = set()
+        self.disk_bytes = None  # Computed on first write
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.workers = workers
+        self.session = None  # Created with the first load, so startup doesn't import requests
+        self.image_ready.connect(self.store_image)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, url):
+        """Return the logo pixmap for url, scheduling a load if it isn't in memory yet"""
+        pixmap = self.pixmaps.get(url)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(url)
+            return pixmap
+        if url and url not in self.pending and url not in self.failed:
+            if self.session is None:
+                self.session = self.create_session()
+            self.pending[url] = self.executor.submit(self.load, url)
+        return None
+
+    def retain(self, urls):
+        """Cancel queued loads whose rows are no longer visible"""
+        for url, future in list(self.pending.items()):
+            if url not in urls and future.cancel():
+                del self.pending[url]
+
+    def create_session(self):
+        import requests
+        session = http_session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.md5(url.encode()).hexdigest())
+
+    def load(self, url):
+        # Runs on the pool: fetch from disk or network and decode off the UI thread
+        path = self.cache_path(url)
+        data = None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            pass
+        
+        if data is None:
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+                response.raise_for_status()
+                data = response.content[:self.max_logo_bytes + 1]
+                tracer.count('logo_bytes_downloaded', len(data))
+            except Exception:
+                data = b''
+            if 0 < len(data) <= self.max_logo_bytes:
+                self.write_cache(path, data)
+        
+        image = QImage()
+        if data and image.loadFromData(data):
+            image = image.scaled(self.icon_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.image_ready.emit(url, image)
+
+    def write_cache(self, path, data):
+        try:
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            return
+        if self.disk_bytes is None:
+            self.disk_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir)
+                                  if entry.is_file())
+        else:
+            self.disk_bytes += len(data)
+        if self.disk_bytes > self.max_disk_bytes:
+            self.evict_disk()
+
+    def evict_disk(self):
+        """Delete least recently used logo files until the cache is 80% of its cap"""
+        entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                         for entry in os.scandir(self.cache_dir) if entry.is_file())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes * 0.8:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self.disk_bytes = total
+
+    def store_image(self, url, image):
+        self.pending.pop(url, None)
+        if image.isNull():
+            self.failed.add(url)
+            return
+        # QPixmap must be created on the UI thread
+        self.pixmaps[url] = QPixmap.fromImage(image)
+        while len(self.pixmaps) > self.max_pixmaps:
+            self.pixmaps.popitem(last=False)
+        self.logo_loaded.emit(url)
+
+    def clear(self):
+        self.retain(set())
+        self.pixmaps.clear()
+        self.failed.clear()
+        self.disk_bytes = None
+
+    def shutdown(self):
+        self.retain(set())
+        self.executor.shutdown(wait=False)
+        if self.session is not None:
+            self.session.close()
+
+SECTION_LABELS = {'channels': "Live TV", 'movies': "Movies", 'series': "Series"}
+
+class GlobalSearchWorker(QThread):
+    results_ready = pyqtSignal(int, str, list)  # generation, query, [(section, MediaItem)]
+
+    def __init__(self, search_indexes, query, generation, limit=500):
+        super().__init__()
+        self.search_indexes = search_indexes
+        self.query = query
+        self.generation = generation
+        self.limit = limit
+        self.cancelled = False
+
+    def cancel(self):
+        """Stop at the next checkpoint; used when a newer query supersedes this one"""
+        self.cancelled = True
+
+    def is_cancelled(self):
+        return self.cancelled
+
+    def run(self):
+        results = global_search(self.search_indexes, self.query, self.limit, self.is_cancelled)
+        if results is not None and not self.cancelled:
+            self.results_ready.emit(self.generation, self.query, results)
+
+class MediaTreeModel(QAbstractItemModel):
+    """Two-level group/item model over the parsed group dicts.
+
+    Group rows are always present; item rows are only created when a group is
+    expanded or scrolled, `fetch_size` rows at a time. Item indexes carry a
+    stable group id so they stay valid while groups are inserted or removed.
+    """
+    fetch_size = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.health = None  # StreamHealthCache used for status markers
+        self.logos = None  # LogoLoader used for item icons
+        self.epg = None  # EPGIndex used for now/next tooltips
+        self.clear_state()
+
+    def clear_state(self):
+        self.groups = []  # Group names in row order
+        self.media_dict = {}
+        self.fetched = {}  # group -> number of item rows exposed
+        self.group_ids = {}  # group -> stable id used in child indexes
+        self.id_groups = []  # stable id -> group
+        self.rows = {}  # group -> current row
+
+    def group_id(self, group):
+        group_id = self.group_ids.get(group)
+        if group_id is None:
+            group_id = self.group_ids[group] = len(self.id_groups)
+            self.id_groups.append(group)
+        return group_id
+
+    def update_rows(self):
+        self.rows = {group: row for row, group in enumerate(self.groups)}
+
+    def set_items(self, media_dict):
+        self.beginResetModel()
+        self.clear_state()
+        for group, items in media_dict.items():
+            self.groups.append(group)
+            self.media_dict[group] = items
+            self.fetched[group] = 0
+            self.group_id(group)
+        self.update_rows()
+        self.endResetModel()
+
+    def append_items(self, media_dict):
+        """Add items to existing groups or new groups at the end"""
+        new_groups = [group for group in media_dict if group not in self.media_dict]
+        for group, items in media_dict.items():
+            if group in self.media_dict:
+                # Copy before extending so the caller's lists are never modified
+                self.media_dict[group] = self.media_dict[group] + items
+        
+        if new_groups:
+            first = len(self.groups)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_groups) - 1)
+            for group in new_groups:
+                self.groups.append(group)
+                self.media_dict[group] = media_dict[group]
+                self.fetched[group] = 0
+                self.group_id(group)
+            self.update_rows()
+            self.endInsertRows()
+
+    def update_items(self, media_dict):
+        """Change the displayed items in place, keeping rows and expansion of surviving groups.
+
+        Groups in media_dict must keep the relative order they have in the model.
+        """
+        # Remove groups that are gone, bottom up so rows stay valid
+        for row in range(len(self.groups) - 1, -1, -1):
+            group = self.groups[row]
+            if group not in media_dict:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.groups[row]
+                del self.media_dict[group]
+                del self.fetched[group]
+                self.update_rows()
+                self.endRemoveRows()
+        
+        # Swap the item lists of surviving groups, trimming exposed rows
+        for row, group in enumerate(self.groups):
+            items = media_dict[group]
+            if items is self.media_dict[group]:
+                continue  # Same list, nothing to repaint
+            fetched = self.fetched[group]
+            keep = min(fetched, len(items))
+            parent = self.createIndex(row, 0, 0)
+            if keep < fetched:
+                self.beginRemoveRows(parent, keep, fetched - 1)
+                self.media_dict[group] = items
+                self.fetched[group] = keep
+                self.endRemoveRows()
+            else:
+                self.media_dict[group] = items
+            if keep:
+                self.dataChanged.emit(self.index(0, 0, parent), self.index(keep - 1, 0, parent))
+        
+        # Insert new groups at their position in media_dict
+        for row, group in enumerate(media_dict):
+            if row < len(self.groups) and self.groups[row] == group:
+                continue
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.groups.insert(row, group)
+            self.media_dict[group] = media_dict[group]
+            self.fetched[group] = 0
+            self.group_id(group)
+            self.update_rows()
+            self.endInsertRows()
+
+    def total_items(self):
+        return sum(len(items) for items in self.media_dict.values())
+
+    def group_for(self, parent):
+        """Return the group name of a group index"""
+        return self.groups[parent.row()]
+
+    def index(self, row, column, parent=QModelIndex()):
+        if column != 0 or row < 0:
+            return QModelIndex()
+        if not parent.isValid():
+            if row < len(self.groups):
+                return self.createIndex(row, 0, 0)
+            return QModelIndex()
+        # Item rows store their group's stable id + 1 as the internal id
+        if parent.internalId() == 0:
+            group = self.group_for(parent)
+            if row < self.fetched[group]:
+                return self.createIndex(row, 0, self.group_ids[group] + 1)
+        return QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() == 0:
+            return QModelIndex()
+        group = self.id_groups[index.internalId() - 1]
+        return self.createIndex(self.rows[group], 0, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.groups)
+        if parent.internalId() == 0:
+            return self.fetched[self.group_for(parent)]
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.groups)
+        if parent.internalId() == 0:
+            return bool(self.media_dict[self.group_for(parent)])
+        return False
+
+    def canFetchMore(self, parent):
+        if not parent.isValid() or parent.internalId() != 0:
+            return False
+        group = self.group_for(parent)
+        return self.fetched[group] < len(self.media_dict[group])
+
+    def fetchMore(self, parent):
+        if not self.canFetchMore(parent):
+            return
+        group = self.group_for(parent)
+        start = self.fetched[group]
+        end = min(start + self.fetch_size, len(self.media_dict[group]))
+        self.beginInsertRows(parent, start, end - 1)
+        self.fetched[group] = end
+        self.endInsertRows()
+
+    def media_item(self, index):
+        """Return the MediaItem for an item row, or None for group rows"""
+        if not index.isValid() or index.internalId() == 0:
+            return None
+        return self.media_dict[self.id_groups[index.internalId() - 1]][index.row()]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if index.internalId() == 0:
+            if role == Qt.DisplayRole:
+                return self.groups[index.row()]
+            return None
+        if role == Qt.DisplayRole:
+            return self.media_item(index).name
+        if role == Qt.UserRole:
+            return self.media_item(index)
+        if role == Qt.DecorationRole:
+            # Only asked for rows being painted, so only visible logos are loaded
+            if self.logos is not None:
+                return self.logos.get(self.media_item(index).logo_url)
+            return None
+        if role == Qt.ForegroundRole and self.health is not None:
+            status = self.health.get(self.media_item(index).stream_url)
+            return HEALTH_COLORS[status] if status is not None else None
+        if role == Qt.ToolTipRole:
+            return self.tooltip(self.media_item(index))
+        return None
+
+    def tooltip(self, media_item):
+        lines = []
+        streams = stream_sources(media_item)
+        if streams[0][0] is not None:
+            sources = list(dict.fromkeys(source for source, _ in streams))
+            lines.append(f"Source: {', '.join(sources)}")
+        if self.epg is not None:
+            for label, (start, stop, title) in zip(("Now", "Next"), self.epg.now_next(media_item.tvg_id)):
+                times = f"{time.strftime('%H:%M', time.localtime(start))}-{time.strftime('%H:%M', time.localtime(stop))}"
+                lines.append(f"{label}: {times} {title}")
+        if self.health is not None:
+            status = self.health.get(media_item.stream_url)
+            if status is not None:
+                lines.append("Stream reachable" if status == 'ok' else "Stream unreachable")
+        return "\n".join(lines) or None
+
+class SeriesTreeModel(MediaTreeModel):
+    """Three-level show/season/episode model for the Series tab.
+
+    Shows are the groups of the base model. A show's season rows are only
+    worked out when it is expanded, and episodes are exposed per season
+    `fetch_size` rows at a time. Episode indexes carry episode_flag plus the
+    show's stable id and the season row.
+    """
+    episode_flag = 1 << 48
+
+    def clear_state(self):
+        super().clear_state()
+        self.seasons = {}  # show -> [(season, start, end)] over its episodes
+        self.episodes_fetched = {}  # (show id, season row) -> number of episode rows exposed
+
+    def drop_seasons(self, group):
+        """Remove a show's season rows; returns whether any were shown"""
+        fetched = self.fetched[group]
+        if fetched:
+            self.beginRemoveRows(self.createIndex(self.rows[group], 0, 0), 0, fetched - 1)
+            self.fetched[group] = 0
+            self.endRemoveRows()
+        self.seasons.pop(group, None)
+        group_id = self.group_ids[group]
+        for key in [key for key in self.episodes_fetched if key[0] == group_id]:
+            del self.episodes_fetched[key]
+        return bool(fetched)
+
+    def update_items(self, media_dict):
+        # Seasons of changed shows are recomputed, re-expanding the ones that were open
+        reopen = []
+        for group in self.groups:
+            items = media_dict.get(group)
+            if items is not self.media_dict[group] and self.drop_seasons(group) and items:
+                reopen.append(group)
+        super().update_items(media_dict)
+        for group in reopen:
+            self.fetchMore(self.createIndex(self.rows[group], 0, 0))
+
+    def append_items(self, media_dict):
+        for group in media_dict:
+            if group in self.media_dict:
+                self.drop_seasons(group)
+        super().append_items(media_dict)
+
+    def season_key(self, index):
+        """Return (show id, season row) for a season index"""
+        return index.internalId() - 1, index.row()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if column != 0 or row < 0 or not parent.isValid() or parent.internalId() == 0:
+            return super().index(row, column, parent)
+        if parent.internalId() < self.episode_flag:
+            group_id, season_row = self.season_key(parent)
+            if row < self.episodes_fetched.get((group_id, season_row), 0):
+                return self.createIndex(row, 0, self.episode_flag | group_id << 16 | season_row)
+        return QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() < self.episode_flag:
+            return super().parent(index)
+        key = index.internalId() & ~self.episode_flag
+        return self.createIndex(key & 0xFFFF, 0, (key >> 16) + 1)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid() or parent.internalId() == 0:
+            return super().rowCount(parent)
+        if parent.internalId() < self.episode_flag:
+            return self.episodes_fetched.get(self.season_key(parent), 0)
+        return 0
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid() or parent.internalId() == 0:
+            return super().hasChildren(parent)
+        return parent.internalId() < self.episode_flag
+
+    def season_range(self, index):
+        group = self.id_groups[index.internalId() - 1]
+        return self.seasons[group][index.row()]
+
+    def canFetchMore(self, parent):
+        if not parent.isValid() or parent.internalId() >= self.episode_flag:
+            return False
+        if parent.internalId() == 0:
+            group = self.group_for(parent)
+            return not self.fetched[group] and bool(self.media_dict[group])
+        season, start, end = self.season_range(parent)
+        return self.episodes_fetched.get(self.season_key(parent), 0) < end - start
+
+    def fetchMore(self, parent):
+        if not self.canFetchMore(parent):
+            return
+        if parent.internalId() == 0:
+            # Expanding a show: split its sorted episodes into seasons now
+            group = self.group_for(parent)
+            seasons = self.seasons[group] = split_seasons(self.media_dict[group])
+            self.beginInsertRows(parent, 0, len(seasons) - 1)
+            self.fetched[group] = len(seasons)
+            self.endInsertRows()
+            return
+        season, start, end = self.season_range(parent)
+        key = self.season_key(parent)
+        first = self.episodes_fetched.get(key, 0)
+        last = min(first + self.fetch_size, end - start)
+        self.beginInsertRows(parent, first, last - 1)
+        self.episodes_fetched[key] = last
+        self.endInsertRows()
+
+    def media_item(self, index):
+        if not index.isValid() or index.internalId() < self.episode_flag:
+            return None
+        key = index.internalId() & ~self.episode_flag
+        group = self.id_groups[key >> 16]
+        season, start, end = self.seasons[group][key & 0xFFFF]
+        return self.media_dict[group][start + index.row()]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and 0 < index.internalId() < self.episode_flag:
+            if role == Qt.DisplayRole:
+                season, start, end = self.season_range(index)
+                label = f"Season {season}" if season else "Episodes"
+                return f"{label} ({end - start})"
+            return None
+        return super().data(index, role)
+
+class MediaTreeWidget(QTreeView):
     loading_progress = pyqtSignal(int, int)  # current, total
     loading_finished = pyqtSignal()
+    health_check_requested = pyqtSignal(list)  # stream URLs to probe
+
+    model_class = MediaTreeModel
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setHeaderHidden(True)
-        self.setColumnCount(1)
         self.setAnimated(True)
-        self.batch_size = 50  # Number of items to load per batch
+        self.setUniformRowHeights(True)  # Lets the view skip per-row size queries
+        self.media_model = self.model_class(self)
+        self.setModel(self.media_model)
         self.original_items = {}  # Store original items for search
-        self.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.search_index = None
+        self.last_query = ""
+        self.last_results = None
+        self.shown_query = ""  # Search the tree is filtered by
+        self.pending_top = None  # Restored scroll position, applied once the tree is shown
+        self.reporter = ProgressReporter(self.emit_loading_progress)
+        self.doubleClicked.connect(self.on_item_double_clicked)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+        
+        # Drop queued logo loads for rows that scrolled away, once scrolling pauses
+        self.logo_timer = QTimer(self)
+        self.logo_timer.setSingleShot(True)
+        self.logo_timer.setInterval(150)
+        self.logo_timer.timeout.connect(self.retain_visible_logos)
+        self.verticalScrollBar().valueChanged.connect(self.logo_timer.start)
+        
+    def set_logo_loader(self, logo_loader):
+        self.media_model.logos = logo_loader
+        self.setIconSize(logo_loader.icon_size)
+        # Repaints are coalesced by Qt, so many logos arriving cost one paint
+        logo_loader.logo_loaded.connect(lambda url: self.viewport().update())
+        
+    def visible_media_items(self):
+        items = []
+        index = self.indexAt(QPoint(0, 0))
+        height = self.viewport().height()
+        while index.isValid() and self.visualRect(index).top() < height:
+            media_item = self.media_model.media_item(index)
+            if media_item is not None:
+                items.append(media_item)
+            index = self.indexBelow(index)
+        return items
+        
+    def retain_visible_logos(self):
+        if self.media_model.logos is not None:
+            self.media_model.logos.retain({item.logo_url for item in self.visible_media_items()})
         
     def populate_tree(self, media_dict):
-        self.clear()
-        self.media_dict = media_dict
         self.original_items = media_dict.copy()  # Store original items
-        self.groups = list(media_dict.keys())
-        self.current_group = 0
-        self.current_item = 0
+        self.set_search_index(None)
+        self.shown_query = ""
+        self.show_items(media_dict)
+        
+    def show_items(self, media_dict):
+        self.media_dict = media_dict
+        with tracer.span('tree_show', groups=len(media_dict)):
+            self.media_model.set_items(media_dict)
+        if media_dict:
+            total = self.media_model.total_items()
+            self.reporter.reset()
+            self.reporter.finish(total, total)
+            self.loading_finished.emit()
         
-        # Calculate total items
-        self.total_items = sum(len(items) for items in media_dict.values())
-        self.loaded_items = 0
+    def append_items(self, media_dict):
+        """Add a parser chunk to the view"""
+        if not media_dict:
+            return
+        with tracer.span('tree_append', groups=len(media_dict)):
+            self.media_model.append_items(media_dict)
+        self.media_dict = self.media_model.media_dict
+        self.reporter.update(self.media_model.total_items(), 0)
+        self.loading_finished.emit()
+        
+    def apply_update(self, media_dict):
+        """Show an updated playlist, touching only the groups whose items changed"""
+        self.original_items = media_dict.copy()
+        self.set_search_index(None)  # Rebuilt in the background; scanning meanwhile
+        self.shown_query = ""
+        self.media_dict = media_dict
+        model = self.media_model
+        surviving = [group for group in model.groups if group in media_dict]
+        with tracer.span('tree_update', groups=len(media_dict)):
+            if surviving == [group for group in media_dict if group in model.media_dict]:
+                model.update_items(media_dict)
+            else:
+                model.set_items(media_dict)  # Groups were reordered
         
-        # Start loading the first batch
-        QTimer.singleShot(0, self.load_next_batch)
+    def set_search_index(self, search_index):
+        self.search_index = search_index
+        self.last_query = ""
+        self.last_results = None
         
     def search(self, query):
+        start_time = time.perf_counter()
+        self.shown_query = query
         if not query:  # If search is empty, restore original items
-            self.media_dict = self.original_items.copy()
-            self.populate_tree(self.media_dict)
+            self.last_query = ""
+            self.last_results = None
+            self.media_dict = self.original_items
+            self.media_model.update_items(self.original_items)
             return
-            
-        # Convert query to lowercase for case-insensitive search
-        query = query.lower()
-        
-        # Create new dictionary with matching items
-        filtered_dict = {}
-        for group, items in self.original_items.items():
-            matching_items = []
-            for item in items:
-                if query in item.name.lower():
-                    matching_items.append(item)
-            if matching_items:  # Only add groups that have matching items
-                filtered_dict[group] = matching_items
-        
-        # Update tree with filtered items
+        
+        if self.search_index is None:
+            # Index not built yet, fall back to scanning
+            query = query.lower()
+            filtered_dict = {}
+            for group, items in self.original_items.items():
+                matching_items = [item for item in items if query in item.name.lower()]
+                if matching_items:  # Only add groups that have matching items
+                    filtered_dict[group] = matching_items
+        else:
+            # A longer query can only match a subset of the previous results
+            query = normalize_name(query)
+            candidates = None
+            if self.last_results is not None and self.last_query and self.last_query in query:
+                candidates = self.last_results
+            results = self.search_index.search(query, candidates)
+            self.last_query = query
+            self.last_results = results
+            filtered_dict = self.search_index.group_results(results)
+        
+        # Update the view in place rather than resetting it
         self.media_dict = filtered_dict
-        self.populate_tree(filtered_dict)
+        self.media_model.update_items(filtered_dict)
+        tracer.record('tree_search', start_time, time.perf_counter(),
+                      {'query': query, 'groups': len(filtered_dict), 'indexed': self.search_index is not None})
 
-    def load_next_batch(self):
-        batch_count = 0
-        
-        while self.current_group < len(self.groups) and batch_count < self.batch_size:
-            group = self.groups[self.current_group]
-            items = self.media_dict[group]
-            
-            # Create group item if it's the first item in the group
-            if self.current_item == 0:
-                group_item = QTreeWidgetItem(self)
-                group_item.setText(0, group)
-                group_item.setExpanded(False)
-            else:
-                group_item = self.topLevelItem(self.current_group)
-            
-            # Add items for this batch
-            while self.current_item < len(items) and batch_count < self.batch_size:
-                media = items[self.current_item]
-                item = QTreeWidgetItem(group_item)
-                item.setText(0, media.name)
-                item.setData(0, Qt.UserRole, media)
-                
-                self.current_item += 1
-                batch_count += 1
-                self.loaded_items += 1
-                
-                # Emit progress
-                self.loading_progress.emit(self.loaded_items, self.total_items)
+    def index_path(self, index):
+        """Locate an index as [group, row, ...], which survives reloading the playlist"""
+        rows = []
+        while index.parent().isValid():
+            rows.append(index.row())
+            index = index.parent()
+        return [self.media_model.group_for(index)] + rows[::-1]
+
+    def index_at_path(self, path):
+        """Return the index index_path located, fetching rows on the way; invalid if it is gone"""
+        model = self.media_model
+        row = model.rows.get(path[0])
+        if row is None:
+            return QModelIndex()
+        index = model.index(row, 0)
+        for row in path[1:]:
+            while model.rowCount(index) <= row and model.canFetchMore(index):
+                model.fetchMore(index)
+            index = model.index(row, 0, index)
+            if not index.isValid():
+                break
+        return index
+
+    def view_state(self):
+        """Search, expanded rows and top visible row, as saved in the session file"""
+        model = self.media_model
+        expanded = []
+        parents = [QModelIndex()]
+        while parents:
+            parent = parents.pop()
+            rows = model.rowCount(parent)
+            # Rows of one level are alike, so only look below levels that have children
+            if not rows or not model.hasChildren(model.index(0, 0, parent)):
+                continue
+            for row in range(rows):
+                index = model.index(row, 0, parent)
+                if self.isExpanded(index):
+                    expanded.append(self.index_path(index))
+                    parents.append(index)
+        top = self.indexAt(QPoint(0, 0))
+        return {'query': self.shown_query, 'expanded': expanded,
+                'top': self.index_path(top) if top.isValid() else None}
+
+    def restore_view_state(self, state):
+        if state.get('query'):
+            self.search(state['query'])
+        for path in state.get('expanded', []):
+            index = self.index_at_path(path)
+            if index.isValid():
+                self.expand(index)
+        self.pending_top = state.get('top')
+        if self.isVisible():
+            self.scroll_to_pending()
+
+    def scroll_to_pending(self):
+        if self.pending_top:
+            index = self.index_at_path(self.pending_top)
+            if index.isValid():
+                self.scrollTo(index, QAbstractItemView.PositionAtTop)
+        self.pending_top = None
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Trees on other tabs have no geometry until shown, so they scroll then
+        if self.pending_top:
+            QTimer.singleShot(0, self.scroll_to_pending)
+
+    def show_context_menu(self, position):
+        menu = QMenu(self)
+        index = self.indexAt(position)
+        if index.isValid():
+            while index.parent().isValid():
+                index = index.parent()
+            group = self.media_model.group_for(index)
+            check_group = menu.addAction(f"Check streams in '{group}'")
+            check_group.triggered.connect(
+                lambda: self.request_health_check({group: self.media_model.media_dict[group]}))
+        check_all = menu.addAction("Check all streams in this tab")
+        check_all.triggered.connect(lambda: self.request_health_check(self.original_items))
+        menu.exec_(self.viewport().mapToGlobal(position))
+        
+    def request_health_check(self, media_dict):
+        self.health_check_requested.emit([item.stream_url for items in media_dict.values()
+                                          for item in items])
+        
+    def emit_loading_progress(self, loaded_items, total_items, reporter):
+        self.loading_progress.emit(loaded_items, total_items)
+
+    def on_item_double_clicked(self, index):
+        # Group rows have no MediaItem
+        media_item = self.media_model.media_item(index)
+        if media_item and hasattr(media_item, 'stream_url'):
+            # Live channels can be zapped through in the order of their group
+            channels = None
+            if classify_stream(media_item.stream_url) == 'channels':
+                channels = self.media_model.media_dict[media_item.group]
             
-            # Move to next group if we've finished the current one
-            if self.current_item >= len(items):
-                self.current_group += 1
-                self.current_item = 0
-        
-        # Schedule next batch if there are more items to load
-        if self.current_group < len(self.groups):
-            QTimer.singleShot(10, self.load_next_batch)
+            # Create and show the media player window
+            fallback_urls = [url for _, url in stream_sources(media_item)[1:]]
+            player = MediaPlayer(media_item.stream_url, media_item.name, self,
+                                 channels, index.row(), fallback_urls)
+            player.show()
+            player.media_player.play()  # Start playing immediately
+
+class SeriesTreeWidget(MediaTreeWidget):
+    """Series tab tree showing show, season and episode levels"""
+    model_class = SeriesTreeModel
+
+def set_video_output(media_player, win_id):
+    """Render media_player into the native window win_id (0 detaches it)"""
+    if sys.platform.startswith('win'):
+        media_player.set_hwnd(win_id)
+    elif sys.platform.startswith('linux'):
+        media_player.set_xwindow(win_id)
+    elif sys.platform.startswith('darwin'):
+        media_player.set_nsobject(win_id)
+
+# libVLC events player windows attach to, all detached when a player goes back to the pool
+PLAYER_EVENTS = ('MediaPlayerVout', 'MediaPlayerBuffering', 'MediaPlayerPlaying', 'MediaPlayerPaused',
+                 'MediaPlayerStopped', 'MediaPlayerEndReached', 'MediaPlayerEncounteredError',
+                 'MediaPlayerPositionChanged', 'MediaPlayerTimeChanged', 'MediaPlayerLengthChanged')
+
+class VLCPlayerPool:
+    """Process-wide libVLC instance with a small pool of warm media players.
+
+    Creating a libVLC instance loads and scans every plugin, so it is done
+    once per process; player windows borrow an idle media player and hand
+    it back when they close.
+    """
+    _shared = None
+
+    def __init__(self, max_idle=2):
+        self.max_idle = max_idle
+        self.instance = None
+        self.idle = []
+        self.in_use = 0
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def get_instance(self):
+        if self.instance is None:
+            import vlc  # Loads libVLC, so deferred until the pool warms up after startup
+            self.instance = vlc.Instance()
+        return self.instance
+
+    def warm_up(self):
+        """Create the instance and idle players ahead of the first playback"""
+        instance = self.get_instance()
+        while len(self.idle) < self.max_idle:
+            self.idle.append(instance.media_player_new())
+
+    def acquire(self):
+        self.in_use += 1
+        if self.idle:
+            return self.idle.pop()
+        return self.get_instance().media_player_new()
+
+    def release(self, media_player):
+        """Stop a borrowed player and keep it warm, or free it if the pool is full"""
+        import vlc
+        self.in_use -= 1
+        media_player.stop()
+        events = media_player.event_manager()
+        for name in PLAYER_EVENTS:
+            events.event_detach(getattr(vlc.EventType, name))
+        media_player.video_set_marquee_int(vlc.VideoMarqueeOption.Enable, 0)
+        set_video_output(media_player, 0)
+        media_player.set_media(None)
+        if len(self.idle) < self.max_idle:
+            self.idle.append(media_player)
         else:
-            self.loading_finished.emit()
+            media_player.release()
 
-    def on_item_double_clicked(self, item, column):
-        # Check if this is a media item (not a group)
-        if item.parent() is not None:  # This means it's a child item (media item)
-            media_item = item.data(0, Qt.UserRole)
-            if media_item and hasattr(media_item, 'stream_url'):
-                # Create and show the media player window
-                player = MediaPlayer(media_item.stream_url, media_item.name, self)
-                player.show()
-                player.media_player.play()  # Start playing immediately
+    def shutdown(self):
+        for media_player in self.idle:
+            media_player.release()
+        self.idle = []
+        if self.instance is not None and not self.in_use:
+            self.instance.release()
+            self.instance = None
 
 class MediaPlayer(QMainWindow):
-    def __init__(self, stream_url, title, parent=None):
+    first_frame = pyqtSignal(float)  # milliseconds from opening to the first video output
+    switch_done = pyqtSignal(float)  # milliseconds from a channel switch to its first video output
+    # libVLC events, emitted on its thread and delivered queued to the UI thread
+    playing_changed = pyqtSignal(bool)
+    position_changed = pyqtSignal(int)  # slider value, 0-1000
+    time_changed = pyqtSignal(int)  # seconds played
+    length_changed = pyqtSignal(int)  # seconds
+    media_error = pyqtSignal()
+
+    max_prefetch = 2  # Neighbor channels kept playing muted in the background
+    prefetch_delay = 500  # ms to settle on a channel before prefetching its neighbors
+    stats_log = None  # StatsLog shared by all player windows, set by IPTVPlayer
+    show_stats = False  # Statistics overlay, carried over to windows opened later
+    stats_interval = 1000  # ms between statistics samples while the overlay is shown
+    log_interval = 10000  # ms between samples otherwise; samples this far apart are logged
+
+    def __init__(self, stream_url, title, parent=None, channels=None, channel_index=0, fallback_urls=None):
         super().__init__(parent)
         self.setWindowTitle(title)
+        self.title = title  # Also read from libVLC's event thread, which must not touch widgets
+        self.fallback_urls = list(fallback_urls or [])  # Same stream from other providers
+        self.open_time = time.perf_counter()
+        self.first_frame_ms = None
+        
+        # Channel list for next/previous zapping (the group the stream was opened from)
+        self.channels = channels if channels is not None and len(channels) > 1 else None
+        self.channel_index = channel_index
+        self.prefetched = {}  # channel index -> (media_player, media, video frame)
+        self.switch_start = None
+        self.switch_latencies = []
+        self.volume = 100
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(self.prefetch_delay)
+        self.prefetch_timer.timeout.connect(self.update_prefetch)
+        # Free the window and its player as soon as it is closed
+        self.setAttribute(Qt.WA_DeleteOnClose)
         
         # Set initial size to 800x800
         screen = QApplication.primaryScreen().geometry()
@@ -481,21 +1301,18 @@ class MediaPlayer(QMainWindow):
         # Allow window to be maximized
         self.setWindowFlags(self.windowFlags() | Qt.WindowMaximizeButtonHint)
 
-        # Create VLC instance and media player
-        self.instance = vlc.Instance()
-        self.media_player = self.instance.media_player_new()
+        # Borrow a media player from the shared libVLC instance
+        self.player_pool = VLCPlayerPool.shared()
+        self.instance = self.player_pool.get_instance()
+        self.media_player = self.player_pool.acquire()
         
-        # Create a widget to hold the video
-        self.video_widget = QFrame()
-        self.video_widget.setStyleSheet("background-color: black;")
-        self.video_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)  # Make video expand to fill space
+        # Create a widget to hold the video; prefetched channels render into
+        # hidden pages of the same stack so a switch only flips the page
+        self.video_stack = QStackedWidget()
+        self.video_stack.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)  # Make video expand to fill space
+        self.video_widget = self.new_video_frame()
         
-        if sys.platform.startswith('win'):
-            self.media_player.set_hwnd(self.video_widget.winId())
-        elif sys.platform.startswith('linux'):
-            self.media_player.set_xwindow(self.video_widget.winId())
-        elif sys.platform.startswith('darwin'):
-            self.media_player.set_nsobject(int(self.video_widget.winId()))
+        set_video_output(self.media_player, int(self.video_widget.winId()))
         
         # Set up the main layout
         main_widget = QWidget()
@@ -507,7 +1324,7 @@ class MediaPlayer(QMainWindow):
         video_container = QVBoxLayout()
         video_container.setSpacing(5)  # Minimal spacing between video and controls
         video_container.setContentsMargins(0, 0, 0, 5)  # Add small bottom margin
-        video_container.addWidget(self.video_widget, stretch=1)  # Video takes all available space
+        video_container.addWidget(self.video_stack, stretch=1)  # Video takes all available space
         
         # Controls layout
         controls_layout = QVBoxLayout()
@@ -527,6 +1344,11 @@ class MediaPlayer(QMainWindow):
         
         # Only show time slider for movies and series
         is_movie_or_series = "/movie/" in stream_url or "/series/" in stream_url
+        self.seekable = is_movie_or_series  # Live streams get no position events
+        self.last_position = None
+        self.last_second = None
+        self.current_time = 0
+        self.length = 0
         self.time_slider.setVisible(is_movie_or_series)
         self.time_label.setVisible(is_movie_or_series)
         
@@ -539,12 +1361,26 @@ class MediaPlayer(QMainWindow):
         button_layout = QHBoxLayout()
         button_layout.setSpacing(5)  # Space between buttons
         
+        # Previous channel button
+        if self.channels:
+            previous_button = QPushButton("Previous")
+            previous_button.clicked.connect(self.previous_channel)
+            previous_button.setFixedHeight(30)
+            button_layout.addWidget(previous_button)
+        
         # Play/Pause button
         self.play_button = QPushButton("Play")
         self.play_button.clicked.connect(self.play_pause)
         self.play_button.setFixedHeight(30)  # Set fixed height for buttons
         button_layout.addWidget(self.play_button)
         
+        # Next channel button
+        if self.channels:
+            next_button = QPushButton("Next")
+            next_button.clicked.connect(self.next_channel)
+            next_button.setFixedHeight(30)
+            button_layout.addWidget(next_button)
+        
         # Stop button
         stop_button = QPushButton("Stop")
         stop_button.clicked.connect(self.stop)
@@ -557,6 +1393,14 @@ class MediaPlayer(QMainWindow):
         maximize_button.setFixedHeight(30)
         button_layout.addWidget(maximize_button)
         
+        # Playback statistics drawn over the video (also toggled with I)
+        self.stats_button = QPushButton("Stats")
+        self.stats_button.setCheckable(True)
+        self.stats_button.setChecked(self.show_stats)
+        self.stats_button.toggled.connect(self.set_stats_overlay)
+        self.stats_button.setFixedHeight(30)
+        button_layout.addWidget(self.stats_button)
+        
         controls_layout.addLayout(button_layout)
         video_container.addLayout(controls_layout)
         
@@ -598,6 +1442,19 @@ class MediaPlayer(QMainWindow):
         # Set up the media
         self.media = self.instance.media_new(stream_url)
         self.media_player.set_media(self.media)
+        self.stats = PlaybackStats(stream_url, title)
+        self.last_logged = time.perf_counter()
+        
+        # libVLC calls back on its own thread; the signals bring the changes
+        # to the UI thread, so widgets are only touched when something changed
+        self.first_frame.connect(self.show_first_frame_time)
+        self.switch_done.connect(self.show_switch_time)
+        self.playing_changed.connect(self.show_playing)
+        self.position_changed.connect(self.show_position)
+        self.time_changed.connect(self.show_time)
+        self.length_changed.connect(self.show_length)
+        self.media_error.connect(self.handle_error)
+        self.attach_events()
         
         # Set initial volume
         self.media_player.audio_set_volume(100)
@@ -606,11 +1463,13 @@ class MediaPlayer(QMainWindow):
         self.media_player.play()
         self.play_button.setText("Pause")
         
-        # Setup timer for updating UI
-        self.timer = QTimer(self)
-        self.timer.setInterval(100)
-        self.timer.timeout.connect(self.update_ui)
-        self.timer.start()
+        # libVLC media statistics for the overlay and the stats log
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.sample_stats)
+        self.set_stats_overlay(self.show_stats)
+        
+        if self.channels:
+            self.prefetch_timer.start()
     
     def play_pause(self):
         if self.media_player.is_playing():
@@ -631,57 +1490,287 @@ class MediaPlayer(QMainWindow):
             self.showMaximized()
     
     def set_volume(self, volume):
+        self.volume = volume
         self.media_player.audio_set_volume(volume)
         self.volume_percent.setText(f"{volume}%")
     
-    def update_ui(self):
-        # Update play/pause button
-        if not self.media_player.is_playing():
-            self.play_button.setText("Play")
-        else:
-            self.play_button.setText("Pause")
-            
-        # Update time slider and label for movies and series
-        if self.time_slider.isVisible():
-            media_pos = self.media_player.get_position()
-            media_length = self.media_player.get_length() / 1000  # Convert to seconds
-            
-            # Update slider
-            if not self.time_slider.isSliderDown():
-                self.time_slider.setValue(int(media_pos * 1000))
-            
-            if media_length > 0:
-                current_time = int(media_length * media_pos)
-                total_time = int(media_length)
-                
-                # Format time as HH:MM:SS
-                current_str = time.strftime('%H:%M:%S', time.gmtime(current_time))
-                total_str = time.strftime('%H:%M:%S', time.gmtime(total_time))
-                
-                self.time_label.setText(f"{current_str} / {total_str}")
-                
-                # Enable slider once media length is known
-                if not self.time_slider.isEnabled():
-                    self.time_slider.setEnabled(True)
-                    self.time_slider.setRange(0, 1000)
-            
-        # Check for media errors
-        state = self.media_player.get_state()
-        if state == vlc.State.Error:
-            self.handle_error()
+    def attach_events(self):
+        """Follow the visible player through libVLC events instead of polling it"""
+        import vlc
+        handlers = {
+            'MediaPlayerVout': self.on_vout,
+            'MediaPlayerBuffering': self.on_buffering,
+            'MediaPlayerPlaying': lambda event: self.playing_changed.emit(True),
+            'MediaPlayerPaused': lambda event: self.playing_changed.emit(False),
+            'MediaPlayerStopped': lambda event: self.playing_changed.emit(False),
+            'MediaPlayerEndReached': lambda event: self.playing_changed.emit(False),
+            'MediaPlayerEncounteredError': lambda event: self.media_error.emit()
+        }
+        if self.seekable:
+            handlers.update({
+                'MediaPlayerPositionChanged': self.on_position,
+                'MediaPlayerTimeChanged': self.on_time,
+                'MediaPlayerLengthChanged': lambda event: self.length_changed.emit(event.u.new_length // 1000)
+            })
+        events = self.media_player.event_manager()
+        for name, handler in handlers.items():
+            events.event_attach(getattr(vlc.EventType, name), handler)
+    
+    def detach_events(self):
+        import vlc
+        events = self.media_player.event_manager()
+        for name in PLAYER_EVENTS:
+            events.event_detach(getattr(vlc.EventType, name))
+    
+    def on_position(self, event):
+        # Position and time events come many times a second; pass on only visible changes
+        position = int(event.u.new_position * 1000)
+        if position != self.last_position:
+            self.last_position = position
+            self.position_changed.emit(position)
+    
+    def on_time(self, event):
+        second = event.u.new_time // 1000
+        if second != self.last_second:
+            self.last_second = second
+            self.time_changed.emit(second)
+    
+    def show_playing(self, playing):
+        self.play_button.setText("Pause" if playing else "Play")
+    
+    def show_position(self, position):
+        if not self.time_slider.isSliderDown():
+            self.time_slider.setValue(position)
+    
+    def show_time(self, second):
+        self.current_time = second
+        self.show_time_label()
+    
+    def show_length(self, length):
+        self.length = length
+        # Enable slider once media length is known
+        if length > 0 and not self.time_slider.isEnabled():
+            self.time_slider.setEnabled(True)
+            self.time_slider.setRange(0, 1000)
+        self.show_time_label()
+    
+    def show_time_label(self):
+        if self.length > 0:
+            # Format time as HH:MM:SS
+            current_str = time.strftime('%H:%M:%S', time.gmtime(self.current_time))
+            total_str = time.strftime('%H:%M:%S', time.gmtime(self.length))
+            self.time_label.setText(f"{current_str} / {total_str}")
             
     def set_position(self, position):
         """Set the media position according to the slider value"""
         self.media_player.set_position(position / 1000.0)
     
     def handle_error(self):
+        self.stats.errors += 1
+        if self.fallback_urls:
+            # Fail over to the same stream from another provider
+            self.finish_stats('failed over')
+            url = self.fallback_urls.pop(0)
+            self.media.release()
+            self.media = self.instance.media_new(url)
+            self.stats = PlaybackStats(url, self.title)
+            # Time to first frame is measured for the new source
+            self.open_time = time.perf_counter()
+            self.first_frame_ms = None
+            self.media_player.set_media(self.media)
+            self.media_player.play()
+            self.statusBar().showMessage("Stream failed, trying another source...", 5000)
+            return
         self.play_button.setEnabled(False)
+        self.finish_stats('error')
         QMessageBox.warning(self, "Media Player Error", 
                           "Error playing media. Please check the stream URL.")
     
+    def on_vout(self, event):
+        if self.first_frame_ms is None:
+            now = time.perf_counter()
+            tracer.record('first_frame', self.open_time, now, {'title': self.title})
+            self.stats.frame_shown(now)
+            self.first_frame_ms = (now - self.open_time) * 1000
+            self.first_frame.emit(self.first_frame_ms)
+        elif self.switch_start is not None:
+            self.switch_finished(warm=False)
+    
+    def switch_finished(self, warm):
+        now = time.perf_counter()
+        self.stats.frame_shown(now)
+        tracer.record('channel_switch', self.switch_start, now, {'title': self.title, 'warm': warm})
+        self.switch_done.emit((now - self.switch_start) * 1000)
+        self.switch_start = None
+    
+    def on_buffering(self, event):
+        # Called on libVLC's thread; only plain attributes are touched
+        self.stats.buffering(event.u.new_cache)
+    
+    def show_first_frame_time(self, milliseconds):
+        self.statusBar().showMessage(f"First frame after {milliseconds:.0f} ms", 5000)
+    
+    def set_stats_overlay(self, shown):
+        MediaPlayer.show_stats = shown
+        self.show_overlay(self.media_player, shown)
+        # Sampled less often without the overlay; the log needs no more
+        self.stats_timer.start(self.stats_interval if shown else self.log_interval)
+        if shown:
+            self.sample_stats()
+    
+    def show_overlay(self, media_player, shown):
+        import vlc
+        media_player.video_set_marquee_int(vlc.VideoMarqueeOption.Enable, int(shown))
+        if shown:
+            media_player.video_set_marquee_int(vlc.VideoMarqueeOption.Position, 5)  # top left
+            media_player.video_set_marquee_int(vlc.VideoMarqueeOption.Size, 14)
+            media_player.video_set_marquee_string(vlc.VideoMarqueeOption.Text, self.stats.overlay_text())
+    
+    def sample_stats(self):
+        """Read libVLC's media statistics into the overlay and the stats log"""
+        import vlc
+        media_stats = vlc.MediaStats()
+        if not self.media.get_stats(media_stats):
+            return  # Not opened yet
+        self.stats.sample({name: getattr(media_stats, 'i_' + name) for name in PlaybackStats.counters})
+        if self.show_stats:
+            self.media_player.video_set_marquee_string(vlc.VideoMarqueeOption.Text, self.stats.overlay_text())
+        now = time.perf_counter()
+        # Allow for timer jitter, so every log_interval tick is logged
+        if self.stats_log is not None and now - self.last_logged >= (self.log_interval - self.stats_interval) / 1000:
+            self.last_logged = now
+            self.stats_log.append(self.stats.record('sample'))
+    
+    def finish_stats(self, outcome):
+        """Log the totals of the stream that is ending"""
+        if self.stats.outcome is not None:
+            return
+        self.sample_stats()
+        self.stats.outcome = outcome
+        if self.stats_log is not None:
+            self.stats_log.append(self.stats.record('stream'))
+    
+    def new_video_frame(self):
+        frame = QFrame()
+        frame.setStyleSheet("background-color: black;")
+        self.video_stack.addWidget(frame)
+        return frame
+    
+    def next_channel(self):
+        self.switch_channel(1)
+    
+    def previous_channel(self):
+        self.switch_channel(-1)
+    
+    def switch_channel(self, step):
+        if not self.channels:
+            return
+        self.prefetch_timer.stop()
+        self.finish_stats('switched')
+        self.switch_start = time.perf_counter()
+        old_index = self.channel_index
+        self.channel_index = (self.channel_index + step) % len(self.channels)
+        channel = self.channels[self.channel_index]
+        self.setWindowTitle(channel.name)
+        self.title = channel.name
+        self.fallback_urls = [url for _, url in stream_sources(channel)[1:]]
+        
+        self.detach_events()
+        self.stats = PlaybackStats(channel.stream_url, channel.name)
+        
+        warm = self.prefetched.pop(self.channel_index, None)
+        if warm is not None:
+            # The neighbor is already connected and decoding: show it and unmute
+            old = (self.media_player, self.media, self.video_widget)
+            self.media_player, self.media, self.video_widget = warm
+            self.video_stack.setCurrentWidget(self.video_widget)
+            self.media_player.audio_set_mute(False)
+            self.media_player.audio_set_volume(self.volume)
+            
+            # The channel we left is now a neighbor, so keep it warm
+            old[0].audio_set_mute(True)
+            if self.show_stats:
+                self.show_overlay(old[0], False)
+                self.show_overlay(self.media_player, True)
+            self.prefetched[old_index] = old
+            self.switch_finished(warm=True)
+        else:
+            # Cold switch: reuse the visible player for the new stream
+            self.media_player.stop()
+            self.media.release()
+            self.media = self.instance.media_new(channel.stream_url)
+            self.media_player.set_media(self.media)
+            self.media_player.play()
+        
+        self.attach_events()
+        self.play_button.setText("Pause")
+        self.play_button.setEnabled(True)
+        self.prefetch_timer.start()
+    
+    def update_prefetch(self):
+        """Keep the nearest neighbors of the current channel playing muted in the background"""
+        if not self.channels:
+            return
+        wanted = []
+        for distance in range(1, len(self.channels)):
+            for index in ((self.channel_index + distance) % len(self.channels),
+                          (self.channel_index - distance) % len(self.channels)):
+                if index != self.channel_index and index not in wanted and len(wanted) < self.max_prefetch:
+                    wanted.append(index)
+            if len(wanted) >= self.max_prefetch:
+                break
+        
+        for index in list(self.prefetched):
+            if index not in wanted:
+                self.release_prefetched(index)
+        
+        for index in wanted:
+            if index in self.prefetched:
+                continue
+            media_player = self.player_pool.acquire()
+            frame = self.new_video_frame()
+            set_video_output(media_player, int(frame.winId()))
+            media = self.instance.media_new(self.channels[index].stream_url)
+            media_player.set_media(media)
+            media_player.audio_set_mute(True)
+            media_player.play()
+            self.prefetched[index] = (media_player, media, frame)
+    
+    def release_prefetched(self, index):
+        media_player, media, frame = self.prefetched.pop(index)
+        self.player_pool.release(media_player)
+        media.release()
+        self.video_stack.removeWidget(frame)
+        frame.deleteLater()
+    
+    def show_switch_time(self, milliseconds):
+        self.switch_latencies.append(milliseconds)
+        latencies = sorted(self.switch_latencies)
+        median = latencies[len(latencies) // 2]
+        self.statusBar().showMessage(f"Switched in {milliseconds:.0f} ms "
+                                     f"(median {median:.0f} ms over {len(latencies)} switches)", 5000)
+    
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_I:
+            self.stats_button.toggle()
+        elif self.channels and event.key() in (Qt.Key_PageUp, Qt.Key_Up):
+            self.previous_channel()
+        elif self.channels and event.key() in (Qt.Key_PageDown, Qt.Key_Down):
+            self.next_channel()
+        else:
+            super().keyPressEvent(event)
+    
     def closeEvent(self, event):
-        self.timer.stop()
-        self.media_player.stop()
+        self.prefetch_timer.stop()
+        self.stats_timer.stop()
+        for index in list(self.prefetched):
+            self.release_prefetched(index)
+        if self.media_player is not None:
+            self.finish_stats('closed')
+            # Hand the player back to the pool and free the media right away
+            self.player_pool.release(self.media_player)
+            self.media_player = None
+            self.media.release()
         # Reset window state before closing
         self.showNormal()
         event.accept()
@@ -694,24 +1783,132 @@ class MediaPlayer(QMainWindow):
         self.setGeometry(x, y, 800, 800)
         super().showEvent(event)
 
+class DebugPanel(QDialog):
+    """Live summary of the recorded spans and counters, with Chrome trace export"""
+
+    def __init__(self, trace_path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Performance")
+        self.resize(640, 420)
+        self.trace_path = trace_path
+        layout = QVBoxLayout()
+        
+        self.enabled_checkbox = QCheckBox("Record timings")
+        self.enabled_checkbox.setChecked(tracer.enabled)
+        self.enabled_checkbox.toggled.connect(self.set_enabled)
+        layout.addWidget(self.enabled_checkbox)
+        
+        self.summary_list = QListWidget()
+        font = QFont("Monospace")
+        font.setStyleHint(QFont.TypeWriter)
+        self.summary_list.setFont(font)
+        layout.addWidget(self.summary_list)
+        
+        button_layout = QHBoxLayout()
+        export_button = QPushButton("Export Trace...")
+        export_button.clicked.connect(self.export_trace)
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(self.clear)
+        button_layout.addWidget(export_button)
+        button_layout.addWidget(clear_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+        
+        # Only refreshed while open, so the panel costs nothing otherwise
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+        
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+        
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+        
+    def set_enabled(self, enabled):
+        tracer.enabled = enabled
+        
+    def refresh(self):
+        self.summary_list.clear()
+        spans = sorted(tracer.summary().items(), key=lambda entry: entry[1]['total_s'], reverse=True)
+        for name, entry in spans:
+            self.summary_list.addItem(f"{name:<22} {entry['count']:>6}x  total {entry['total_s'] * 1000:>10.1f} ms  "
+                                      f"max {entry['max_s'] * 1000:>8.1f} ms  last {entry['last_s'] * 1000:>8.1f} ms")
+        counters = tracer.snapshot()[1]
+        for name, value in sorted(counters.items()):
+            self.summary_list.addItem(f"{name:<22} {value:>14,}")
+        if not spans and not counters:
+            self.summary_list.addItem("Nothing recorded yet" if tracer.enabled else "Recording is off")
+        
+    def clear(self):
+        tracer.clear()
+        self.refresh()
+        
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Trace", self.trace_path,
+                                              "Chrome trace (*.json)")
+        if not path:
+            return
+        try:
+            tracer.export(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to write trace: {e}")
+            return
+        self.trace_path = path
+
 class IPTVPlayer(QMainWindow):
-    def __init__(self):
+    session_restored = pyqtSignal()  # the last session is back on screen, or there was none
+
+    session_version = 1
+
+    def __init__(self, app_dir=None):
         super().__init__()
         self.setWindowTitle("IPTV Player")
         self.setGeometry(100, 100, 1024, 768)
         
         # Set up directories
-        self.app_dir = os.path.dirname(os.path.abspath(__file__))
+        self.app_dir = app_dir or os.path.dirname(os.path.abspath(__file__))
         self.playlists_dir = os.path.join(self.app_dir, 'playlists')
         self.cache_dir = os.path.join(self.app_dir, 'cache')
         self.playlist_info_file = os.path.join(self.app_dir, 'playlist_info.json')
+        self.session_file = os.path.join(self.app_dir, 'session.json')
+        self.stream_health = StreamHealthCache(os.path.join(self.app_dir, 'stream_health.json'))
+        self.health_checker = None  # Check whose results the status bar follows
+        self.health_checkers = []  # Cancelled checks, kept until their running probes end
         
         # Create directories if they don't exist
         os.makedirs(self.playlists_dir, exist_ok=True)
         os.makedirs(self.cache_dir, exist_ok=True)
+        self.playlist_cache = PlaylistCache(self.cache_dir)
+        self.library = MediaLibrary(os.path.join(self.app_dir, 'library.db'))
+        self.logo_loader = LogoLoader(os.path.join(self.cache_dir, 'logos'))
+        # Per-session playback quality log, for comparing providers and streams
+        MediaPlayer.stats_log = StatsLog(os.path.join(self.app_dir, 'logs'))
+        self.current_playlist_path = None
+        self.loaded_playlist_path = None  # Playlist whose content is in the trees
+        self.parser_worker = None  # Worker whose playlist the UI follows
+        self.parser_workers = []  # Replaced workers still indexing or saving, kept until they stop
+        self.epg_worker = None  # Worker loading the guide of the shown playlist
+        self.epg_workers = []  # Replaced guide workers, kept until they stop
+        self.current_merge = None  # Playlists being merged, when loading several
+        self.loaded_merge = None
+        self.pending_session = None  # Saved session to apply once its playlist is loaded
+        self.session_restore_started = False
+        self.startup_timings = {}  # seconds from LAUNCH_TIME to each startup milestone
+        # Opt-in multi-process parsing of very large playlists, e.g. IPTV_PARSE_WORKERS=8
+        self.parse_workers = int(os.environ.get('IPTV_PARSE_WORKERS') or 0)
+        # IPTV_TRACE=trace.json records timings from start-up and writes them there on exit
+        self.trace_path = os.environ.get('IPTV_TRACE')
+        if self.trace_path:
+            tracer.enabled = True
+        self.debug_panel = None
         
         # Load playlist information
         self.playlist_info = self.load_playlist_info()
+        self.parsing = False
         
         # Main widget and layout
         main_widget = QWidget()
@@ -741,10 +1938,24 @@ class IPTVPlayer(QMainWindow):
         self.search_input.setPlaceholderText("Search in current tab...")
         self.search_input.returnPressed.connect(self.perform_search)  # Enter key
         
+        # Search as you type, once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.perform_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        
         search_button = QPushButton("Search")
         search_button.clicked.connect(self.perform_search)
         
+        # Search Live TV, Movies and Series together
+        self.global_search_checkbox = QCheckBox("All tabs")
+        self.global_search_checkbox.toggled.connect(self.perform_search)
+        self.search_generation = 0
+        self.search_workers = []
+        
         search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.global_search_checkbox)
         search_layout.addWidget(search_button)
         
         # Add existing buttons
@@ -787,28 +1998,49 @@ class IPTVPlayer(QMainWindow):
         self.tabs.addTab(movies_tab, "Movies")
         self.tabs.addTab(series_tab, "Series")
         
+        # Ranked results of "All tabs" searches
+        self.search_results = QListWidget()
+        self.search_results.itemDoubleClicked.connect(self.search_result_double_clicked)
+        self.tabs.addTab(self.search_results, "Search Results")
+        
         # Main layout assembly
         main_layout.addWidget(self.tabs)
         
         main_widget.setLayout(main_layout)
         self.setCentralWidget(main_widget)
         
-        requests.packages.urllib3.disable_warnings()
+        # Timings and counters, for finding where time goes
+        QShortcut(QKeySequence("F12"), self, self.show_debug_panel)
+
+    def show_debug_panel(self):
+        if self.debug_panel is None:
+            self.debug_panel = DebugPanel(self.trace_path or os.path.join(self.app_dir, 'trace.json'), self)
+        self.debug_panel.show()
+        self.debug_panel.raise_()
 
     def load_playlist_info(self):
-        if os.path.exists(self.playlist_info_file):
-            try:
-                with open(self.playlist_info_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+        playlist_info = self.library.playlist_info()
+        if playlist_info or not os.path.exists(self.playlist_info_file):
+            return playlist_info
+        
+        # First run with the library: import the old JSON file once
+        try:
+            with open(self.playlist_info_file, 'r') as f:
+                playlist_info = json.load(f)
+        except:
+            return {}
+        for filename, info in playlist_info.items():
+            self.library.save_playlist_info(filename, info)
+        return playlist_info
 
-    def save_playlist_info(self):
+    def save_playlist_info(self, filename=None):
+        # One row per playlist, so only the changed playlist is written when known
         try:
-            with open(self.playlist_info_file, 'w') as f:
-                json.dump(self.playlist_info, f, indent=4)
-        except Exception as e:
+            if filename is None:
+                self.library.sync_playlist_info(self.playlist_info)
+            else:
+                self.library.save_playlist_info(filename, self.playlist_info[filename])
+        except sqlite3.Error as e:
             print(f"Error saving playlist info: {e}")
 
     def get_last_used_url(self):
@@ -840,30 +2072,39 @@ class IPTVPlayer(QMainWindow):
         self.status_label.setText("Updating playlist...")
         self.speed_label.setText("")
         
+        # Revalidate with the stored ETag / Last-Modified so unchanged playlists aren't re-sent
+        validators = self.playlist_info.get(filename, {}).get('validators')
+        
         # Create and start download worker
-        self.download_worker = DownloadWorker(url, save_path)
+        self.download_worker = DownloadWorker(url, save_path, validators)
         self.download_worker.progress.connect(self.update_progress)
         self.download_worker.finished.connect(self.download_finished)
+        self.download_worker.not_modified.connect(self.playlist_not_modified)
         self.download_worker.error.connect(self.download_error)
         self.download_worker.start()
         
-    def update_finished(self, save_path):
+    def playlist_not_modified(self, save_path):
         self.progress_bar.setVisible(False)
         self.speed_label.setText("")
-        self.status_label.setText("Playlist updated successfully!")
+        self.status_label.setText("Playlist is already up to date.")
         
-        # Update playlist info
         url = self.playlist_input.text().strip()
-        self.update_playlist_info(url, save_path)
-
-    def update_playlist_info(self, url, save_path):
+        self.update_playlist_info(url, save_path, self.download_worker.validators)
+        
+        # Nothing changed, so only load if a different playlist is on screen
+        if self.current_playlist_path != save_path:
+            self.load_playlist(save_path)
+        
+    def update_playlist_info(self, url, save_path, validators=None):
         filename = os.path.basename(save_path)
         self.playlist_info[filename] = {
             'url': url,
             'timestamp': time.time(),
             'path': save_path
         }
-        self.save_playlist_info()
+        if validators:
+            self.playlist_info[filename]['validators'] = validators
+        self.save_playlist_info(filename)
 
     def download_finished(self, file_path):
         self.progress_bar.setVisible(False)
@@ -871,18 +2112,15 @@ class IPTVPlayer(QMainWindow):
         self.status_label.setText("Download completed!")
         self.speed_label.setText("")
         
-        # Update playlist information
+        # Update playlist information, keeping the validators for the next refresh
         url = self.playlist_input.text().strip()
-        filename = os.path.basename(file_path)
-        self.playlist_info[filename] = {
-            'url': url,
-            'timestamp': time.time(),
-            'path': file_path
-        }
-        self.save_playlist_info()
+        self.update_playlist_info(url, file_path, self.download_worker.validators)
         
-        # Parse and load the playlist content
-        self.load_playlist(file_path)
+        # A refresh of the playlist on screen only applies what changed
+        if file_path == self.loaded_playlist_path and not self.parsing:
+            self.update_loaded_playlist(file_path)
+        else:
+            self.load_playlist(file_path)
 
         QMessageBox.information(self, "Success", f"Playlist downloaded to: {file_path}")
 
@@ -895,10 +2133,14 @@ class IPTVPlayer(QMainWindow):
     
     def clear_cache(self):
         try:
+            self.logo_loader.clear()
             for filename in os.listdir(self.cache_dir):
                 file_path = os.path.join(self.cache_dir, filename)
                 if os.path.isfile(file_path):
                     os.unlink(file_path)
+                elif os.path.isdir(file_path):
+                    shutil.rmtree(file_path)
+            os.makedirs(self.logo_loader.cache_dir, exist_ok=True)
             QMessageBox.information(self, "Success", "Cache cleared successfully!")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to clear cache: {str(e)}")
@@ -926,7 +2168,7 @@ class IPTVPlayer(QMainWindow):
                 'timestamp': time.time(),
                 'path': save_path
             }
-            self.save_playlist_info()
+            self.save_playlist_info(filename)
 
             self.download_worker = DownloadWorker(url, save_path)
             self.download_worker.progress.connect(self.update_progress)
@@ -947,13 +2189,10 @@ class IPTVPlayer(QMainWindow):
             if not os.path.exists(file_path):
                 playlists_to_remove.append(filename)
         
-        # Remove non-existent playlists from info
+        # Remove non-existent playlists from info and the library
         for filename in playlists_to_remove:
             del self.playlist_info[filename]
-        
-        # Save cleaned up playlist info
-        if playlists_to_remove:
-            self.save_playlist_info()
+            self.library.remove_playlist(filename)
             
         return len(playlists_to_remove)
 
@@ -971,6 +2210,9 @@ class IPTVPlayer(QMainWindow):
             
         dialog = PlaylistSelector(self.playlist_info, self)
         if dialog.exec_() == QDialog.Accepted:
+            if dialog.merge:
+                self.load_merged(dialog.get_selected_playlists())
+                return
             selected_path = dialog.get_selected_playlist()
             if selected_path:
                 # Find the URL for the selected playlist
@@ -983,12 +2225,25 @@ class IPTVPlayer(QMainWindow):
                         break
 
     def load_playlist(self, playlist_path):
+        parser = PlaylistParser(playlist_path, self.playlist_cache, self.library, self.parse_workers)
+        self.current_merge = None
+        self.start_loading(PlaylistParserWorker(parser), playlist_path)
+        
+    def load_merged(self, playlist_paths):
+        self.current_merge = list(playlist_paths)
+        names = {info.get('path'): filename for filename, info in self.playlist_info.items()}
+        source_names = [names.get(path, os.path.basename(path)) for path in playlist_paths]
+        merger = PlaylistMerger(playlist_paths, source_names, self.playlist_cache, self.library)
+        self.start_loading(PlaylistParserWorker(merger), None)
+        self.status_label.setText(f"Merging {len(playlist_paths)} playlists...")
+        
+    def start_loading(self, parser_worker, playlist_path):
         try:
             # Create tree widgets if they don't exist
             if not hasattr(self, 'live_tv_tree'):
                 self.live_tv_tree = MediaTreeWidget()
                 self.movies_tree = MediaTreeWidget()
-                self.series_tree = MediaTreeWidget()
+                self.series_tree = SeriesTreeWidget()
                 
                 # Connect loading progress signals
                 self.live_tv_tree.loading_progress.connect(lambda c, t: self.update_loading_progress("Live TV", c, t))
@@ -999,6 +2254,12 @@ class IPTVPlayer(QMainWindow):
                 self.movies_tree.loading_finished.connect(lambda: self.loading_finished("Movies"))
                 self.series_tree.loading_finished.connect(lambda: self.loading_finished("Series"))
                 
+                # Stream health markers and checks
+                for tree in (self.live_tv_tree, self.movies_tree, self.series_tree):
+                    tree.media_model.health = self.stream_health
+                    tree.set_logo_loader(self.logo_loader)
+                    tree.health_check_requested.connect(self.start_health_check)
+                
                 # Add trees to their respective tabs
                 live_tv_layout = QVBoxLayout()
                 live_tv_layout.addWidget(self.live_tv_tree)
@@ -1017,52 +2278,198 @@ class IPTVPlayer(QMainWindow):
             self.progress_bar.setVisible(True)
             self.status_label.setText("Parsing playlist...")
             
-            # Create and start parser worker
-            self.parser_worker = PlaylistParserWorker(playlist_path)
-            self.parser_worker.progress.connect(self.update_parse_progress)
-            self.parser_worker.finished.connect(self.parser_finished)
-            self.parser_worker.error.connect(self.parser_error)
-            self.parser_worker.start()
+            # Clear the trees so parser chunks can stream straight into them
+            self.parsing = True
+            self.live_tv_tree.populate_tree({})
+            self.movies_tree.populate_tree({})
+            self.series_tree.populate_tree({})
+            self.current_playlist_path = playlist_path
+            
+            # Start the parser worker
+            parser_worker.progress.connect(self.update_parse_progress)
+            parser_worker.chunk_ready.connect(self.parser_chunk_ready)
+            parser_worker.finished.connect(self.parser_finished)
+            parser_worker.indexes_ready.connect(self.search_indexes_ready)
+            parser_worker.error.connect(self.parser_error)
+            self.start_parser_worker(parser_worker)
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load playlist: {str(e)}")
             
+    def start_parser_worker(self, parser_worker):
+        """Make parser_worker the one the UI follows and start it.
+
+        Workers go on indexing and saving after finished, so a replaced one
+        stays referenced until its thread stops; the slots ignore its signals.
+        """
+        self.parser_workers = [worker for worker in self.parser_workers if worker.isRunning()]
+        self.parser_workers.append(parser_worker)
+        self.parser_worker = parser_worker
+        parser_worker.start()
+        
     def update_parse_progress(self, current, total):
-        progress = int((current / total) * 100)
+        if self.sender() is not self.parser_worker:
+            return  # A replaced worker still reporting
+        progress = int((current / max(total, 1)) * 100)
         self.progress_bar.setValue(progress)
         self.status_label.setText(f"Parsing playlist... {progress}%")
         
     def update_loading_progress(self, section, current, total):
-        progress = int((current / total) * 100)
+        progress = int((current / max(total, 1)) * 100)
         self.progress_bar.setValue(progress)
         self.status_label.setText(f"Loading {section}... {progress}%")
         
     def loading_finished(self, section):
         self.status_label.setText(f"Finished loading {section}")
-        if section == "Series":  # Last section to load
-            self.progress_bar.setVisible(False)
-            self.status_label.setText("Playlist loaded successfully!")
+        # Trees are shown between parser chunks, so only finish once parsing is done
+        if not self.parsing:
+            self.playlist_loaded()
+        
+    def playlist_loaded(self):
+        self.progress_bar.setVisible(False)
+        stats = self.parser_worker.stats
+        if stats.get('merged'):
+            self.status_label.setText(f"Merged {stats['sources']} playlists: {stats['entries']} entries, "
+                                      f"{stats['duplicates']} duplicates removed in {stats['elapsed']:.2f}s")
+            return
+        if stats.get('cached'):
+            self.status_label.setText(f"Playlist loaded successfully! "
+                                      f"{stats.get('entries', 0)} entries loaded from cache "
+                                      f"in {stats.get('elapsed', 0):.2f}s")
+            return
+        self.status_label.setText(f"Playlist loaded successfully! "
+                                  f"{stats.get('entries', 0)} entries parsed in {stats.get('elapsed', 0):.2f}s "
+                                  f"({stats.get('entries_per_sec', 0):,.0f} entries/s)")
+        
+    def parser_chunk_ready(self, channels, movies, series):
+        if self.sender() is not self.parser_worker:
+            return
+        # Show groups while the rest of the file is still being parsed
+        self.live_tv_tree.append_items(channels)
+        self.movies_tree.append_items(movies)
+        # Series are shown by show once parsing has sorted all episodes
         
     def parser_finished(self, channels, movies, series):
-        self.status_label.setText("Organizing content...")
+        if self.sender() is not self.parser_worker:
+            return
+        self.parsing = False
+        self.loaded_playlist_path = self.current_playlist_path
+        self.loaded_merge = self.current_merge
         
         # Store content for reuse
         self.channels = channels
         self.movies = movies
         self.series = series
         
-        # Start populating trees with batch loading
-        self.live_tv_tree.populate_tree(channels)
-        self.movies_tree.populate_tree(movies)
-        self.series_tree.populate_tree(series)
+        # The trees were filled from chunks; keep the full dicts for search resets
+        search_indexes = self.parser_worker.search_indexes
+        for tree, media_dict, section in ((self.live_tv_tree, channels, 'channels'),
+                                          (self.movies_tree, movies, 'movies')):
+            tree.original_items = media_dict.copy()
+            tree.set_search_index(search_indexes.get(section))
+        self.series_tree.populate_tree(self.parser_worker.series_shows)
+        self.series_tree.set_search_index(search_indexes.get('series'))
+        
+        self.playlist_loaded()
+        
+        # Guides belong to a playlist, so one still loading for the previous playlist is ignored
+        self.epg_worker = None
+        for tree in (self.live_tv_tree, self.movies_tree, self.series_tree):
+            tree.media_model.epg = None
+        epg_urls = self.parser_worker.epg_urls()
+        if epg_urls:
+            self.load_epg(epg_urls[0])
+        
+        if self.pending_session is not None:
+            self.apply_session(self.pending_session)
+        
+    def load_epg(self, url):
+        # Ingesting a large guide takes a while; a replaced worker stays referenced until it stops
+        self.epg_workers = [worker for worker in self.epg_workers if worker.isRunning()]
+        epg_worker = EPGWorker(url, self.cache_dir)
+        epg_worker.finished.connect(self.epg_loaded)
+        epg_worker.error.connect(self.epg_error)
+        self.epg_workers.append(epg_worker)
+        self.epg_worker = epg_worker
+        epg_worker.start()
+        
+    def epg_loaded(self, epg):
+        if self.sender() is not self.epg_worker:
+            return  # Guide of a playlist no longer shown
+        for tree in (self.live_tv_tree, self.movies_tree, self.series_tree):
+            tree.media_model.epg = epg
+        self.speed_label.setText(f"Programme guide loaded ({len(epg)} programmes)")
+        
+    def epg_error(self, error_msg):
+        if self.sender() is not self.epg_worker:
+            return
+        self.status_label.setText(f"Failed to load programme guide: {error_msg}")
+        
+    def update_loaded_playlist(self, playlist_path):
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.status_label.setText("Applying playlist changes...")
+        self.parsing = True
+        
+        updater = PlaylistUpdater(playlist_path, (self.channels, self.movies, self.series),
+                                  self.series_tree.original_items, self.playlist_cache, self.library)
+        parser_worker = PlaylistParserWorker(updater)
+        parser_worker.progress.connect(self.update_parse_progress)
+        parser_worker.finished.connect(self.playlist_updated)
+        parser_worker.indexes_ready.connect(self.search_indexes_ready)
+        parser_worker.error.connect(self.parser_error)
+        self.start_parser_worker(parser_worker)
+        
+    def playlist_updated(self, channels, movies, series):
+        if self.sender() is not self.parser_worker:
+            return
+        self.parsing = False
+        self.channels = channels
+        self.movies = movies
+        self.series = series
+        
+        self.live_tv_tree.apply_update(channels)
+        self.movies_tree.apply_update(movies)
+        self.series_tree.apply_update(self.parser_worker.series_shows)
+        if self.search_input.text().strip():
+            self.perform_search()
+        
+        self.progress_bar.setVisible(False)
+        stats = self.parser_worker.stats
+        self.status_label.setText(f"Playlist updated: {stats['added']} added, {stats['changed']} changed, "
+                                  f"{stats['removed']} removed in {stats['elapsed']:.2f}s")
+        
+    def search_indexes_ready(self):
+        if self.sender() is not self.parser_worker:
+            return  # Indexes of a playlist no longer shown
+        search_indexes = self.sender().search_indexes
+        for tree, section in ((self.live_tv_tree, 'channels'), (self.movies_tree, 'movies'),
+                              (self.series_tree, 'series')):
+            tree.set_search_index(search_indexes.get(section))
+        if self.search_input.text().strip():
+            self.perform_search()
         
     def parser_error(self, error_msg):
+        if self.sender() is not self.parser_worker:
+            return
+        self.parsing = False
         self.progress_bar.setVisible(False)
         self.status_label.setText("Failed to parse playlist!")
+        if self.pending_session is not None:
+            self.pending_session = None
+            self.session_finished()
         QMessageBox.critical(self, "Error", f"Failed to parse playlist: {error_msg}")
         
     def perform_search(self):
+        self.search_timer.stop()
+        if not hasattr(self, 'live_tv_tree'):
+            return  # Nothing loaded yet
+        
         query = self.search_input.text().strip()
+        if self.global_search_checkbox.isChecked():
+            self.start_global_search(query)
+            return
+        
         current_tab = self.tabs.currentWidget()
         
         # Get the tree widget for the current tab
@@ -1078,22 +2485,210 @@ class IPTVPlayer(QMainWindow):
             content_type = "Series"
             
         if tree_widget:
+            tree_widget.search(query)
             if query:
-                tree_widget.search(query)
                 self.status_label.setText(f"Showing search results for: {query}")
             else:
-                # When search is cleared, reload the content for current tab
-                self.status_label.setText(f"Reloading {content_type}...")
-                if content_type == "Live TV":
-                    tree_widget.populate_tree(self.channels)
-                elif content_type == "Movies":
-                    tree_widget.populate_tree(self.movies)
-                elif content_type == "Series":
-                    tree_widget.populate_tree(self.series)
                 self.status_label.setText(f"Showing all {content_type}")
                 
+    def start_health_check(self, urls):
+        # A cancelled check finishes its running probes in the background; the slots ignore it
+        if self.health_checker is not None:
+            self.health_checker.cancel()
+            self.health_checkers.append(self.health_checker)
+            self.health_checker = None
+            self.progress_bar.setVisible(False)
+        self.health_checkers = [worker for worker in self.health_checkers if worker.isRunning()]
+        
+        # Skip streams with a fresh result
+        urls = self.stream_health.stale(urls)
+        if not urls:
+            self.status_label.setText("All selected streams were checked recently")
+            self.refresh_health_markers()
+            return
+        
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.status_label.setText(f"Checking {len(urls)} streams...")
+        self.health_checker = HealthCheckWorker(urls)
+        self.health_checker.progress.connect(self.update_health_progress)
+        self.health_checker.results_ready.connect(self.health_results_ready)
+        self.health_checker.finished.connect(self.health_check_finished)
+        self.health_checker.start()
+        
+    def update_health_progress(self, checked, total):
+        if self.sender() is not self.health_checker:
+            return  # A cancelled check still reporting
+        self.progress_bar.setValue(int((checked / max(total, 1)) * 100))
+        self.status_label.setText(f"Checking streams... {checked}/{total}")
+        
+    def health_results_ready(self, results):
+        self.stream_health.update(results)
+        self.refresh_health_markers()
+        
+    def health_check_finished(self, reachable, checked):
+        if self.sender() is not self.health_checker:
+            return
+        self.progress_bar.setVisible(False)
+        self.stream_health.save()
+        self.refresh_health_markers()
+        self.status_label.setText(f"{reachable} of {checked} checked streams are reachable")
+        
+    def refresh_health_markers(self):
+        # Markers are read from the cache while painting, so a repaint is enough
+        for tree in (self.live_tv_tree, self.movies_tree, self.series_tree):
+            tree.viewport().update()
+        
+    def start_global_search(self, query):
+        # Supersede any search still running
+        self.search_generation += 1
+        for worker in self.search_workers:
+            worker.cancel()
+        
+        if not query:
+            self.search_results.clear()
+            return
+        
+        search_indexes = self.parser_worker.search_indexes
+        if not search_indexes:
+            self.status_label.setText("Search is available once the playlist has been parsed")
+            return
+        
+        worker = GlobalSearchWorker(search_indexes, query, self.search_generation)
+        worker.results_ready.connect(self.global_search_finished)
+        worker.finished.connect(self.search_worker_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.search_workers.append(worker)
+        worker.start()
+        
+    def search_worker_finished(self):
+        # QThread.finished: the thread has stopped, so the worker can be dropped
+        self.search_workers.remove(self.sender())
+        
+    def global_search_finished(self, generation, query, results):
+        if generation != self.search_generation:
+            return  # A newer query is already running
+        
+        self.search_results.clear()
+        for section, media_item in results:
+            item = QListWidgetItem(f"{media_item.name}    [{SECTION_LABELS[section]} / {media_item.group}]")
+            item.setData(Qt.UserRole, media_item)
+            self.search_results.addItem(item)
+        
+        self.tabs.setCurrentWidget(self.search_results)
+        self.status_label.setText(f"{len(results)} results across all tabs for: {query}")
+        
+    def search_result_double_clicked(self, item):
+        media_item = item.data(Qt.UserRole)
+        if media_item:
+            fallback_urls = [url for _, url in stream_sources(media_item)[1:]]
+            player = MediaPlayer(media_item.stream_url, media_item.name, self, fallback_urls=fallback_urls)
+            player.show()
+            player.media_player.play()  # Start playing immediately
+                
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.session_restore_started:
+            self.session_restore_started = True
+            self.startup_timings['first_paint'] = time.perf_counter() - LAUNCH_TIME
+            # Started from the event loop, so the first paint never waits on the restore
+            QTimer.singleShot(0, self.restore_session)
+        
+    def restore_session(self):
+        """Reload the playlist, tab, search and tree state saved by save_session"""
+        try:
+            with open(self.session_file, 'r') as f:
+                session = json.load(f)
+        except (OSError, ValueError):
+            session = {}
+        playlists = session.get('playlists')
+        if (session.get('version') != self.session_version or not playlists
+                or not all(os.path.exists(path) for path in playlists)):
+            self.session_finished()
+            return
+        
+        # The playlist comes back from the parse cache, so nothing is re-parsed
+        self.tabs.setCurrentIndex(session.get('tab', 0))
+        self.pending_session = session
+        if session.get('merged'):
+            self.load_merged(playlists)
+            return
+        for info in self.playlist_info.values():
+            if info.get('path') == playlists[0]:
+                self.playlist_input.setText(info.get('url', ''))
+                break
+        self.load_playlist(playlists[0])
+        
+    def apply_session(self, session):
+        """Restore search and tree state once the session's playlist is in the trees"""
+        self.pending_session = None
+        # Signals are blocked so restoring the search box doesn't start another search
+        self.search_input.blockSignals(True)
+        self.search_input.setText(session.get('search', ''))
+        self.search_input.blockSignals(False)
+        self.global_search_checkbox.blockSignals(True)
+        self.global_search_checkbox.setChecked(session.get('global_search', False))
+        self.global_search_checkbox.blockSignals(False)
+        
+        # Each tree reapplies its own search, then its expansion and scroll position
+        trees = session.get('trees', {})
+        for tree, section in ((self.live_tv_tree, 'channels'), (self.movies_tree, 'movies'),
+                              (self.series_tree, 'series')):
+            if section in trees:
+                tree.restore_view_state(trees[section])
+        if self.global_search_checkbox.isChecked():
+            self.perform_search()
+        self.session_finished()
+        self.status_label.setText(f"Restored last session in {self.startup_timings['interactive']:.2f}s")
+        
+    def session_finished(self):
+        now = time.perf_counter()
+        self.startup_timings['interactive'] = now - LAUNCH_TIME
+        tracer.record('startup', LAUNCH_TIME, now, dict(self.startup_timings))
+        self.session_restored.emit()
+        
+    def save_session(self):
+        """Write the loaded playlist and what is shown of it to the session file"""
+        if self.loaded_merge:
+            playlists = self.loaded_merge
+        elif self.loaded_playlist_path:
+            playlists = [self.loaded_playlist_path]
+        else:
+            return  # Nothing loaded; keep the previous session
+        session = {
+            'version': self.session_version,
+            'playlists': playlists,
+            'merged': bool(self.loaded_merge),
+            'tab': self.tabs.currentIndex(),
+            'search': self.search_input.text(),
+            'global_search': self.global_search_checkbox.isChecked(),
+            'trees': {section: tree.view_state() for tree, section in (
+                (self.live_tv_tree, 'channels'), (self.movies_tree, 'movies'), (self.series_tree, 'series'))}
+        }
+        try:
+            with open(self.session_file + '.tmp', 'w') as f:
+                json.dump(session, f)
+            os.replace(self.session_file + '.tmp', self.session_file)
+        except OSError as e:
+            print(f"Error saving session: {e}")
+        
     def closeEvent(self, event):
-        self.save_playlist_info()
+        self.save_session()
+        # Let workers finish saving parsed playlists and guide indexes to disk
+        for worker in self.parser_workers + self.epg_workers:
+            worker.wait()
+        if self.trace_path:
+            try:
+                tracer.export(self.trace_path)
+            except OSError as e:
+                print(f"Error writing trace: {e}")
+        if self.health_checker is not None:
+            self.health_checkers.append(self.health_checker)
+        for worker in self.health_checkers:
+            worker.cancel()
+        for worker in self.health_checkers:
+            worker.wait()
+        self.logo_loader.shutdown()
         event.accept()
 
 def main():
@@ -1102,8 +2697,11 @@ def main():
     app = QApplication(sys.argv)
     player = IPTVPlayer()
     player.show()
+    
+    # Load libVLC and warm up players once the last session is back, not on first playback
+    player.session_restored.connect(VLCPlayerPool.shared().warm_up)
+    app.aboutToQuit.connect(VLCPlayerPool.shared().shutdown)
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
-    import re
     main()
@@ -0,0 +1,60 @@
+import os
+
+from iptv_core import load_playlist, PlaylistCache
+
+from test_update import write_playlist, make_entries, entries_of
+
+def cached_load(path, cache):
+    parser, *sections = load_playlist(path, cache=cache)
+    return parser, sections
+
+def test_hit_returns_the_parsed_playlist(tmp_path):
+    path = write_playlist(tmp_path / 'p.m3u', make_entries(30))
+    cache = PlaylistCache(str(tmp_path / 'cache'))
+    parser, sections = cached_load(path, cache)
+    assert os.path.exists(cache.cache_path(path))
+    
+    channels, movies, series, header, shows = cache.load(path)
+    assert entries_of((channels, movies, series)) == entries_of(sections)
+    assert list(shows) == list(parser.series_shows)
+    assert cache.load(str(tmp_path / 'other.m3u')) is None
+
+def test_miss_when_the_playlist_changes(tmp_path):
+    path = write_playlist(tmp_path / 'p.m3u', make_entries(30))
+    cache = PlaylistCache(str(tmp_path / 'cache'))
+    cached_load(path, cache)
+    stat = os.stat(path)
+    
+    # Same size, newer mtime
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cache.load(path) is None
+    cached_load(path, cache)
+    assert cache.load(path) is not None
+    
+    # Same mtime, different size
+    stat = os.stat(path)
+    write_playlist(path, make_entries(31))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.load(path) is None
+
+def test_stale_version_is_a_miss(tmp_path, monkeypatch):
+    path = write_playlist(tmp_path / 'p.m3u', make_entries(30))
+    cache = PlaylistCache(str(tmp_path / 'cache'))
+    cached_load(path, cache)
+    monkeypatch.setattr(PlaylistCache, 'version', PlaylistCache.version + 1)
+    assert cache.load(path) is None
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = PlaylistCache(str(tmp_path / 'cache'))
+    paths = [write_playlist(tmp_path / f'{name}.m3u', make_entries(30, name)) for name in 'abc']
+    for age, path in zip((300, 200), paths[:2]):
+        cached_load(path, cache)
+        # Stored in the past, so the eviction order doesn't depend on clock resolution
+        os.utime(cache.cache_path(path), (os.path.getmtime(path) - age,) * 2)
+    # Loading a marks it as recently used, leaving b the oldest
+    assert cache.load(paths[0]) is not None
+    
+    sizes = [os.path.getsize(cache.cache_path(path)) for path in paths[:2]]
+    cache.max_bytes = sizes[0] + sizes[1]
+    cached_load(paths[2], cache)
+    assert [os.path.exists(cache.cache_path(path)) for path in paths] == [True, False, True]
@@ -0,0 +1,165 @@
+import gzip
+import os
+import socket
+import struct
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+import iptv_core as core
+
+PLAYLIST = b'#EXTM3U\n' + b''.join(
+    b'#EXTINF:-1 group-title="News",Channel %d\nhttp://provider.example/live/u/p/%d.ts\n' % (i, i)
+    for i in range(5000))
+
+class PlaylistHandler(BaseHTTPRequestHandler):
+    """Serves PLAYLIST with byte ranges; `broken` requests end mid-body with `failure`"""
+    failure = None  # 'reset' or 'stall'
+    broken = 0
+    seen = []  # Request headers, in order
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).seen.append(dict(self.headers))
+        start = 0
+        if self.headers.get('Range'):
+            start = int(self.headers['Range'].split('=')[1].rstrip('-'))
+        body = PLAYLIST[start:]
+        self.send_response(206 if start else 200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        if type(self).broken:
+            type(self).broken -= 1
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            if self.failure == 'stall':
+                time.sleep(1.5)
+            # Abort with a TCP reset rather than a clean close
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+LAST_MODIFIED = 'Wed, 01 Oct 2025 10:00:00 GMT'
+
+class ConditionalHandler(BaseHTTPRequestHandler):
+    """Serves PLAYLIST with validators, gzipped if `compress`, and 304 when they match"""
+    compress = False
+    seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).seen.append(dict(self.headers))
+        if (self.headers.get('If-None-Match') == '"v1"'
+                or self.headers.get('If-Modified-Since') == LAST_MODIFIED):
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = PLAYLIST
+        self.send_response(200)
+        if self.compress and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"v1"')
+        self.send_header('Last-Modified', LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+def make_conditional_handler(compress=False):
+    return type('Handler', (ConditionalHandler,), {'compress': compress, 'seen': []})
+
+def make_handler(failure, broken=1):
+    return type('Handler', (PlaylistHandler,), {'failure': failure, 'broken': broken, 'seen': []})
+
+def make_downloader(url, tmp_path):
+    downloader = core.PlaylistDownloader(url + '/playlist.m3u', str(tmp_path / 'playlist.m3u'))
+    downloader.retry_backoff = 0.01
+    downloader.timeout = (2, 0.5)
+    return downloader
+
+def test_connection_reset_mid_body_is_retried_and_resumed(serve, tmp_path):
+    handler = make_handler('reset')
+    downloader = make_downloader(serve(handler), tmp_path)
+    delays = []
+    downloader.retrying.connect(delays.append)
+    
+    assert downloader.fetch() is True
+    assert (tmp_path / 'playlist.m3u').read_bytes() == PLAYLIST
+    assert len(delays) == 1
+    # The reset may discard data in flight, so it resumes from what was received
+    resumed_from = int(handler.seen[1]['Range'].split('=')[1].rstrip('-'))
+    assert 0 < resumed_from <= len(PLAYLIST) // 2
+
+def test_stalled_body_is_retried_and_resumed(serve, tmp_path):
+    handler = make_handler('stall')
+    downloader = make_downloader(serve(handler), tmp_path)
+    
+    assert downloader.fetch() is True
+    assert (tmp_path / 'playlist.m3u').read_bytes() == PLAYLIST
+    assert 'Range' in handler.seen[1]
+
+def test_gives_up_after_max_retries(serve, tmp_path):
+    handler = make_handler('reset', broken=10)
+    downloader = make_downloader(serve(handler), tmp_path)
+    downloader.max_retries = 2
+    
+    with pytest.raises(requests.ConnectionError):
+        downloader.fetch()
+    assert len(handler.seen) == 3
+    assert not (tmp_path / 'playlist.m3u').exists()
+
+def test_first_download_keeps_validators(serve, tmp_path):
+    downloader = make_downloader(serve(make_conditional_handler()), tmp_path)
+    
+    assert downloader.fetch() is True
+    assert (tmp_path / 'playlist.m3u').read_bytes() == PLAYLIST
+    assert downloader.validators == {'etag': '"v1"', 'last_modified': LAST_MODIFIED}
+
+def test_matching_etag_is_not_modified(serve, tmp_path):
+    handler = make_conditional_handler()
+    (tmp_path / 'playlist.m3u').write_bytes(b'local copy')
+    downloader = make_downloader(serve(handler), tmp_path)
+    downloader.validators = {'etag': '"v1"', 'last_modified': ''}
+    
+    assert downloader.fetch() is False
+    assert handler.seen[0]['If-None-Match'] == '"v1"'
+    assert (tmp_path / 'playlist.m3u').read_bytes() == b'local copy'
+    assert os.listdir(tmp_path) == ['playlist.m3u']
+
+def test_matching_last_modified_is_not_modified(serve, tmp_path):
+    handler = make_conditional_handler()
+    (tmp_path / 'playlist.m3u').write_bytes(b'local copy')
+    downloader = make_downloader(serve(handler), tmp_path)
+    downloader.validators = {'last_modified': LAST_MODIFIED}
+    
+    assert downloader.fetch() is False
+    assert 'If-None-Match' not in handler.seen[0]
+    assert (tmp_path / 'playlist.m3u').read_bytes() == b'local copy'
+
+def test_validators_need_the_local_copy(serve, tmp_path):
+    handler = make_conditional_handler()
+    downloader = make_downloader(serve(handler), tmp_path)
+    downloader.validators = {'etag': '"v1"', 'last_modified': LAST_MODIFIED}
+    
+    # Without the file they describe, a 304 would leave nothing to load
+    assert downloader.fetch() is True
+    assert 'If-None-Match' not in handler.seen[0]
+    assert (tmp_path / 'playlist.m3u').read_bytes() == PLAYLIST
+
+def test_gzip_body_is_decoded(serve, tmp_path):
+    handler = make_conditional_handler(compress=True)
+    downloader = make_downloader(serve(handler), tmp_path)
+    
+    assert downloader.fetch() is True
+    assert 'gzip' in handler.seen[0]['Accept-Encoding']
+    assert (tmp_path / 'playlist.m3u').read_bytes() == PLAYLIST
+    assert downloader.validators['etag'] == '"v1"'
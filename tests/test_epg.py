@@ -0,0 +1,61 @@
+import calendar
+import gzip
+
+import pytest
+
+from iptv_core import parse_xmltv_time, EPGIndex, ingest_xmltv
+
+def utc(*fields):
+    return calendar.timegm(fields + (0, 0, 0))
+
+@pytest.mark.parametrize('value, expected', [
+    ('20240101120000 +0000', utc(2024, 1, 1, 12, 0, 0)),
+    ('20240101120000 +0130', utc(2024, 1, 1, 10, 30, 0)),
+    ('20240101120000 -0500', utc(2024, 1, 1, 17, 0, 0)),
+    ('20240101120000', utc(2024, 1, 1, 12, 0, 0)),
+    ('202401011200', utc(2024, 1, 1, 12, 0, 0)),
+])
+def test_parse_xmltv_time(value, expected):
+    assert parse_xmltv_time(value) == expected
+
+def test_now_next():
+    index = EPGIndex()
+    # Added out of order, with a gap between 300 and 400
+    for start, stop, title in ((200, 300, 'Second'), (100, 200, 'First'), (400, 500, 'Third')):
+        index.add('bbc.uk', start, stop, title)
+    index.finalize()
+    
+    assert index.now_next('BBC.uk', now=150) == [(100, 200, 'First'), (200, 300, 'Second')]
+    assert index.now_next('bbc.uk', now=200) == [(200, 300, 'Second'), (400, 500, 'Third')]
+    # Nothing airing: starts from the next programme
+    assert index.now_next('bbc.uk', now=350) == [(400, 500, 'Third')]
+    assert index.now_next('bbc.uk', now=50, count=1) == [(100, 200, 'First')]
+    assert index.now_next('bbc.uk', now=600) == []
+    assert index.now_next('other', now=150) == []
+    assert index.now_next('', now=150) == []
+
+XMLTV = '''<?xml version="1.0" encoding="UTF-8"?>
+<tv>
+  <channel id="BBC.uk"><display-name>BBC One</display-name></channel>
+  <programme start="20240101130000 +0100" stop="20240101130000 +0000" channel="BBC.uk"><title>Second</title></programme>
+  <programme start="20240101110000 +0000" stop="20240101120000 +0000" channel="BBC.uk"><title> First </title></programme>
+  <programme start="20240101110000 +0000" stop="20240101113000 +0000" channel="itv.uk"><title>News</title></programme>
+  <programme start="bad" channel="itv.uk"><title>Skipped</title></programme>
+  <programme start="20240101113000 +0000" channel="itv.uk"><title>No stop</title></programme>
+</tv>
+'''
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_ingest_xmltv(tmp_path, compress):
+    path = tmp_path / 'guide.xml'
+    data = XMLTV.encode()
+    path.write_bytes(gzip.compress(data) if compress else data)
+    index = ingest_xmltv(str(path))
+    
+    assert len(index) == 4
+    assert index.now_next('bbc.uk', now=utc(2024, 1, 1, 11, 30, 0)) == [
+        (utc(2024, 1, 1, 11, 0, 0), utc(2024, 1, 1, 12, 0, 0), 'First'),
+        (utc(2024, 1, 1, 12, 0, 0), utc(2024, 1, 1, 13, 0, 0), 'Second')]
+    no_stop = utc(2024, 1, 1, 11, 30, 0)
+    assert index.now_next('itv.uk', now=utc(2024, 1, 1, 11, 0, 0)) == [
+        (utc(2024, 1, 1, 11, 0, 0), no_stop, 'News'), (no_stop, no_stop, 'No stop')]
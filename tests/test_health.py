@@ -0,0 +1,85 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import iptv_core as core
+
+class StreamHandler(BaseHTTPRequestHandler):
+    """/live answers HEAD, /nohead only a ranged GET, /slow stalls and anything else is 404"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        if self.path == '/nohead':
+            self.send_response(405)
+        elif self.path == '/slow':
+            time.sleep(1)
+            self.send_response(200)
+        else:
+            self.send_response(200 if self.path == '/live' else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        self.send_response(206)
+        self.send_header('Content-Length', '1')
+        self.end_headers()
+        self.wfile.write(b'x')
+
+def check(urls):
+    checker = core.StreamHealthChecker(urls, concurrency=4)
+    checker.timeout = (1, 0.3)
+    results = []
+    finished = []
+    checker.results_ready.connect(results.extend)
+    checker.finished.connect(lambda reachable, checked: finished.append((reachable, checked)))
+    checker.run()
+    return {url: (ok, status) for url, ok, status, latency_ms in results}, finished[0], results
+
+def test_probe_results(serve):
+    base = serve(StreamHandler)
+    urls = [base + '/live', base + '/nohead', base + '/missing', base + '/slow', 'rtmp://127.0.0.1/live']
+    by_url, finished, results = check(urls)
+    
+    assert by_url == {
+        base + '/live': (True, 200),
+        base + '/nohead': (True, 206),  # HEAD rejected, first byte served
+        base + '/missing': (False, 404),
+        base + '/slow': (False, 0),  # timed out
+        'rtmp://127.0.0.1/live': (False, 0)  # not HTTP, can't be probed
+    }
+    assert finished == (2, 5)
+    assert all(latency_ms >= 0 for _, _, _, latency_ms in results)
+
+def test_cancel_drops_queued_probes(serve):
+    base = serve(StreamHandler)
+    checker = core.StreamHealthChecker([base + '/slow'] * 40, concurrency=2)
+    finished = []
+    checker.finished.connect(lambda reachable, checked: finished.append(checked))
+    threading.Timer(0.1, checker.cancel).start()
+    start = time.perf_counter()
+    checker.run()
+    
+    # The two running probes end; the two queued behind them never start
+    assert time.perf_counter() - start < 1.8
+    assert finished == [2]
+
+def test_cache_entries_and_ttl(serve, tmp_path):
+    base = serve(StreamHandler)
+    _, _, results = check([base + '/live', base + '/missing'])
+    path = str(tmp_path / 'stream_health.json')
+    cache = core.StreamHealthCache(path, ttl=60)
+    cache.update(results)
+    
+    assert cache.get(base + '/live') == 'ok'
+    assert cache.get(base + '/missing') == 'dead'
+    assert cache.entries[base + '/missing'][2] == 404
+    assert cache.stale([base + '/live', base + '/other']) == [base + '/other']
+    
+    # Results older than the TTL are probed again and not saved
+    cache.entries[base + '/missing'][1] -= 61
+    assert cache.get(base + '/missing') is None
+    assert cache.stale([base + '/live', base + '/missing']) == [base + '/missing']
+    cache.save()
+    assert list(core.StreamHealthCache(path, ttl=60).entries) == [base + '/live']
@@ -0,0 +1,35 @@
+import pytest
+
+from iptv_core import load_playlist, MediaLibrary
+
+PLAYLIST = '''#EXTM3U
+#EXTINF:-1 tvg-id="bbc.uk" group-title="UK",BBC News
+http://host/live/1.ts
+#EXTINF:-1 group-title="UK",Sky Sports
+http://host/live/2.ts
+#EXTINF:-1 group-title="Films",The Newsroom
+http://host/movie/3.mkv
+'''
+
+@pytest.fixture(params=[True, False], ids=['fts', 'like'])
+def library(request, tmp_path, monkeypatch):
+    if not request.param:
+        # What an SQLite older than 3.34, without the trigram tokenizer, reports
+        monkeypatch.setattr(MediaLibrary, 'fts_schema', MediaLibrary.fts_schema.replace('trigram', 'missing'))
+    library = MediaLibrary(str(tmp_path / 'library.db'))
+    assert library.fts is request.param
+    return library
+
+def test_search_and_lookups(library, tmp_path):
+    path = tmp_path / 'p.m3u'
+    path.write_text(PLAYLIST)
+    load_playlist(str(path), library=library)
+    
+    assert [name for *_, name in library.search('news')] == ['BBC News', 'The Newsroom']
+    assert [(section, group, name) for _, section, group, _, name in library.search('sk')] == [
+        ('channels', 'UK', 'Sky Sports')]
+    assert [name for _, _, _, _, name, _ in library.entries_by_tvg_id('bbc.uk')] == ['BBC News']
+    assert library.load(str(path))[1]['Films'][0].stream_url == 'http://host/movie/3.mkv'
+    
+    library.remove_playlist('p.m3u')
+    assert library.search('news') == []
@@ -0,0 +1,34 @@
+from iptv_core import load_playlist, merge_playlists, stream_sources
+
+def write_playlist(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('#EXTM3U\n')
+        for name, tvg_id, url in entries:
+            f.write(f'#EXTINF:-1 tvg-id="{tvg_id}" group-title="News",{name}\n{url}\n')
+    return str(path)
+
+def merge(tmp_path, *playlists):
+    paths = [write_playlist(tmp_path / f'{n}.m3u', entries) for n, entries in enumerate(playlists)]
+    sections = [load_playlist(path)[1:] for path in paths]
+    return merge_playlists([f'source {n}' for n in range(len(paths))], sections.__getitem__)
+
+def test_merge_drops_duplicates_and_keeps_alternates(tmp_path):
+    channels, movies, series, duplicates = merge(tmp_path, [
+        ('One', 'one.tv', 'http://a.example/live/1'),
+        ('Two', '', 'http://a.example/live/2'),
+    ], [
+        ('One copy', '', 'HTTP://A.EXAMPLE/live/1#backup'),
+        ('Two other', '', 'http://b.example/live/2'),
+        ('One HD', 'ONE.tv', 'http://b.example/live/1'),
+    ])
+    names = [item.name for item in channels['News']]
+    assert names == ['One', 'Two', 'Two other']
+    assert duplicates == 2
+    assert [url for _, url in stream_sources(channels['News'][0])] == [
+        'http://a.example/live/1', 'HTTP://A.EXAMPLE/live/1#backup', 'http://b.example/live/1']
+
+def test_merge_keeps_distinct_entries(tmp_path):
+    entries = [(f'Channel {i}', f'ch{i}', f'http://a.example/live/{i}') for i in range(2000)]
+    channels, _, _, duplicates = merge(tmp_path, entries, [])
+    assert duplicates == 0
+    assert len(channels['News']) == 2000
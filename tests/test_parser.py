@@ -0,0 +1,57 @@
+import pytest
+
+from iptv_core import parse_extinf, PlaylistParser, load_playlist
+
+from test_update import write_playlist, make_entries
+
+@pytest.mark.parametrize('line, attrs, title', [
+    ('#EXTINF:-1 tvg-id="bbc.uk" tvg-name="BBC One" tvg-logo="http://l/1.png" group-title="UK",BBC One HD',
+     {'tvg-id': 'bbc.uk', 'tvg-name': 'BBC One', 'tvg-logo': 'http://l/1.png', 'group-title': 'UK'},
+     'BBC One HD'),
+    ('#EXTINF:-1,Plain Name', {}, 'Plain Name'),
+    ('#EXTINF:-1 tvg-id="x"', {'tvg-id': 'x'}, ''),
+    # Commas inside values and in the title
+    ('#EXTINF:-1 group-title="News, UK" tvg-logo="http://l/a,b.png",Title, Part 2',
+     {'group-title': 'News, UK', 'tvg-logo': 'http://l/a,b.png'}, 'Title, Part 2'),
+    # A title that looks like an attribute stays the title
+    ('#EXTINF:-1 tvg-name="A" group-title="News, UK",Show a="b" c',
+     {'tvg-name': 'A', 'group-title': 'News, UK'}, 'Show a="b" c'),
+    ('#EXTINF:-1 group-title="G",He said "hi, there"', {'group-title': 'G'}, 'He said "hi, there"'),
+    ('#EXTINF:-1 tvg-id="" ,  Spaced  ', {'tvg-id': ''}, 'Spaced'),
+])
+def test_parse_extinf(line, attrs, title):
+    assert parse_extinf(line) == (attrs, title)
+
+def test_chunks_add_up_to_the_parsed_playlist(tmp_path, monkeypatch):
+    monkeypatch.setattr(PlaylistParser, 'chunk_size', 4)
+    path = write_playlist(tmp_path / 'p.m3u', make_entries(30))
+    parser = PlaylistParser(path)
+    chunks = []
+    parsed = []
+    parser.chunk_ready.connect(lambda *sections: chunks.append(sections))
+    parser.finished.connect(lambda *sections: parsed.extend(sections))
+    parser.run()
+    
+    assert [sum(len(items) for section in chunk for items in section.values()) for chunk in chunks] == [4] * 7 + [2]
+    # Each group's chunks, joined in order, hold the same items as the finished result
+    for index, section in enumerate(parsed):
+        for group, items in section.items():
+            chunked = [item.stream_url for chunk in chunks for item in chunk[index].get(group, [])]
+            assert chunked == [item.stream_url for item in items]
+    assert parser.stats['entries'] == 30
+
+def test_parallel_parse_matches_sequential(tmp_path, monkeypatch):
+    monkeypatch.setattr(PlaylistParser, 'parallel_min_bytes', 0)
+    entries = make_entries(200) + [(f'Film {i}', 'Films', f'http://host/movie/{i}.mp4') for i in range(20)]
+    path = write_playlist(tmp_path / 'p.m3u', entries)
+    sequential = load_playlist(path)
+    parallel = load_playlist(path, workers=2)
+    
+    assert parallel[0].stats['workers'] == 2
+    assert parallel[0].stats['entries'] == sequential[0].stats['entries'] == 220
+    for ours, theirs in zip(parallel[1:], sequential[1:]):
+        assert list(ours) == list(theirs)
+        for group in theirs:
+            assert [item.name for item in ours[group]] == [item.name for item in theirs[group]]
+            assert [item.stream_url for item in ours[group]] == [item.stream_url for item in theirs[group]]
+    assert list(parallel[0].series_shows) == list(sequential[0].series_shows)
@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+from iptv_core import SearchIndex
+
+def make_index(count=20000):
+    items = [SimpleNamespace(name=f"Channel {i}", group='News') for i in range(count)]
+    return SearchIndex({'News': items})
+
+def test_search_scan_stops_when_cancelled():
+    index = make_index()
+    checks = []
+    
+    def is_cancelled():
+        checks.append(1)
+        return len(checks) > 1
+    
+    # A short query scans every name, so the check has to happen mid-scan
+    assert index.search('1', is_cancelled=is_cancelled) is None
+    assert len(checks) == 2
+
+def test_ranked_search_cancelled_during_scan():
+    index = make_index()
+    assert index.ranked_search('channel', is_cancelled=lambda: True) is None
+
+def test_search_results_unchanged_by_cancellation_checks():
+    index = make_index()
+    for query in ('1', 'channel 19'):
+        assert index.search(query, is_cancelled=lambda: False) == index.search(query)
+    assert index.ranked_search('channel 19999', 1, lambda: False) == [(100, 19999)]
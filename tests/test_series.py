@@ -0,0 +1,47 @@
+import pytest
+
+from iptv_core import parse_episode, group_series, split_seasons, MediaStore, MediaList
+
+@pytest.mark.parametrize('name, parsed', [
+    ('Show Name S01E02', ('Show Name', 1, 2)),
+    ('Show Name - s2 e10 - Title', ('Show Name', 2, 10)),
+    ('Show.Name.S03.E04.720p', ('Show.Name', 3, 4)),
+    ('Show Name Season 1 Episode 12', ('Show Name', 1, 12)),
+    ('Show Name 4x07', ('Show Name', 4, 7)),
+    ('S01E01', ('S01E01', 1, 1)),
+    ('Standalone Special', ('Standalone Special', 0, 0)),
+])
+def test_parse_episode(name, parsed):
+    assert parse_episode(name) == parsed
+
+def series_of(groups):
+    """Build a {group: MediaList} dict from {group: [(name, url)]}"""
+    store = MediaStore()
+    series = {}
+    for group, entries in groups.items():
+        items = series[group] = MediaList(store)
+        for name, url in entries:
+            items.append_id(store.add(name, "", group, url))
+    return series
+
+def test_group_series_sorts_shows_by_season_and_episode():
+    series = series_of({
+        'A': [('Alpha S02E01', 'http://h/5.mkv'), ('Beta S01E02', 'http://h/2.mkv'),
+              ('Alpha S01E10', 'http://h/3.mkv')],
+        'B': [('Alpha S01E02', 'http://h/4.mkv'), ('Beta S01E01', 'http://h/1.mkv'),
+              # No numbers in the name: ordered by the number in the URL
+              ('Gamma', 'http://h/20.mkv'), ('Gamma', 'http://h/9.mkv')],
+    })
+    shows = group_series(series)
+    assert sorted(shows) == ['Alpha', 'Beta', 'Gamma']
+    assert [item.name for item in shows['Alpha']] == ['Alpha S01E02', 'Alpha S01E10', 'Alpha S02E01']
+    assert [item.name for item in shows['Beta']] == ['Beta S01E01', 'Beta S01E02']
+    assert [item.stream_url for item in shows['Gamma']] == ['http://h/9.mkv', 'http://h/20.mkv']
+
+def test_split_seasons_returns_contiguous_runs():
+    names = ['Show S01E01', 'Show S01E02', 'Show S02E01', 'Show S03E01', 'Show S03E02', 'Show S03E03']
+    entries = [(name, f'http://h/{i}.mkv') for i, name in enumerate(reversed(names))]
+    show = group_series(series_of({'G': entries}))['Show']
+    assert [item.name for item in show] == names
+    assert split_seasons(show) == [(1, 0, 2), (2, 2, 3), (3, 3, 6)]
+    assert split_seasons([]) == []
@@ -0,0 +1,44 @@
+import json
+import os
+
+from iptv_core import StatsLog
+
+def test_session_continues_in_parts(tmp_path):
+    # Records are 24 bytes, so a part takes three before reaching max_bytes
+    log = StatsLog(str(tmp_path), max_bytes=50)
+    for i in range(10):
+        log.append({'event': 'parse', 'i': i})
+    
+    files = [str(tmp_path / f'stats-{log.session}{suffix}.jsonl') for suffix in ('', '.2', '.3', '.4')]
+    assert sorted(log.log_files()) == sorted(files)
+    records = []
+    for path in files:
+        with open(path) as f:
+            records.extend(json.loads(line) for line in f)
+    assert [record['i'] for record in records] == list(range(10))
+
+def test_keeps_the_newest_files(tmp_path):
+    (tmp_path / 'other.jsonl').write_text('')
+    for age in range(5):
+        path = tmp_path / f'stats-old{age}.jsonl'
+        path.write_text('{}\n')
+        os.utime(path, (1000 - age,) * 2)
+    
+    log = StatsLog(str(tmp_path), keep=3)
+    log.append({'event': 'start'})
+    assert [os.path.basename(path) for path in log.log_files()] == [
+        'stats-old1.jsonl', 'stats-old0.jsonl', f'stats-{log.session}.jsonl']
+    # Files with another prefix are left alone
+    assert (tmp_path / 'other.jsonl').exists()
+    
+    trace = StatsLog(str(tmp_path), keep=1, prefix='trace')
+    trace.append({'event': 'span'})
+    assert len(log.log_files()) == 3
+    assert trace.log_files() == [trace.path]
+
+def test_write_errors_are_reported_not_raised(tmp_path, capsys):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    log = StatsLog(str(blocker / 'logs'))
+    log.append({'event': 'start'})
+    assert 'Error writing stats log' in capsys.readouterr().out
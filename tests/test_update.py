@@ -0,0 +1,110 @@
+from iptv_core import load_playlist, PlaylistUpdater, MediaLibrary
+
+def write_playlist(path, entries):
+    """Write (name, group, url) entries, names as str or raw bytes; returns the path as a str"""
+    with open(path, 'wb') as f:
+        f.write(b'#EXTM3U\n')
+        for name, group, url in entries:
+            if isinstance(name, str):
+                name = name.encode('utf-8')
+            f.write(f'#EXTINF:-1 group-title="{group}",'.encode() + name + f'\n{url}\n'.encode())
+    return str(path)
+
+def make_entries(count, token='a'):
+    entries = []
+    for i in range(count):
+        if i % 3 == 2:
+            entries.append((f'Show {i % 5} S01 E{i:02d}', 'Shows', f'http://host/series/{token}/{i}.mkv'))
+        else:
+            entries.append((f'Channel {i}', f'Group {i % 4}', f'http://host/live/{token}/{i}.ts'))
+    return entries
+
+def update(path, parsed, library=None):
+    """Apply the playlist at path to a (parser, channels, movies, series) result"""
+    parser, *sections = parsed
+    updater = PlaylistUpdater(path, sections, parser.series_shows, library=library)
+    updated = []
+    updater.finished.connect(lambda channels, movies, series: updated.extend((channels, movies, series)))
+    updater.run()
+    return (updater,) + tuple(updated)
+
+def entries_of(sections):
+    return [(group, item.name, item.stream_url) for section in sections
+            for group, items in section.items() for item in items]
+
+def store_of(parsed):
+    return next(items.store for section in parsed[1:] for items in section.values())
+
+def test_update_counts_and_result(tmp_path):
+    entries = make_entries(30)
+    path = write_playlist(tmp_path / 'p.m3u', entries)
+    parsed = load_playlist(path)
+    
+    entries[4] = ('Channel 4 HD', 'Group 0', entries[4][2])
+    del entries[7]
+    entries.append(('New', 'Group 9', 'http://host/live/a/new.ts'))
+    write_playlist(path, entries)
+    updated = update(path, parsed)
+    
+    stats = updated[0].stats
+    assert (stats['unchanged'], stats['added'], stats['changed'], stats['removed']) == (28, 1, 1, 1)
+    assert entries_of(updated[1:]) == entries_of(load_playlist(path)[1:])
+    shows = updated[0].series_shows
+    assert [item.name for item in shows['Show 2']] == ['Show 2 S01 E02', 'Show 2 S01 E17']
+
+def test_repeated_updates_keep_store_size(tmp_path):
+    path = write_playlist(tmp_path / 'p.m3u', make_entries(300))
+    parsed = load_playlist(path)
+    for refresh in range(5):
+        # Providers that put a fresh token in every URL change every entry
+        write_playlist(path, make_entries(300, token=f't{refresh}'))
+        parsed = update(path, parsed)
+        assert (parsed[0].stats['added'], parsed[0].stats['removed']) == (300, 300)
+        assert len(store_of(parsed)) == 300
+        assert entries_of(parsed[1:]) == entries_of(load_playlist(path)[1:])
+        assert all(item.stream_url.startswith(f'http://host/series/t{refresh}/')
+                   for items in parsed[0].series_shows.values() for item in items)
+
+def test_added_entries_keep_unchanged_groups(tmp_path):
+    entries = make_entries(30)
+    path = write_playlist(tmp_path / 'p.m3u', entries)
+    parsed = load_playlist(path)
+    write_playlist(path, entries + [('New', 'Group 1', 'http://host/live/a/new.ts')])
+    updated = update(path, parsed)
+    
+    assert store_of(updated) is store_of(parsed) and len(store_of(updated)) == 31
+    assert updated[1]['Group 0'] is parsed[1]['Group 0']
+    assert updated[1]['Group 1'] is not parsed[1]['Group 1']
+
+def test_undecodable_entries_match_themselves(tmp_path):
+    entries = make_entries(6)
+    entries[0] = (b'Caf\xe9 \xff', 'Group 0', entries[0][2])
+    entries[1] = ('Channel 1 ', 'Group 1', entries[1][2])
+    path = write_playlist(tmp_path / 'p.m3u', entries)
+    parsed = load_playlist(path)
+    
+    updated = update(path, parsed)
+    assert updated[0].stats['unchanged'] == 6
+    assert store_of(updated) is store_of(parsed) and len(store_of(updated)) == 6
+
+def test_library_writes_only_changed_rows(tmp_path):
+    library = MediaLibrary(str(tmp_path / 'library.db'))
+    entries = make_entries(30)
+    path = write_playlist(tmp_path / 'p.m3u', entries)
+    parsed = load_playlist(path, library=library)
+    
+    entries[4] = ('Channel 4 HD', 'Group 0', entries[4][2])
+    del entries[7]
+    write_playlist(path, entries)
+    rows_before = dict(library.connection().execute("SELECT item, id FROM entries"))
+    updated = update(path, parsed, library)
+    # Nothing is left to write once the library holds this version
+    assert library.store(path, *updated[1:]) == {'added': 0, 'removed': 0, 'moved': 0}
+    
+    connection = library.connection()
+    rows_after = dict(connection.execute("SELECT item, id FROM entries"))
+    kept = set(rows_before.values()) & set(rows_after.values())
+    assert len(kept) == 28
+    assert entries_of(library.load(path)[:3]) == entries_of(load_playlist(path)[1:])
+    assert [name for *_, name in library.search('Channel 4 HD')] == ['Channel 4 HD']
+    assert library.search('Channel 7') == []